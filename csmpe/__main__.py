@@ -41,6 +41,7 @@ import urlparse
 from csmpe.context import InstallContext
 from csmpe.csm_pm import CSMPluginManager
 from csmpe.csm_pm import install_phases
+from csmpe.file_server import serve_repository as serve_repository_to_device
 
 _PLATFORMS = ["ASR9K", "NCS6K", "CRS"]
 _OS = ["IOS", "XR", "eXR", "XR"]
@@ -143,8 +144,17 @@ def plugin_list(platform, phase, os, detail, brief):
               help="Package for install operations. This package option can be repeated to provide multiple packages.")
 @click.option("--repository_url", default=None,
               help="The package repository URL. (i.e. tftp://server/dir")
+@click.option("--device_push", is_flag=True,
+              help="Let the device push the configuration to the embedded TFTP server on this host "
+                   "instead of retrieving it from the terminal.")
+@click.option("--serve_repository", default=None, type=click.Path(exists=True, file_okay=False),
+              help="Serve the local directory to the device over HTTP from this host "
+                   "and use it as the package repository URL.")
+@click.option("--max_sessions", default=2, type=click.IntRange(0, 16),
+              help="The maximum number of additional sessions to the device for the concurrent read-only commands.")
 @click.argument("plugin_name", required=False, default=None)
-def plugin_run(url, phase, cmd, log_dir, package, repository_url, plugin_name):
+def plugin_run(url, phase, cmd, log_dir, package, repository_url, device_push, serve_repository, max_sessions,
+               plugin_name):
 
     ctx = InstallContext()
     ctx.hostname = "Hostname"
@@ -167,13 +177,28 @@ def plugin_run(url, phase, cmd, log_dir, package, repository_url, plugin_name):
     ctx.log_level = logging.DEBUG
     ctx.software_packages = list(package)
     ctx.server_repository_url = repository_url
+    ctx.device_push = device_push
+    ctx.max_sessions = max_sessions
 
     if cmd:
         ctx.custom_commands = list(cmd)
 
-    pm = CSMPluginManager(ctx)
-    pm.set_name_filter(plugin_name)
-    results = pm.dispatch("run")
+    image_server = None
+    if serve_repository:
+        image_server = serve_repository_to_device(ctx, serve_repository)
+        if image_server is None:
+            raise click.UsageError("The repository can not be served to the device connected via the jumphost.")
+        click.echo("Serving {} at {}".format(serve_repository, ctx.server_repository_url))
+
+    try:
+        pm = CSMPluginManager(ctx)
+        pm.set_name_filter(plugin_name)
+        results = pm.dispatch("run")
+    finally:
+        if image_server is not None:
+            image_server.stop()
+            for stats in image_server.stats:
+                click.echo("Served {}".format(stats))
 
     click.echo("\n Plugin execution finished.\n")
     click.echo("Log files dir: {}".format(log_dir))
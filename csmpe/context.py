@@ -30,11 +30,14 @@
 import logging
 import os
 import re
+from collections import OrderedDict
 from time import time
 
 import condoor
 
 from decorators import delegate
+from session_pool import SessionPool, MAX_SESSIONS
+from inventory import Inventory
 
 
 class PluginError(Exception):
@@ -75,8 +78,9 @@ class Host(object):
                                      "software_packages", "active_cli", "inactive_cli", "committed_cli", "hostname",
                                      "log_directory", "pre_migrate_config_filename", "migration_directory",
                                      "post_migrate_config_handling_option", "get_server", "get_host",
-                                     "pre_migrate_override_hw_req"))
-@delegate("_connection", ("connect", "disconnect", "reconnect", "discovery", "send", "run_fsm", "reload"),
+                                     "pre_migrate_override_hw_req", "host_urls", "device_push",
+                                     "server_repository_directory"))
+@delegate("_connection", ("connect", "discovery", "send", "run_fsm"),
           ("family", "prompt", "os_type", "os_version"))
 class PluginContext(object):
     """ This is a class passed to the constructor during plugin instantiation.
@@ -85,6 +89,9 @@ class PluginContext(object):
     def __init__(self, csm=None):
         self._csm = csm
         self.current_plugin = ""
+        self._session_pool = None
+        self._inventory = None
+        self._deferred = OrderedDict()
         if csm is not None:
             self._connection = condoor.Connection(
                 self._csm.hostname,
@@ -135,6 +142,80 @@ class PluginContext(object):
             pass
             # raise AssertionError("Requested action not provided")
 
+    @property
+    def session_pool(self):
+        """The pool of the sessions to the device created on the first use."""
+        if self._session_pool is None:
+            self._session_pool = SessionPool(
+                self._connection,
+                self._csm.hostname,
+                self._csm.host_urls,
+                log_dir=self._csm.log_directory,
+                # the console line does not accept the additional sessions
+                max_sessions=0 if self._connection.is_console else getattr(self._csm, "max_sessions", MAX_SESSIONS)
+            )
+        return self._session_pool
+
+    def send_parallel(self, commands, timeout=60):
+        """
+        Sends the read-only commands concurrently on the additional sessions to the device
+        and returns the list of outputs in the order of commands.
+        """
+        return self.session_pool.send_parallel(commands, timeout=timeout)
+
+    def close_sessions(self):
+        """Disconnects the additional sessions to the device."""
+        if self._session_pool is not None:
+            self._session_pool.close()
+            self._session_pool = None
+
+    def defer(self, key, func):
+        """
+        Calls func(ctx) once at the end of the plugin dispatch.
+        The requests with the same key are coalesced into one call.
+        """
+        self._deferred[key] = func
+
+    def run_deferred(self):
+        """Calls the deferred functions in the order of the requests."""
+        while self._deferred:
+            key, func = self._deferred.popitem(last=False)
+            try:
+                func(self)
+            except Exception as e:
+                self.warning("Deferred '{}' failed: {}".format(key, e))
+
+    @property
+    def inventory(self):
+        """The inventory of the device nodes fetched once per device state epoch."""
+        if self._inventory is None:
+            self._inventory = Inventory(self.send)
+        return self._inventory
+
+    def _new_epoch(self):
+        """The device state changed, the cached inventory and the additional sessions are not valid."""
+        if self._inventory is not None:
+            self._inventory.invalidate()
+        self.close_sessions()
+
+    def reload(self, *args, **kwargs):
+        try:
+            return self._connection.reload(*args, **kwargs)
+        finally:
+            self._new_epoch()
+
+    def reconnect(self, *args, **kwargs):
+        try:
+            return self._connection.reconnect(*args, **kwargs)
+        finally:
+            self._new_epoch()
+
+    def disconnect(self, *args, **kwargs):
+        try:
+            return self._connection.disconnect(*args, **kwargs)
+        finally:
+            self._new_epoch()
+
     def _device_detect(self):
         """Connect to device using condoor"""
         self.info("Phase: Device Discovery")
@@ -0,0 +1,118 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import re
+
+from csmpe.core_plugins.csm_check_protocol_states.protocol_snapshot import ProtocolCheck, equal
+
+"""
+The IOS XR protocol state checks.
+
+RP/0/RP0/CPU0:#show isis neighbor summary
+IS-IS isp neighbor summary:
+State         L1       L2     L1L2
+Up             0        0        1
+
+RP/0/RP0/CPU0:#show ospf neighbor
+Neighbors for OSPF 1
+Neighbor ID     Pri   State           Dead Time   Address         Interface
+192.168.0.2     1     FULL/DR         00:00:35    10.0.0.2        GigabitEthernet0/0/0/0
+
+RP/0/RP0/CPU0:#show bgp summary
+Neighbor        Spk    AS MsgRcvd MsgSent   TblVer  InQ OutQ  Up/Down  St/PfxRcd
+10.0.0.2          0 65001    1234    1234      100    0    0 1d02h          15
+
+RP/0/RP0/CPU0:#show mpls ldp neighbor brief
+Peer               GR  NSR  Up Time     Discovery   Addresses     Labels
+10.0.0.2:0         N   N    1d02h       1     0     3     0     25     0
+"""
+
+BGP_PREFIX_TOLERANCE = 0.1  # the relative change of the received prefixes reported
+
+
+def bgp_rule(name, key, previous, current):
+    """The BGP session must stay established and receive the similar number of prefixes."""
+    (previous_state,), (current_state,) = previous, current
+    if not previous_state.isdigit():
+        return None  # the session was not established before upgrade
+    if not current_state.isdigit():
+        return "{} neighbor {} not established after upgrade: {}".format(name, key, current_state)
+    before, after = int(previous_state), int(current_state)
+    if abs(after - before) > before * BGP_PREFIX_TOLERANCE:
+        return "{} neighbor {} received prefixes changed from {} to {}".format(name, key, before, after)
+    return None
+
+
+def isis_from_legacy(neighbors):
+    """Converts the {<instance>: {<state>: [<L1>, <L2>, <L1L2>]}} data of the former ISIS plugin."""
+    snapshot = {}
+    for instance, states in neighbors.items():
+        for state, counts in states.items():
+            snapshot["{} {}".format(instance, state)] = list(counts)
+    return snapshot
+
+
+ISIS = ProtocolCheck(
+    "ISIS",
+    "show isis neighbor summary",
+    row_re=re.compile(r"^\s*(?P<state>Up|Init|Failed)\s+(?P<l1>\d+)\s+(?P<l2>\d+)\s+(?P<l1l2>\d+)", re.MULTILINE),
+    key=("state",),
+    fields=("l1", "l2", "l1l2"),
+    section_re=re.compile(r"IS-IS (?P<instance>.*) neighbor summary:"),
+    rule=equal,
+    legacy_key="isis_neighbors",
+    from_legacy=isis_from_legacy,
+)
+
+OSPF = ProtocolCheck(
+    "OSPF",
+    "show ospf neighbor",
+    row_re=re.compile(r"^(?P<neighbor>\d+\.\d+\.\d+\.\d+)\s+\d+\s+(?P<state>[\w-]+)(?:/\s*\S+)?\s+\S+\s+"
+                      r"\S+\s+(?P<interface>\S+)", re.MULTILINE),
+    key=("neighbor", "interface"),
+    fields=("state",),
+    section_re=re.compile(r"Neighbors for OSPF (?P<instance>\S+)"),
+)
+
+BGP = ProtocolCheck(
+    "BGP",
+    "show bgp summary",
+    row_re=re.compile(r"^(?P<neighbor>\d+\.\d+\.\d+\.\d+|[\da-fA-F]*:[\da-fA-F:]+)\s+\d+\s+\d+(?:\.\d+)?"
+                      r"(?:\s+\d+){5}\s+\S+\s+(?P<state>\S+)", re.MULTILINE),
+    key=("neighbor",),
+    fields=("state",),
+    rule=bgp_rule,
+)
+
+LDP = ProtocolCheck(
+    "LDP",
+    "show mpls ldp neighbor brief",
+    row_re=re.compile(r"^(?P<peer>\d+\.\d+\.\d+\.\d+:\d+)\s+[YN]\s+[YN]\s", re.MULTILINE),
+    key=("peer",),
+)
+
+CHECKS = [ISIS, OSPF, BGP, LDP]
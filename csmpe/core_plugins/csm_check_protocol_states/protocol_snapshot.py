@@ -0,0 +1,168 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from time import time
+from datetime import datetime
+
+"""
+The protocol state snapshot and compare engine.
+
+The protocol check is declared as the command, the compiled parser and the comparison rule.
+The parser runs the compiled row regex over the whole command output once (and the optional
+section header regex, i.e. the protocol instance) and produces the compact snapshot:
+
+{
+    "<section> <key>": [<field>, ...],
+}
+
+The snapshot is stored in Pre-Upgrade phase and compared with the current one in Post-Upgrade phase.
+The snapshot stored in the former per protocol format, i.e. by the earlier ISIS neighbor plugin,
+is converted by the check if no snapshot is found.
+The rule compares the values of the entry present in both snapshots. The entries missing after upgrade
+are always reported.
+"""
+
+MAX_SNAPSHOT_AGE = 60 * 60 * 2  # two hours
+
+
+def equal(name, key, previous, current):
+    """The comparison rule reporting any change of the fields."""
+    if previous != current:
+        return "{} {} changed from {} to {}".format(name, key, " ".join(previous), " ".join(current))
+    return None
+
+
+class ProtocolCheck(object):
+    """
+    The protocol state check.
+
+    :param name: the protocol name
+    :param command: the command showing the protocol state
+    :param row_re: the compiled regex matching the entry with the named groups, MULTILINE
+    :param key: the group names identifying the entry
+    :param fields: the group names of the compared values
+    :param section_re: the compiled regex matching the section header with the single named group or None
+    :param rule: the function (name, key, previous_fields, current_fields) returning the message or None
+    :param legacy_key: the storage key of the data stored in the former format or None
+    :param from_legacy: the function converting the data stored in the former format to the snapshot
+    """
+    def __init__(self, name, command, row_re, key, fields=(), section_re=None, rule=equal, legacy_key=None,
+                 from_legacy=None):
+        self.name = name
+        self.command = command
+        self.row_re = row_re
+        self.key = key
+        self.fields = fields
+        self.section_re = section_re
+        self.rule = rule
+        self.legacy_key = legacy_key
+        self.from_legacy = from_legacy
+
+    @property
+    def storage_key(self):
+        return "{}_snapshot".format(self.name.lower())
+
+    def _sections(self, output):
+        """Yields (section, start, end) tuples of the output."""
+        if self.section_re is None:
+            yield None, 0, len(output)
+            return
+        headers = list(self.section_re.finditer(output))
+        for index, header in enumerate(headers):
+            end = headers[index + 1].start() if index + 1 < len(headers) else len(output)
+            yield header.group(1), header.end(), end
+
+    def parse(self, output):
+        """Returns the snapshot of the command output."""
+        snapshot = {}
+        key, fields = self.key, self.fields
+        for section, start, end in self._sections(output):
+            for match in self.row_re.finditer(output, start, end):
+                values = match.group(*key) if len(key) > 1 else (match.group(key[0]),)
+                name = " ".join(values if section is None else (section,) + values)
+                snapshot[name] = [match.group(field) for field in fields]
+        return snapshot
+
+    def compare(self, previous, current):
+        """Returns the (changes, unchanged) tuple. The changes is the list of messages."""
+        changes = []
+        unchanged = 0
+        for key in sorted(previous):
+            if key not in current:
+                changes.append("{} {} missing after upgrade".format(self.name, key))
+                continue
+            message = self.rule(self.name, key, list(previous[key]), current[key])
+            if message:
+                changes.append(message)
+            else:
+                unchanged += 1
+        return changes, unchanged
+
+
+def check_protocols(ctx, checks):
+    """
+    Captures the protocol snapshots. Stores them in Pre-Upgrade phase and compares in Post-Upgrade phase.
+    The read-only commands are sent concurrently.
+    """
+    outputs = ctx.send_parallel([check.command for check in checks])
+    for check, output in zip(checks, outputs):
+        snapshot = check.parse(output or "")
+        filename = ctx.save_to_file(check.command, output or "")
+        if filename:
+            ctx.info("The '{}' command output saved to {}".format(check.command, filename))
+        ctx.info("{} entries found: {}".format(check.name, len(snapshot)))
+
+        if ctx.phase == "Pre-Upgrade":
+            ctx.save_data(check.storage_key, snapshot)
+            if filename:
+                # store the full_path to command output under the cmd key
+                ctx.save_data(check.command, filename)
+        elif ctx.phase == "Post-Upgrade":
+            compare_snapshot(ctx, check, snapshot)
+
+
+def compare_snapshot(ctx, check, snapshot):
+    previous, timestamp = ctx.load_data(check.storage_key)
+    if previous is None and check.legacy_key:
+        previous, timestamp = ctx.load_data(check.legacy_key)
+        if previous is not None:
+            previous = check.from_legacy(previous)
+    if previous is None:
+        ctx.warning("No {} data stored from Pre-Upgrade phase. Can't compare.".format(check.name))
+        return
+
+    if timestamp:
+        ctx.info("{} Pre-Upgrade data collected on {}".format(
+            check.name, datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M:%S')))
+        if timestamp < time() - MAX_SNAPSHOT_AGE:
+            ctx.warning("{} Pre-Upgrade phase data older than 2 hours".format(check.name))
+
+    changes, unchanged = check.compare(previous, snapshot)
+    for message in changes:
+        ctx.warning(message)
+    ctx.info("{}: {} entries the same as during pre-install check, {} changed".format(
+        check.name, unchanged, len(changes)))
@@ -0,0 +1,235 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import re
+from collections import namedtuple
+
+"""
+The hierarchical diff of the IOS XR configuration.
+
+The configuration is parsed into the tree of the blocks by the indentation:
+
+interface Bundle-Ether1
+ description core
+ ipv4 address 10.0.0.1 255.255.255.252
+!
+router isis core
+ address-family ipv4 unicast
+  metric-style wide
+ !
+!
+
+Every node has the digest of its line and the digests of its children, so the identical
+subtrees are skipped with a single comparison and the diff is proportional to the size of
+the configuration plus the size of the changes. The order of the sibling lines does not matter.
+"""
+
+ADDED = "+"
+REMOVED = "-"
+
+# the top level lines which are not the configuration: comments, the command, the prompt and the timestamp
+SKIP_RE = re.compile(r"^(?:!.*|end|Building configuration.*|show running-config.*|\S+#.*|"
+                     r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) \w{3} +\d+ \d+:\d+:\d+.*)$")
+
+ConfigChange = namedtuple("ConfigChange", "kind path node")
+
+
+_NO_CHILDREN = {}
+
+
+class ConfigNode(object):
+    """The configuration line with its sub-mode lines."""
+    __slots__ = ("line", "children", "digest")
+
+    def __init__(self, line):
+        self.line = line
+        # the leaves share the empty dictionary
+        self.children = _NO_CHILDREN
+        self.digest = None
+
+    def add(self, line):
+        children = self.children
+        if children is _NO_CHILDREN:
+            children = self.children = {}
+        key = line
+        occurrence = 1
+        while key in children:
+            # the same line repeated in the block
+            occurrence += 1
+            key = (line, occurrence)
+        node = children[key] = ConfigNode(line)
+        return node
+
+    def finalize(self):
+        """Computes the digests of the subtree, the siblings order is not significant."""
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not node.children:
+                node.digest = hash((node.line, ()))
+            elif visited:
+                node.digest = hash((node.line, tuple(sorted(child.digest for child in node.children.itervalues()))))
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.itervalues())
+        return self
+
+    def lines(self, indent=0):
+        """Returns the lines of the subtree indented by the depth."""
+        result = []
+        stack = [(self, indent)]
+        while stack:
+            node, depth = stack.pop()
+            result.append(" " * depth + node.line)
+            children = sorted(node.children.itervalues(), key=lambda child: child.line, reverse=True)
+            stack.extend((child, depth + 1) for child in children)
+        return result
+
+    def __len__(self):
+        return 1 + sum(len(child) for child in self.children.itervalues())
+
+
+def config_blocks(text):
+    """
+    Returns the dictionary of the top level blocks, the list of the configuration lines
+    of the block keyed by the first line of the block.
+    """
+    blocks = {}
+    block = None
+    for line in text.splitlines():
+        if not line or line[0] == "!":
+            continue
+        if line[0] != " ":
+            if SKIP_RE.match(line):
+                block = None
+                continue
+            key = line = line.rstrip()
+            occurrence = 1
+            while key in blocks:
+                occurrence += 1
+                key = (line, occurrence)
+            block = blocks[key] = [line]
+        elif block is not None:
+            stripped = line.lstrip()
+            if stripped and stripped[0] != "!":
+                block.append(line.rstrip())
+    return blocks
+
+
+def _parse_lines(key, lines, root):
+    """Adds the block lines under the root, the top level line is stored under the block key."""
+    if root.children is _NO_CHILDREN:
+        root.children = {}
+    node = root.children[key] = ConfigNode(lines[0])
+    stack = [(0, node)]
+    for line in lines[1:]:
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+        while stack[-1][0] >= indent:
+            stack.pop()
+        stack.append((indent, stack[-1][1].add(stripped)))
+    return root
+
+
+def parse_config(text):
+    """Returns the root ConfigNode of the configuration text."""
+    root = ConfigNode("")
+    for key, lines in config_blocks(text).iteritems():
+        _parse_lines(key, lines, root)
+    return root.finalize()
+
+
+def diff_trees(old, new, path=()):
+    """Returns the list of the ConfigChange between the two trees, the removed and added subtrees."""
+    changes = []
+    stack = [(old, new, path)]
+    while stack:
+        old_node, new_node, node_path = stack.pop()
+        if old_node.digest == new_node.digest:
+            continue
+        old_children = old_node.children
+        new_children = new_node.children
+        for key, old_child in sorted(old_children.iteritems(), key=_line):
+            new_child = new_children.get(key)
+            if new_child is None:
+                changes.append(ConfigChange(REMOVED, node_path, old_child))
+            elif old_child.digest != new_child.digest:
+                stack.append((old_child, new_child, node_path + (old_child.line,)))
+        for key, new_child in sorted(new_children.iteritems(), key=_line):
+            if key not in old_children:
+                changes.append(ConfigChange(ADDED, node_path, new_child))
+    changes.sort(key=lambda change: (change.path, change.node.line, change.kind))
+    return changes
+
+
+def _line(item):
+    return item[1].line
+
+
+def diff_configs(old_text, new_text):
+    """
+    Returns the list of the ConfigChange between the two configuration texts.
+    Only the top level blocks with the different text are parsed into the trees.
+    """
+    old_blocks = config_blocks(old_text)
+    new_blocks = config_blocks(new_text)
+    old_root = ConfigNode("")
+    new_root = ConfigNode("")
+    for key, old_lines in old_blocks.iteritems():
+        new_lines = new_blocks.get(key)
+        if new_lines != old_lines:
+            _parse_lines(key, old_lines, old_root)
+            if new_lines is not None:
+                _parse_lines(key, new_lines, new_root)
+    for key, new_lines in new_blocks.iteritems():
+        if key not in old_blocks:
+            _parse_lines(key, new_lines, new_root)
+    return diff_trees(old_root.finalize(), new_root.finalize())
+
+
+def format_diff(changes):
+    """Returns the diff text, the changed blocks with their parent lines and +/- prefixed lines."""
+    output = []
+    previous_path = ()
+    for change in changes:
+        path = change.path
+        common = 0
+        while common < min(len(path), len(previous_path)) and path[common] == previous_path[common]:
+            common += 1
+        for depth in range(common, len(path)):
+            output.append("  " + " " * depth + path[depth])
+        previous_path = path
+        output.extend(change.kind + " " + line for line in change.node.lines(len(path)))
+    return "\n".join(output)
+
+
+def summarize(changes):
+    """Returns the (added, removed) number of the configuration lines."""
+    added = sum(len(change.node) for change in changes if change.kind == ADDED)
+    removed = sum(len(change.node) for change in changes if change.kind == REMOVED)
+    return added, removed
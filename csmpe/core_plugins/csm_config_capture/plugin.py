@@ -27,7 +27,11 @@
 # =============================================================================
 
 
+import os
+
 from csmpe.plugins import CSMPlugin
+from csmpe.file_server import receive_from_device
+from config_diff import diff_configs, format_diff, summarize
 
 
 class Plugin(CSMPlugin):
@@ -38,8 +42,32 @@ class Plugin(CSMPlugin):
 
     def run(self):
         cmd = "show running-config"
-        output = self.ctx.send(cmd, timeout=2200)
+        output = receive_from_device(self.ctx, "running-config", "running-config", timeout=2200)
+        if output is None:
+            output = self.ctx.send(cmd, timeout=2200)
         file_name = self.ctx.save_to_file(cmd, output)
         if file_name is None:
             self.ctx.error("Unable to save device configuration to file: {}".format(file_name))
             return False
+
+        if self.ctx.phase == "Pre-Upgrade":
+            # store the full path to the configuration for the comparison after upgrade
+            self.ctx.save_data(cmd, os.path.join(self.ctx.log_directory, file_name))
+        elif self.ctx.phase == "Post-Upgrade":
+            self.compare_config(cmd, output)
+
+    def compare_config(self, cmd, output):
+        previous_file, timestamp = self.ctx.load_data(cmd)
+        if previous_file is None or not os.path.isfile(previous_file):
+            self.ctx.warning("No configuration stored from Pre-Upgrade phase. Can't compare.")
+            return
+
+        changes = diff_configs(self.ctx.load_from_file(previous_file), output)
+        if not changes:
+            self.ctx.info("The configuration is the same as before upgrade")
+            return
+
+        added, removed = summarize(changes)
+        file_name = self.ctx.save_to_file("{} diff".format(cmd), format_diff(changes) + "\n")
+        self.ctx.warning("The configuration changed during upgrade: {} lines added, {} lines removed. "
+                         "See {}".format(added, removed, file_name))
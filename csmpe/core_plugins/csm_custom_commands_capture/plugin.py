@@ -26,7 +26,12 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 
+import os
+
 from csmpe.plugins import CSMPlugin
+from snapshot_diff import diff_snapshots
+
+SNAPSHOTS_KEY = "custom_commands_snapshots"
 
 
 class Plugin(CSMPlugin):
@@ -38,14 +43,41 @@ class Plugin(CSMPlugin):
     def run(self):
         command_list = self.ctx.custom_commands
         if command_list:
-            for cmd in command_list:
-                self.ctx.info("Capturing output of '{}'".format(cmd))
-                output = self.ctx.send(cmd, timeout=2200)
+            snapshots = {}
+            self.ctx.info("Capturing output of {}".format(", ".join("'{}'".format(cmd) for cmd in command_list)))
+            # the commands are read-only, so they are captured concurrently on the additional sessions
+            outputs = self.ctx.send_parallel(command_list, timeout=2200)
+            for cmd, output in zip(command_list, outputs):
                 file_name = self.ctx.save_to_file(cmd, output)
                 if file_name is None:
                     self.ctx.error("Unable to save '{}' output to file: {}".format(cmd, file_name))
                     return False
+                snapshots[cmd] = (os.path.join(self.ctx.log_directory, file_name), output)
+
+            if self.ctx.phase == "Pre-Upgrade":
+                # store the full paths to the outputs for the comparison after upgrade
+                self.ctx.save_data(SNAPSHOTS_KEY, dict((cmd, path) for cmd, (path, output) in snapshots.items()))
+            elif self.ctx.phase == "Post-Upgrade":
+                self.compare_snapshots(snapshots)
 
         else:
             self.ctx.info("No custom commands provided.")
             return True
+
+    def compare_snapshots(self, snapshots):
+        previous_snapshots, timestamp = self.ctx.load_data(SNAPSHOTS_KEY)
+        if not previous_snapshots:
+            self.ctx.warning("No command outputs stored from Pre-Upgrade phase. Can't compare.")
+            return
+
+        for cmd in self.ctx.custom_commands:
+            previous_file = previous_snapshots.get(cmd)
+            if previous_file is None or not os.path.isfile(previous_file):
+                self.ctx.info("No '{}' output stored from Pre-Upgrade phase".format(cmd))
+                continue
+            diff = diff_snapshots(cmd, self.ctx.load_from_file(previous_file), snapshots[cmd][1])
+            if diff.changed:
+                file_name = self.ctx.save_to_file("{} diff".format(cmd), diff.format() + "\n")
+                self.ctx.warning("{}. See {}".format(diff.summary(), file_name))
+            else:
+                self.ctx.info(diff.summary())
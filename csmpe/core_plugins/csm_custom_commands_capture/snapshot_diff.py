@@ -0,0 +1,154 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import re
+from difflib import SequenceMatcher
+
+"""
+The comparison of the command output snapshots taken before and after the upgrade.
+
+The volatile fields, i.e. the timestamps, the uptimes and the counters, are replaced with
+placeholders by the normalization rules before the comparison. The rules are declared as
+(name, pattern, replacement) and the COMMAND_RULES select the additional rules for the commands.
+
+The lines are mapped to integers, the common head and tail are skipped and only the remaining
+lines are compared with the sequence matcher, so the unchanged outputs cost one pass.
+"""
+
+# (name, pattern, replacement) applied to every command
+COMMON_RULES = [
+    ("timestamp", re.compile(r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) \w{3} +\d+ \d+:\d+:\d+(?:\.\d+)?(?: \w+)?"),
+     "<timestamp>"),
+    ("date", re.compile(r"\b\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?"), "<timestamp>"),
+    ("uptime", re.compile(r"\b(?:\d+[ywdh]\d+[wdhm](?:\d+[hms])?|\d+:\d{2}:\d{2}(?:\.\d+)?)\b"), "<uptime>"),
+    ("prompt", re.compile(r"^\S+#.*$"), "<prompt>"),
+]
+
+COUNTER = "<n>"
+
+# the rules for the commands matching the pattern
+COMMAND_RULES = [
+    (re.compile(r"show (?:ip )?bgp.*summary"), [
+        ("table version", re.compile(r"(table version is |TblVer\s+)\d+"), r"\1" + COUNTER),
+        ("neighbor counters",
+         re.compile(r"^(\S+\s+\d+\s+\d+\s+)\d+(\s+)\d+(\s+)\d+(\s+)\d+(\s+)\d+", re.MULTILINE),
+         r"\1" + COUNTER + r"\2" + COUNTER + r"\3" + COUNTER + r"\4" + COUNTER + r"\5" + COUNTER),
+        ("memory", re.compile(r"\d+ bytes of memory"), COUNTER + " bytes of memory"),
+    ]),
+    (re.compile(r"show (?:ip )?ospf.*neighbor"), [
+        ("dead time", re.compile(r"(Dead timer due in |\s)\d{2}:\d{2}:\d{2}"), r"\1<uptime>"),
+    ]),
+    (re.compile(r"show interfaces?"), [
+        ("counters", re.compile(r"\b\d+( packets (?:input|output)| bytes| total input drops| total output drops|"
+                                r" input errors| output errors| broadcast packets| multicast packets)"),
+         COUNTER + r"\1"),
+        ("rate", re.compile(r"rate \d+ bits/sec, \d+ packets/sec"), "rate <n> bits/sec, <n> packets/sec"),
+    ]),
+    (re.compile(r"show isis.*neighbor"), [
+        ("holdtime", re.compile(r"(\b(?:Up|Init|Down)\s+)\d+\b"), r"\1" + COUNTER),
+    ]),
+]
+
+
+def rules_for(command):
+    """Returns the normalization rules for the command."""
+    rules = list(COMMON_RULES)
+    for pattern, command_rules in COMMAND_RULES:
+        if pattern.match(command):
+            rules.extend(command_rules)
+    return rules
+
+
+def normalize(command, output):
+    """
+    Returns the list of the output lines with the volatile fields replaced by the placeholders.
+    The columns are separated by the single space, so the changed width of the column does not matter.
+    """
+    rules = rules_for(command)
+    lines = []
+    for line in output.splitlines():
+        for name, pattern, replacement in rules:
+            line = pattern.sub(replacement, line)
+        lines.append(" ".join(line.split()))
+    return lines
+
+
+class SnapshotDiff(object):
+    """The difference of the normalized outputs of the command."""
+    def __init__(self, command, removed, added):
+        self.command = command
+        self.removed = removed
+        self.added = added
+
+    @property
+    def changed(self):
+        return bool(self.removed or self.added)
+
+    def summary(self):
+        if not self.changed:
+            return "'{}' output is the same as before upgrade".format(self.command)
+        return "'{}' output changed: {} lines removed, {} lines added".format(
+            self.command, len(self.removed), len(self.added))
+
+    def format(self):
+        return "\n".join(["- " + line for line in self.removed] + ["+ " + line for line in self.added])
+
+
+def diff_lines(old, new):
+    """Returns the (removed, added) lists of the lines."""
+    ids = {}
+    old_ids = [ids.setdefault(line, len(ids)) for line in old]
+    new_ids = [ids.setdefault(line, len(ids)) for line in new]
+    if old_ids == new_ids:
+        return [], []
+
+    head = 0
+    while head < len(old_ids) and head < len(new_ids) and old_ids[head] == new_ids[head]:
+        head += 1
+    tail = 0
+    while tail < len(old_ids) - head and tail < len(new_ids) - head and \
+            old_ids[-1 - tail] == new_ids[-1 - tail]:
+        tail += 1
+    old_middle = old_ids[head:len(old_ids) - tail]
+    new_middle = new_ids[head:len(new_ids) - tail]
+
+    removed = []
+    added = []
+    matcher = SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag in ("replace", "delete"):
+            removed.extend(old[head + old_start:head + old_end])
+        if tag in ("replace", "insert"):
+            added.extend(new[head + new_start:head + new_end])
+    return removed, added
+
+
+def diff_snapshots(command, old_output, new_output):
+    """Returns the SnapshotDiff of the normalized command outputs."""
+    removed, added = diff_lines(normalize(command, old_output), normalize(command, new_output))
+    return SnapshotDiff(command, removed, added)
@@ -0,0 +1,126 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+from collections import Counter
+
+"""
+The incremental scan of the device log.
+
+The bookmark is the timestamp and the text of the last log line. The log is fetched from the
+bookmark timestamp with "show logging start <month> <day> <hh:mm:ss>" and the lines up to the
+bookmarked line are skipped. If the bookmarked line is not found, i.e. the log buffer was cleared
+by the reload, all the fetched lines are scanned. The lines without the timestamp continue the log
+message, i.e. the traceback or the core dump details, and are scanned as well. The timestamps are
+used only to locate the bookmark.
+
+RP/0/RSP0/CPU0:May 16 21:41:08.690 : cfgmgr-rp[165]: %MGBL-CONFIG-4-VERSION : Version of existing ...
+RP/0/RSP0/CPU0:2016 May 16 21:41:08.690 UTC: sysmgr[89]: %OS-SYSMGR-3-ERROR : ...
+"""
+
+CONFIG_INCOMPATIBLE = "config-incompatible"
+CORE = "core"
+TRACEBACK = "traceback"
+ERROR = "error"
+
+# the categories in the order of priority, the first category found anywhere in the line classifies the line
+CLASSIFIER_RE = re.compile(
+    r"(?=.*?(?P<config_incompatible>%MGBL-CONFIG-4-VERSION|"
+    r"saved configuration detected to be incompatible with the installed software))|"
+    r"(?=.*?(?P<core>Core for pid|core dump))|"
+    r"(?=.*?(?P<traceback>Traceback))|"
+    r"(?=.*?(?P<error>[Ee][Rr][Rr][Oo][Rr]))"
+)
+
+CATEGORIES = {
+    "config_incompatible": CONFIG_INCOMPATIBLE,
+    "core": CORE,
+    "traceback": TRACEBACK,
+    "error": ERROR,
+}
+
+TIMESTAMP_RE = re.compile(r"(?:^|:)(?:\d{4} )?(?P<month>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) "
+                          r"(?P<time>\d{2}:\d{2}:\d{2})(?:\.\d+)?")
+
+
+def classify(line):
+    """Returns the category of the log line or None."""
+    match = CLASSIFIER_RE.match(line)
+    return CATEGORIES[match.lastgroup] if match else None
+
+
+def scan(lines):
+    """Returns the list of the (category, line) tuples of the classified lines."""
+    match_line = CLASSIFIER_RE.match
+    hits = []
+    for line in lines:
+        match = match_line(line)
+        if match:
+            hits.append((CATEGORIES[match.lastgroup], line))
+    return hits
+
+
+def count(hits):
+    return Counter(category for category, line in hits)
+
+
+def log_lines(output):
+    """Returns the log lines from the first line with the timestamp, the continuation lines included."""
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if TIMESTAMP_RE.search(line):
+            return [line.rstrip() for line in lines[index:] if line.strip()]
+    return []
+
+
+def bookmark(lines):
+    """Returns the bookmark of the last log line or None if there is no log line."""
+    for line in reversed(lines):
+        match = TIMESTAMP_RE.search(line)
+        if match:
+            return {"month": match.group("month"), "day": match.group("day"), "time": match.group("time"),
+                    "line": line}
+    return None
+
+
+def since_command(mark):
+    """Returns the command fetching the log from the bookmark."""
+    return "show logging start {} {} {}".format(mark["month"], mark["day"], mark["time"])
+
+
+def lines_after(lines, mark):
+    """
+    Returns the lines after the bookmarked line and its continuation lines
+    or all the lines if the bookmarked line is not found.
+    """
+    for index in range(len(lines) - 1, -1, -1):
+        if lines[index] == mark["line"]:
+            index += 1
+            while index < len(lines) and not TIMESTAMP_RE.search(lines[index]):
+                index += 1
+            return lines[index:]
+    return lines
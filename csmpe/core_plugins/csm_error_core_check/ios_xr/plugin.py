@@ -24,37 +24,54 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 
-import re
 from csmpe.plugins import CSMPlugin
+from log_scanner import log_lines, scan, count, bookmark, since_command, lines_after
+
+BOOKMARK_KEY = "log_bookmark"
 
 
 class Plugin(CSMPlugin):
     """This plugin checks system logs against any errors, traceback of crash information."""
     name = "Core Error Check Plugin"
     platforms = {'ASR9K', 'CRS', 'NCS6K'}
-    phases = {'Post-Upgrade'}
-
-    # matching any errors, core and traceback
-    _string_to_check_re = re.compile(
-        "^(.*(?:[Ee][Rr][Rr][Oo][Rr]|Core for pid|Traceback).*)$", re.MULTILINE
-    )
-
-    # TODO: Check log against
-    # "Version of existing saved configuration detected to be incompatible with the installed software"
-    # cfgmgr-rp[165]: %MGBL-CONFIG-4-VERSION : Version of existing saved configuration detected to be incompatible
-    # with the installed software. Configuration will be restored from an alternate source and may take
-    # longer than usual on this boot.
+    phases = {'Pre-Upgrade', 'Post-Upgrade'}
 
     def run(self):
-        # FIXME: Consider optimization
-        # The log may be large
-        # Maybe better run sh logging | i "Error|error|ERROR|Traceback|Core for pid" directly on the device
-        cmd = "show logging last 500"
+        if self.ctx.phase == "Pre-Upgrade":
+            self.save_bookmark(log_lines(self.ctx.send("show logging last 1", timeout=300)))
+            return
+
+        mark, timestamp = self.ctx.load_data(BOOKMARK_KEY)
+        if mark:
+            cmd = since_command(mark)
+        else:
+            self.ctx.warning("No log bookmark stored from Pre-Upgrade phase. Checking the last 500 lines.")
+            cmd = "show logging last 500"
         output = self.ctx.send(cmd, timeout=300)
 
         file_name = self.ctx.save_to_file(cmd, output)
         if file_name:
             self.ctx.info("Device log saved to {}".format(file_name))
 
-        for match in re.finditer(self._string_to_check_re, output):
-            self.ctx.warning(match.group())
+        lines = log_lines(output)
+        if mark:
+            new_lines = lines_after(lines, mark)
+            self.ctx.info("{} log lines since {} {} {}".format(len(new_lines), mark["month"], mark["day"],
+                                                               mark["time"]))
+        else:
+            new_lines = lines
+
+        hits = scan(new_lines)
+        for category, line in hits:
+            self.ctx.warning("[{}] {}".format(category, line))
+        if hits:
+            self.ctx.info("Log check found: {}".format(", ".join(
+                "{} {}".format(number, category) for category, number in sorted(count(hits).items()))))
+
+        # the repeated check scans only the new lines
+        self.save_bookmark(lines)
+
+    def save_bookmark(self, lines):
+        mark = bookmark(lines)
+        if mark:
+            self.ctx.save_data(BOOKMARK_KEY, mark)
@@ -31,6 +31,7 @@ import os
 
 from csmpe.plugins import CSMPlugin
 from utils import get_filesystems
+from repository_index import repository_index, local_repository_directory
 
 
 class Plugin(CSMPlugin):
@@ -40,16 +41,46 @@ class Plugin(CSMPlugin):
     phases = {'Pre-Add'}
     os = {'XR'}
 
-    def _get_pie_size(self, package_url):
-        cmd = "admin show install pie-info " + package_url
-        output = self.ctx.send(cmd)
-        if output:
-            for line in output.split('\n'):
+    def _get_pie_sizes(self, package_urls):
+        """Returns the list of the compressed sizes reported by the device. The commands are sent concurrently."""
+        outputs = self.ctx.send_parallel(["admin show install pie-info " + url for url in package_urls])
+        sizes = []
+        for package_url, output in zip(package_urls, outputs):
+            size = None
+            for line in (output or "").split('\n'):
                 if "Compressed" in line:
                     size = long(line.split(":")[1].strip())
-                    return size
+                    break
                 if line and line[:6] == "Error:":
                     self.ctx.error(output)
+            if size is None:
+                self.ctx.error("Unable to get the size of {}".format(package_url))
+            sizes.append(size)
+        return sizes
+
+    def _get_package_sizes(self, packages, server_repository_url):
+        """
+        Returns the dictionary of the package sizes. The size of the package is read from the repository
+        directory on this host if possible, otherwise queried from the device. Returns None if the size
+        can not be queried from the device.
+        """
+        sizes = {}
+        directory = local_repository_directory(self.ctx, server_repository_url)
+        if directory:
+            index = repository_index(directory)
+            for package in packages:
+                size = index.size(package)
+                if size is not None:
+                    sizes[package] = size
+            self.ctx.info("{} package size(s) found in the repository directory {}".format(len(sizes), directory))
+
+        unknown = [package for package in packages if package not in sizes]
+        if unknown:
+            if server_repository_url[:4] == 'sftp':
+                return None
+            package_urls = [os.path.join(server_repository_url, package) for package in unknown]
+            sizes.update(zip(unknown, self._get_pie_sizes(package_urls)))
+        return sizes
 
     def run(self):
         try:
@@ -64,7 +95,9 @@ class Plugin(CSMPlugin):
             self.ctx.warning("No repository path provided.")
             return
 
-        if server_repository_url[:4] == 'sftp':
+        packages = [package for package in packages if package != ""]
+        sizes = self._get_package_sizes(packages, server_repository_url)
+        if sizes is None:
             self.ctx.info('Skipping as disk space check not supported for SFTP.')
             return
 
@@ -78,10 +111,7 @@ class Plugin(CSMPlugin):
 
         total_size = 0
         for package in packages:
-            if package == "":
-                continue
-            package_url = os.path.join(server_repository_url, package)
-            size = self._get_pie_size(package_url)
+            size = sizes[package]
             total_size += size
             self.ctx.info("Package: {} requires {} bytes.".format(package, size))
 
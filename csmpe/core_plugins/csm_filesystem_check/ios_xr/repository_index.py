@@ -0,0 +1,112 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import threading
+import urlparse
+
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import ServerType, concatenate_dirs
+
+"""
+The index of the package sizes in the server repository directory accessible from this host.
+
+The package size is read with os.stat once and cached until the repository directory
+modification time changes, i.e. the package is added or removed. The index is shared
+by all the plugin runs in the process.
+"""
+
+LOCAL_SERVER_TYPES = (ServerType.TFTP_SERVER, ServerType.LOCAL_SERVER)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class RepositoryIndex(object):
+    """The package sizes of the repository directory."""
+    def __init__(self, directory):
+        self.directory = directory
+        self._mtime = None
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def size(self, filename):
+        """Returns the size of the file in the repository or None if the file does not exist."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.directory).st_mtime
+            except OSError:
+                return None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._sizes.clear()
+            try:
+                return self._sizes[filename]
+            except KeyError:
+                pass
+            try:
+                size = os.stat(os.path.join(self.directory, filename)).st_size
+            except OSError:
+                size = None
+            self._sizes[filename] = size
+            return size
+
+
+def repository_index(directory):
+    """Returns the shared index of the repository directory."""
+    directory = os.path.realpath(directory)
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = RepositoryIndex(directory)
+        return index
+
+
+def local_repository_directory(ctx, server_repository_url):
+    """
+    Returns the repository directory on this host or None if the repository is remote:
+    - the directory served to the device by csmpe,
+    - the file url or path,
+    - the TFTP or local server directory of CSM.
+    """
+    directory = getattr(ctx, "server_repository_directory", None)
+    if directory and os.path.isdir(directory):
+        return directory
+
+    url = urlparse.urlparse(server_repository_url)
+    if url.scheme in ("", "file") and os.path.isdir(url.path):
+        return url.path
+
+    try:
+        server = ctx.get_server
+        sub_directory = ctx._csm.install_job.server_directory
+    except AttributeError:
+        return None
+    if server is not None and server.server_type in LOCAL_SERVER_TYPES:
+        directory = concatenate_dirs(server.server_directory, sub_directory)
+        if os.path.isdir(directory):
+            return directory
+    return None
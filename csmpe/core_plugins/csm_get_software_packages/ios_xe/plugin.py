@@ -25,6 +25,7 @@
 # =============================================================================
 
 from csmpe.plugins import CSMPlugin
+from csmpe.core_plugins.csm_install_operations.package_lib import XEPackage
 
 
 class Plugin(CSMPlugin):
@@ -40,6 +41,13 @@ class Plugin(CSMPlugin):
 def get_package(ctx):
     if hasattr(ctx, 'committed_cli'):
         ctx.committed_cli = ctx.send('sh version')
+        _log_packages(ctx, "Committed", ctx.committed_cli)
     if hasattr(ctx, 'inactive_cli'):
         ctx.send('cd bootflash:')
         ctx.inactive_cli = ctx.send('dir')
+        _log_packages(ctx, "Inactive", ctx.inactive_cli)
+
+
+def _log_packages(ctx, title, output):
+    packages = XEPackage.from_show_cmd(output)
+    ctx.info("{} packages: {}".format(title, ", ".join(sorted(str(package) for package in packages)) or "None"))
@@ -37,21 +37,34 @@ class Plugin(CSMPlugin):
         get_package(self.ctx)
 
 
-def get_package(ctx):
+PACKAGE_REFRESH = "package_refresh"
+
+
+def _package_commands(ctx):
+    """Returns the list of (attribute, command) tuples of the package information to be retrieved."""
     if ctx.os_type == "XR":
-        if hasattr(ctx, 'active_cli'):
-            ctx.active_cli = ctx.send("admin show install active summary")
-        if hasattr(ctx, 'inactive_cli'):
-            ctx.inactive_cli = ctx.send("admin show install inactive summary")
-        if hasattr(ctx, 'committed_cli'):
-            ctx.committed_cli = ctx.send("admin show install committed summary")
-
-    if ctx.os_type == "eXR":
+        commands = [("active_cli", "admin show install active summary"),
+                    ("inactive_cli", "admin show install inactive summary"),
+                    ("committed_cli", "admin show install committed summary")]
+    elif ctx.os_type == "eXR":
         # eXR does not require the 'admin' keyword. In fact, using 'admin' shows
         # only the admin package, not others.
-        if hasattr(ctx, 'active_cli'):
-            ctx.active_cli = ctx.send("show install active")
-        if hasattr(ctx, 'inactive_cli'):
-            ctx.inactive_cli = ctx.send("show install inactive")
-        if hasattr(ctx, 'committed_cli'):
-            ctx.committed_cli = ctx.send("show install committed")
+        commands = [("active_cli", "show install active"),
+                    ("inactive_cli", "show install inactive"),
+                    ("committed_cli", "show install committed")]
+    else:
+        return []
+    return [(attribute, cmd) for attribute, cmd in commands if hasattr(ctx, attribute)]
+
+
+def get_package(ctx):
+    commands = _package_commands(ctx)
+    if commands:
+        outputs = ctx.send_parallel([cmd for attribute, cmd in commands])
+        for (attribute, cmd), output in zip(commands, outputs):
+            setattr(ctx, attribute, output)
+
+
+def request_package_refresh(ctx):
+    """Refreshes the package information once at the end of the plugin dispatch."""
+    ctx.defer(PACKAGE_REFRESH, get_package)
@@ -25,6 +25,7 @@
 # =============================================================================
 
 from csmpe.plugins import CSMPlugin
+from csmpe.core_plugins.csm_install_operations.package_lib import NXOSPackage
 
 
 class Plugin(CSMPlugin):
@@ -40,6 +41,12 @@ class Plugin(CSMPlugin):
 def get_package(ctx):
     if hasattr(ctx, 'committed_cli'):
         ctx.committed_cli = ctx.send('sh install packages | grep lib32_n9000')
+        _log_packages(ctx, "Committed", ctx.committed_cli)
     if hasattr(ctx, 'inactive_cli'):
         ctx.inactive_cli = ctx.send('sh install inactive')
+        _log_packages(ctx, "Inactive", ctx.inactive_cli)
 
+
+def _log_packages(ctx, title, output):
+    packages = NXOSPackage.from_show_cmd(output)
+    ctx.info("{} packages: {}".format(title, ", ".join(sorted(str(package) for package in packages)) or "None"))
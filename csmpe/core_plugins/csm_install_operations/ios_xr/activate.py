@@ -27,10 +27,10 @@
 # =============================================================================
 
 
-from package_lib import SoftwarePackage
+from package_lib import SoftwarePackage, PackageIndex
 from csmpe.plugins import CSMPlugin
 from install import install_activate_deactivate
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 
 
 class Plugin(CSMPlugin):
@@ -52,16 +52,12 @@ class Plugin(CSMPlugin):
         # Packages to activate but not already active
         pkgs = pkgs - installed_act
         if pkgs:
-            packages_to_activate = set()
-            # After the packages are considered equal according to SoftwarePackage.__eq__(),
             # Use the package name in the inactive area.  It is possible that the package
             # name given for Activation may be an external filename like below.
             # asr9k-px-5.3.3.CSCuy81837.pie to disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0
             # asr9k-mcast-px.pie-5.3.3 to disk0:asr9k-mcast-px-5.3.3
-            for inactive_pkg in installed_inact:
-                for pkg in pkgs:
-                    if pkg == inactive_pkg:
-                        packages_to_activate.add(inactive_pkg)
+            inactive_index = PackageIndex(installed_inact)
+            packages_to_activate = inactive_index.match(pkgs)
 
             if not packages_to_activate:
                 to_deactivate = " ".join(map(str, pkgs))
@@ -73,6 +69,8 @@ class Plugin(CSMPlugin):
                 self.ctx.error('To be activated packages not in inactive packages list.')
                 return None
             else:
+                for external_name, internal_name in inactive_index.external_to_internal.items():
+                    self.ctx.info("Package {} found as {}".format(external_name, internal_name))
                 return " ".join(map(str, packages_to_activate))
 
     def run(self):
@@ -100,4 +98,4 @@ class Plugin(CSMPlugin):
         self.ctx.info("Activate package(s) done")
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
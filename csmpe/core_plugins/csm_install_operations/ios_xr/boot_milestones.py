@@ -0,0 +1,138 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+from time import time
+
+"""
+The console boot log milestones of the ASR9K booting eXR.
+
+The boot log flows through the console session during the reload. The milestones are
+matched as they appear, so the plugin knows how far the boot is and reacts as soon as
+the stage finishes instead of waiting on timers.
+"""
+
+
+class Milestone(object):
+    """
+    The boot stage.
+
+    :param name: the milestone name posted to CSM
+    :param pattern: the compiled regex matching the console message
+    :param timeout: the maximum number of seconds expected until the next milestone
+    """
+    def __init__(self, name, pattern, timeout):
+        self.name = name
+        self.pattern = pattern
+        self.timeout = timeout
+
+
+ROMMON = Milestone("ROMMON", re.compile(r"rommon \d+ >|System Bootstrap|Booting IOS-XR 64 bit"), 900)
+IMAGE_BAKE = Milestone("Image bake", re.compile(r"[Bb]ak(?:e|ing) (?:the )?(?:image|ISO)|Image baking"), 1200)
+CALVADOS_UP = Milestone("Calvados up", re.compile(r"vm_manager started VM (?:admin_vm|sysadmin)|"
+                                                  r"sysadmin-vm:\S+ is up"), 600)
+XR_VM_UP = Milestone("XR VM up", re.compile(r"vm_manager started VM default-sdr|"
+                                            r"SYSTEM CONFIGURATION COMPLETED"), 300)
+USERNAME_PROMPT = Milestone("Username prompt", re.compile(r"Enter root-system username:|Username:"), 60)
+
+BOOT_MILESTONES = [ROMMON, IMAGE_BAKE, CALVADOS_UP, XR_VM_UP, USERNAME_PROMPT]
+
+
+class BootMilestoneTracker(object):
+    """
+    Tracks the boot milestones in the console output.
+
+    The milestones can be reached out of order, i.e. the ROMMON output is not printed if the
+    console is attached after the reload started.
+    """
+    def __init__(self, ctx, milestones=None, clock=time):
+        self.ctx = ctx
+        self.milestones = BOOT_MILESTONES if milestones is None else milestones
+        self.clock = clock
+        self.start = clock()
+        self.reached = []  # list of (milestone, seconds since start)
+
+    @property
+    def events(self):
+        return [milestone.pattern for milestone in self.milestones]
+
+    @property
+    def progress(self):
+        """The percentage of the boot stages finished."""
+        if not self.reached:
+            return 0
+        last = max(self.milestones.index(milestone) for milestone, _ in self.reached)
+        return (last + 1) * 100 // len(self.milestones)
+
+    @property
+    def ready(self):
+        """True if the last milestone, the device accepting the login, is reached."""
+        return self.milestones[-1] in [milestone for milestone, _ in self.reached]
+
+    def reached_at(self, milestone):
+        """Returns the clock time the milestone was reached or None if not reached."""
+        for reached, elapsed in self.reached:
+            if reached is milestone:
+                return self.start + elapsed
+        return None
+
+    def milestone(self, pattern):
+        for milestone in self.milestones:
+            if milestone.pattern is pattern:
+                return milestone
+        return None
+
+    def reach(self, milestone):
+        """Records the milestone unless already reached. Returns True if reached for the first time."""
+        if milestone in [reached for reached, _ in self.reached]:
+            return False
+        elapsed = self.clock() - self.start
+        self.reached.append((milestone, elapsed))
+        message = "Boot: {} ({}%) after {:.0f} seconds".format(milestone.name, self.progress, elapsed)
+        self.ctx.info(message)
+        self.ctx.post_status(message)
+        return True
+
+    def feed(self, output):
+        """Records all the milestones found in the console output."""
+        for milestone in self.milestones:
+            if milestone.pattern.search(output):
+                self.reach(milestone)
+
+    def fsm_action(self, action=None):
+        """
+        Returns the FSM action recording the matched milestone and then calling the action.
+        """
+        def record(fsm_ctx):
+            milestone = self.milestone(fsm_ctx.pattern)
+            if milestone:
+                self.reach(milestone)
+            return action(fsm_ctx) if action else True
+        return record
+
+    def summary(self):
+        return ", ".join("{} {:.0f}s".format(milestone.name, elapsed) for milestone, elapsed in self.reached)
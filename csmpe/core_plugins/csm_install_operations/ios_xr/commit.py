@@ -31,7 +31,7 @@ import re
 
 from csmpe.plugins import CSMPlugin
 from install import watch_operation, log_install_errors
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 
 
 class Plugin(CSMPlugin):
@@ -75,4 +75,4 @@ class Plugin(CSMPlugin):
             self.ctx.info("Operation {} finished successfully.".format(op_id))
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
@@ -26,10 +26,10 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 
-from package_lib import SoftwarePackage
+from package_lib import SoftwarePackage, PackageIndex
 from csmpe.plugins import CSMPlugin
 from install import install_activate_deactivate
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 
 
 class Plugin(CSMPlugin):
@@ -52,7 +52,8 @@ class Plugin(CSMPlugin):
         packages_to_deactivate = pkgs - installed_inact
 
         if packages_to_deactivate:
-            packages_to_deactivate = packages_to_deactivate & installed_act  # packages to be deactivated and installed active packages
+            # packages to be deactivated and installed active packages named as on the device
+            packages_to_deactivate = PackageIndex(installed_act).match(packages_to_deactivate)
             if not packages_to_deactivate:
                 to_deactivate = " ".join(map(str, pkgs))
 
@@ -93,4 +94,4 @@ class Plugin(CSMPlugin):
         self.ctx.info("Deactivate package(s) done")
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
@@ -0,0 +1,199 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+from collections import namedtuple, Counter
+from time import time
+
+"""
+The FPD table parser.
+
+XR "show hw-module fpd location all". The location, card type and HW version are printed only
+in the first row of the card:
+
+Location     Card Type                Version Type Subtype Inst   Version   Dng?
+============ ======================== ======= ==== ======= ==== =========== ====
+0/RSP0/CPU0  A9K-RSP440-SE            1.0     lc   fpga2   0       1.16     No
+                                              lc   cbc     0       2.02     No
+
+eXR admin "show hw-module fpd":
+
+Location   Card type        HWver FPD device       ATR Status   Running Programd
+------------------------------------------------------------------------------
+0/RSP0     A9K-RSP880-SE    1.0   Alpha-FPGA           CURRENT    0.15    0.15
+0/0        A9K-8X100GE-SE   1.0   Ethernet-FPGA        NEED UPGD  0.07    0.07
+"""
+
+# The XR upgrade flag is mapped to the eXR status
+NEED_UPGRADE = "NEED UPGD"
+CURRENT = "CURRENT"
+RELOAD_REQUIRED = "RLOAD REQ"
+
+FPD = namedtuple("FPD", "location card_type hw_version subtype version programmed status")
+
+XR_ROW = re.compile(r"^(?:(?P<location>\d+/\S+)\s+(?P<card_type>\S+)\s+(?P<hw_version>\S+)\s+)?"
+                    r"(?P<type>[a-z]+)\s+(?P<subtype>\S+)\s+\d+\s+(?P<version>\S+)\s+(?P<upgrade>Yes|No)$")
+
+EXR_ROW = re.compile(r"^(?P<location>\d+/\S+)\s+(?P<card_type>\S+)\s+(?P<hw_version>\d+\.\d+)\s+(?P<subtype>\S+)\s+"
+                     r"(?:[A-Z]{1,3}\s+)?(?P<status>NEED UPGD|RLOAD REQ|CURRENT|UPGD \w+|BACK IMG|NOT READY|N/A)"
+                     r"(?:\s+(?P<version>\S+))?(?:\s+(?P<programmed>\S+))?$")
+
+
+def parse_fpd_table(output):
+    """Returns the list of FPD rows parsed from the XR or eXR FPD table in a single pass."""
+    rows = []
+    location = card_type = hw_version = None
+    for line in output.splitlines():
+        line = line.strip()
+        if not line or not (line[0].isdigit() or line[0].islower()):
+            continue
+
+        match = EXR_ROW.match(line)
+        if match:
+            rows.append(FPD(match.group("location"), match.group("card_type"), match.group("hw_version"),
+                            match.group("subtype"), match.group("version"), match.group("programmed"),
+                            match.group("status")))
+            continue
+
+        match = XR_ROW.match(line)
+        if match:
+            if match.group("location"):
+                location, card_type, hw_version = match.group("location", "card_type", "hw_version")
+            if location is None:
+                continue
+            rows.append(FPD(location, card_type, hw_version, match.group("subtype"), match.group("version"), None,
+                            NEED_UPGRADE if match.group("upgrade") == "Yes" else CURRENT))
+    return rows
+
+
+def count_status(rows):
+    """Returns the Counter of the FPD statuses."""
+    return Counter(row.status for row in rows)
+
+
+def locations_by_subtype(rows, status, subtypes, locations):
+    """
+    Returns the dictionary with the FPD subtype as key and the list of locations where
+    the FPD is in the status as value. Only the subtypes and locations provided are considered.
+    """
+    subtypes = set(subtypes)
+    locations = set(locations)
+    subtype_to_locations = {}
+    for row in rows:
+        if row.status == status and row.subtype in subtypes and row.location in locations:
+            subtype_to_locations.setdefault(row.subtype, []).append(row.location)
+    return subtype_to_locations
+
+
+UPGRADE_SUCCESS = re.compile(r"Successfully\s*(?:downgrade|upgrade)d?\s+(?P<subtype>\S+)[^\n]*?"
+                             r"location\s+(?P<location>\d+/\S+)")
+UPGRADE_FAILURE = re.compile(r"(?:Failed|Unable) to (?:downgrade|upgrade)\s+(?P<subtype>\S+)[^\n]*?"
+                             r"location\s+(?P<location>\d+/\S+)")
+
+# the FPD statuses after the upgrade finished
+UPGRADE_FINISHED = (CURRENT, RELOAD_REQUIRED, "UPGD DONE")
+
+
+class FPDUpgradeProgress(object):
+    """
+    Tracks the per location progress of the FPD upgrade and estimates the remaining time.
+
+    :param ctx: the plugin context
+    :param subtype_to_locations: the dictionary with the FPD subtype as key and the list of locations as value
+    """
+    def __init__(self, ctx, subtype_to_locations, clock=time):
+        self.ctx = ctx
+        self.clock = clock
+        self.start = clock()
+        self.pending = set((subtype, location) for subtype, locations in subtype_to_locations.items()
+                           for location in locations)
+        self.total = len(self.pending)
+        self.succeeded = set()
+        self.failed = set()
+
+    @classmethod
+    def from_rows(cls, ctx, rows, clock=time):
+        """Tracks the FPD's which need the upgrade in the FPD table rows."""
+        subtype_to_locations = {}
+        for row in rows:
+            if row.status == NEED_UPGRADE:
+                subtype_to_locations.setdefault(row.subtype, []).append(row.location)
+        return cls(ctx, subtype_to_locations, clock)
+
+    @property
+    def done(self):
+        return len(self.succeeded) + len(self.failed)
+
+    @property
+    def finished(self):
+        return not self.pending
+
+    @property
+    def eta(self):
+        """The estimated number of seconds until all the FPD's are upgraded or None if unknown."""
+        if not self.done:
+            return None
+        return (self.clock() - self.start) / self.done * len(self.pending)
+
+    def success(self, subtype, location):
+        self._finish(subtype, location, self.succeeded)
+
+    def failure(self, subtype, location):
+        self._finish(subtype, location, self.failed)
+
+    def _finish(self, subtype, location, result):
+        key = (subtype, location)
+        if key not in self.pending:
+            return
+        self.pending.discard(key)
+        result.add(key)
+        self.report()
+
+    def feed(self, output):
+        """Records the upgrade results found in the upgrade command output or syslog."""
+        for match in UPGRADE_SUCCESS.finditer(output):
+            self.success(match.group("subtype"), match.group("location"))
+        for match in UPGRADE_FAILURE.finditer(output):
+            self.failure(match.group("subtype"), match.group("location"))
+
+    def update_from_rows(self, rows):
+        """Records the FPD's reported as upgraded in the FPD table rows."""
+        for row in rows:
+            if row.status in UPGRADE_FINISHED:
+                self.success(row.subtype, row.location)
+            elif row.status == "UPGD FAIL":
+                self.failure(row.subtype, row.location)
+
+    def report(self):
+        message = "FPD upgrade: {}/{} done".format(self.done, self.total)
+        if self.failed:
+            message += ", {} failed".format(len(self.failed))
+        eta = self.eta
+        if eta is not None and self.pending:
+            message += ", ETA {:.0f} min".format(eta / 60)
+        self.ctx.info(message)
+        self.ctx.post_status(message)
@@ -0,0 +1,147 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import hashlib
+import os
+import re
+
+"""
+The image staging on the device.
+
+The checksum of the image in the repository is computed once and cached in the
+<image>.md5 file next to the image. The image already present on the device with the same
+size and md5 is not copied again. The copied image is verified against the checksum.
+"""
+
+CHECKSUM_SUFFIX = ".md5"
+CHUNK_SIZE = 1024 * 1024
+
+MD5_RE = re.compile(r"\b([0-9a-fA-F]{32})\b")
+
+# path -> (size, mtime, md5)
+_checksums = {}
+
+
+def file_checksum(path):
+    """
+    Returns the (size, md5) tuple of the local file. The md5 is cached in memory and in the
+    sidecar file and recomputed only if the file size or modification time changed.
+    """
+    stat = os.stat(path)
+    cached = _checksums.get(path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime):
+        return stat.st_size, cached[2]
+
+    md5 = _read_sidecar(path, stat)
+    if md5 is None:
+        digest = hashlib.md5()
+        with open(path, "rb") as image:
+            for chunk in iter(lambda: image.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        md5 = digest.hexdigest()
+        _write_sidecar(path, stat, md5)
+
+    _checksums[path] = (stat.st_size, stat.st_mtime, md5)
+    return stat.st_size, md5
+
+
+def _read_sidecar(path, stat):
+    try:
+        with open(path + CHECKSUM_SUFFIX) as sidecar:
+            md5, size, mtime = sidecar.read().split()
+    except (IOError, ValueError):
+        return None
+    if int(size) == stat.st_size and float(mtime) == stat.st_mtime:
+        return md5
+    return None
+
+
+def _write_sidecar(path, stat, md5):
+    try:
+        with open(path + CHECKSUM_SUFFIX, "w") as sidecar:
+            sidecar.write("{} {} {!r}\n".format(md5, stat.st_size, stat.st_mtime))
+    except IOError:
+        # read only repository, the checksum is cached in memory only
+        pass
+
+
+def device_file_size(ctx, device_path):
+    """Returns the size of the file on the device or None if the file does not exist."""
+    output = ctx.send("dir {}".format(device_path))
+    if "No such file" in output:
+        return None
+    filename = re.escape(device_path.split(":")[-1].lstrip("/").split("/")[-1])
+    match = re.search(r"^\s*\d+\s+[-a-z]+\s+(\d+)\s.*\s{}\s*$".format(filename), output, re.MULTILINE)
+    return int(match.group(1)) if match else None
+
+
+def device_file_md5(ctx, device_path):
+    """Returns the md5 of the file on the device or None if the device does not report it."""
+    output = ctx.send("show md5 file {}".format(device_path), timeout=600)
+    match = MD5_RE.search(output)
+    return match.group(1).lower() if match else None
+
+
+def device_file_matches(ctx, device_path, size, md5):
+    """Returns True if the file on the device has the size and md5."""
+    if device_file_size(ctx, device_path) != size:
+        return False
+    return device_file_md5(ctx, device_path) == md5
+
+
+def stage_file(ctx, local_path, device_path, copy):
+    """
+    Copies the file to the device unless the same file is already there and verifies the copy.
+
+    :param ctx: the plugin context
+    :param local_path: the path of the image in the repository accessible by CSM or None if not accessible
+    :param device_path: the file path on the device, i.e. "harddiskb:/asr9k-mini-x64.tar"
+    :param copy: the function copying the file to the device
+    :return: True if the file was copied, False if the file on the device already matched
+    """
+    expected = None
+    if local_path and os.path.isfile(local_path):
+        expected = file_checksum(local_path)
+        if device_file_matches(ctx, device_path, *expected):
+            ctx.info("{} already on device with md5 {}, skipping the copy".format(device_path, expected[1]))
+            return False
+
+    copy()
+
+    if expected:
+        size, md5 = expected
+        device_size = device_file_size(ctx, device_path)
+        if device_size != size:
+            ctx.error("The size of {} on device is {}, expected {}".format(device_path, device_size, size))
+        device_md5 = device_file_md5(ctx, device_path)
+        if device_md5 is None:
+            ctx.warning("Unable to verify the md5 of {} on device".format(device_path))
+        elif device_md5 != md5:
+            ctx.error("The md5 of {} on device is {}, expected {}".format(device_path, device_md5, md5))
+        else:
+            ctx.info("{} verified with md5 {}".format(device_path, md5))
+    return True
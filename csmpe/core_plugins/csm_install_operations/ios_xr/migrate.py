@@ -36,6 +36,8 @@ from condoor.controllers.protocols.base import PASSWORD_PROMPT, USERNAME_PROMPT,
 from condoor.controllers.protocols.telnet import ESCAPE_CHAR, CONNECTION_REFUSED
 from condoor.exceptions import ConnectionError, ConnectionAuthenticationError
 from migration_lib import wait_for_final_band
+from boot_milestones import BootMilestoneTracker, ROMMON, IMAGE_BAKE, CALVADOS_UP, XR_VM_UP, USERNAME_PROMPT \
+    as BOOT_USERNAME_PROMPT
 
 XR_PROMPT = re.compile('(\w+/\w+/\w+/\w+:.*?)(\([^()]*\))?#')
 
@@ -102,18 +104,23 @@ class Plugin(CSMPlugin):
         After device is reloaded to boot eXR image from eUSB, the image will get baked,
         eventually the device prompts for reconfiguration of username and password to login.
         After that, the device prompts for login and then we will get XR prompt.
-        An FSM is created to support that.
+        An FSM is created to support that. Every boot log milestone seen on the console moves
+        the FSM to its own state, timed by the milestone timeout, and a milestone never returns
+        the FSM to an earlier one. Once the XR VM is up the return is sent to get the login
+        prompt right away.
 
-        :return: None if no error occurred.
+        :return: the BootMilestoneTracker with the milestones reached.
         """
 
         connection_param = host.connection_param[0]
+        tracker = BootMilestoneTracker(self.ctx)
 
         def send_return(ctx):
             ctx.ctrl.send("\r\n")
             return True
 
         def send_username(ctx):
+            tracker.reach(BOOT_USERNAME_PROMPT)
             ctx.ctrl.sendline(connection_param.username)
             return True
 
@@ -123,10 +130,13 @@ class Plugin(CSMPlugin):
 
         TIMEOUT = self.ctx.TIMEOUT
 
+        # the states of the reached milestones in the boot order: ROMMON, image bake, Calvados up, XR VM up
+        booting = [12, 13, 14, 15]
+
         events = [ESCAPE_CHAR, PASSWORD_OK, SET_USERNAME, SET_PASSWORD, USERNAME_PROMPT, PASSWORD_PROMPT,
                   XR_PROMPT, PRESS_RETURN, UNABLE_TO_CONNECT,
                   CONNECTION_REFUSED, RESET_BY_PEER, PERMISSION_DENIED,
-                  AUTH_FAILED, TIMEOUT]
+                  AUTH_FAILED, TIMEOUT] + [milestone.pattern for milestone in (ROMMON, IMAGE_BAKE, CALVADOS_UP, XR_VM_UP)]
 
         transitions = [
             (ESCAPE_CHAR, [0, 1], 1, None, 20),
@@ -134,24 +144,24 @@ class Plugin(CSMPlugin):
             (PASSWORD_OK, [6], 6, send_return, 10),
             (PRESS_RETURN, [0, 1], 1, send_return, 10),
             (PRESS_RETURN, [6], 6, send_return, 10),
-            (SET_USERNAME, [0, 1, 2, 3], 4, send_username, 20),
+            (SET_USERNAME, [0, 1, 2, 3] + booting, 4, send_username, 20),
             (SET_USERNAME, [4], 4, None, 1),
             (SET_PASSWORD, [4], 5, send_password, 10),
             (SET_PASSWORD, [5], 6, send_password, 10),
-            (USERNAME_PROMPT, [0, 1, 6, 7], 8, send_username, 10),
+            (USERNAME_PROMPT, [0, 1, 6, 7] + booting, 8, send_username, 10),
             (USERNAME_PROMPT, [8], 8, None, 10),
             (PASSWORD_PROMPT, [8], 9, send_password, 30),
             (XR_PROMPT, [9, 10], -1, None, 10),
 
 
             (UNABLE_TO_CONNECT, [0, 1], 11, ConnectionError("Unable to connect", self.ctx._connection.hostname), 10),
-            (CONNECTION_REFUSED, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 11,
+            (CONNECTION_REFUSED, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10] + booting, 11,
              ConnectionError("Connection refused", "i"), 1),
 
-            (RESET_BY_PEER, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 11,
+            (RESET_BY_PEER, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10] + booting, 11,
              ConnectionError("Connection reset by peer", self.ctx._connection.hostname), 1),
 
-            (PERMISSION_DENIED, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 11,
+            (PERMISSION_DENIED, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10] + booting, 11,
              ConnectionAuthenticationError("Permission denied", self.ctx._connection.hostname), 1),
 
             (AUTH_FAILED, [6, 9], 11, ConnectionAuthenticationError("Authentication failed",
@@ -162,10 +172,26 @@ class Plugin(CSMPlugin):
             (TIMEOUT, [3, 7], 11, ConnectionError("Timeout waiting to connect", self.ctx._connection.hostname), 10),
             (TIMEOUT, [6], 7, None, 20),
             (TIMEOUT, [9], 10, None, 60),
+
+            (ROMMON.pattern, [0, 1, 2, 3], 12, tracker.fsm_action(), ROMMON.timeout),
+            (IMAGE_BAKE.pattern, [0, 1, 2, 3, 12], 13, tracker.fsm_action(), IMAGE_BAKE.timeout),
+            (CALVADOS_UP.pattern, [0, 1, 2, 3, 12, 13], 14, tracker.fsm_action(), CALVADOS_UP.timeout),
+            (XR_VM_UP.pattern, [0, 1, 2, 3, 12, 13, 14], 15, tracker.fsm_action(send_return), XR_VM_UP.timeout),
         ]
 
-        if not self.ctx.run_fsm("Reconfiguring authentication", "", events, transitions, timeout=30):
+        for milestone, state in zip((ROMMON, IMAGE_BAKE, CALVADOS_UP, XR_VM_UP), booting):
+            transitions += [
+                (PASSWORD_OK, [state], state, send_return, 0),
+                (PRESS_RETURN, [state], state, send_return, 0),
+                (TIMEOUT, [state], 11, ConnectionError("Timeout waiting for the boot after {}".format(milestone.name),
+                                                       self.ctx._connection.hostname), 10),
+            ]
+
+        if not self.ctx.run_fsm("Reconfiguring authentication", "", events, transitions, timeout=30,
+                                max_transitions=100):
             self.ctx.error("Failed to connect to device after reload.")
+        self.ctx.info("Boot milestones: {}".format(tracker.summary()))
+        return tracker
 
     def _reload_all(self, host):
         """Reload all nodes to boot eXR image."""
@@ -175,10 +201,10 @@ class Plugin(CSMPlugin):
 
     def _wait_for_reload(self, host):
         """Wait for all nodes to come up with max timeout as 18 minutes after the first RSP/RP comes up."""
-        self._configure_authentication(host)
+        tracker = self._configure_authentication(host)
 
         self.ctx.info("Waiting for all nodes to come to FINAL Band.")
-        if wait_for_final_band(self.ctx):
+        if wait_for_final_band(self.ctx, started=tracker.reached_at(XR_VM_UP)):
             self.ctx.info("All nodes are in FINAL Band.")
         else:
             self.ctx.info("Warning: Not all nodes went to FINAL Band.")
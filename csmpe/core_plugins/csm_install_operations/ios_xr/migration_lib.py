@@ -1,44 +1,98 @@
-import time
+import os
 import re
 import json
+from time import time
+
+from csmpe.core_plugins.csm_install_operations.waiter import Waiter
 
 SUPPORTED_HW_JSON = "migration_supported_hw.json"
 
-NODE = "(\d+/(?:RS?P)?\d+)"
+FINAL_BAND_TIME_OUT = 1080
 
+# path -> (modification time, SupportedHardware)
+_supported_hw_cache = {}
 
-def parse_exr_admin_show_platform(output):
-    """Get all RSP/RP/LC string node names matched with the card type."""
-    inventory = {}
-    lines = output.split('\n')
+NODE = "(\d+/(?:RS?P)?\d+)"
 
-    for line in lines:
-        line = line.strip()
-        if len(line) > 0 and line[0].isdigit():
-            print "line = *{}*".format(line)
-            node = line[:10].strip()
-            print "node = *{}*".format(node)
-            node_type = line[10:34].strip(),
-            print "node_type = *{}*".format(node_type)
-            inventory[node] = node_type
-    return inventory
+
+class SupportedHardware(object):
+    """
+    The hardware supported for migration per eXR release and card category (RP, LC, FAN, PEM).
+
+    The supported card types of each release and category are compiled into the single
+    alternation regex, so the card type is checked with one search.
+    """
+    def __init__(self, supported_hw):
+        self.supported_hw = supported_hw
+        self._matchers = {}
+        for release, categories in supported_hw.items():
+            for category, card_types in categories.items():
+                self._matchers[(release, category)] = self._compile(card_types)
+
+    @staticmethod
+    def _compile(card_types):
+        if not card_types:
+            return None
+        # the longest first, so the alternation never stops at the shorter prefix
+        card_types = sorted(set(card_types), key=len, reverse=True)
+        return re.compile("|".join(re.escape(card_type) for card_type in card_types))
+
+    def get(self, release):
+        """Returns the dictionary of the supported card types per category for the release or None."""
+        return self.supported_hw.get(release)
+
+    def matcher(self, release, *categories):
+        """Returns the compiled regex matching the card types of any of the categories or None."""
+        if len(categories) == 1:
+            return self._matchers.get((release, categories[0]))
+        key = (release,) + categories
+        if key not in self._matchers:
+            card_types = []
+            for category in categories:
+                card_types += self.supported_hw.get(release, {}).get(category) or []
+            self._matchers[key] = self._compile(card_types)
+        return self._matchers[key]
+
+    def is_supported(self, release, category, card_type):
+        matcher = self.matcher(release, category)
+        return matcher is not None and matcher.search(card_type) is not None
+
+
+def get_supported_hw_path():
+    """Returns the supported hardware file path. The file in the current directory takes precedence."""
+    if os.path.isfile(SUPPORTED_HW_JSON):
+        return os.path.abspath(SUPPORTED_HW_JSON)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), SUPPORTED_HW_JSON)
+
+
+def load_supported_hw(path=None):
+    """Returns the SupportedHardware loaded once per process and reloaded only if the file changed."""
+    if path is None:
+        path = get_supported_hw_path()
+    mtime = os.path.getmtime(path)
+    cached = _supported_hw_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path) as supported_hw_file:
+        supported_hw = SupportedHardware(json.load(supported_hw_file))
+    _supported_hw_cache[path] = (mtime, supported_hw)
+    return supported_hw
 
 
 def get_all_supported_nodes(ctx, supported_cards):
-    """Get the list of string node names(all available RSP/RP/LC) that are supported for migration."""
+    """
+    Get the list of string node names(all available RSP/RP/LC) that are supported for migration.
+
+    :param supported_cards: the compiled regex matching the supported card types
+    """
     supported_nodes = []
-    ctx.send("admin")
-    output = ctx.send("show platform")
-    inventory = parse_exr_admin_show_platform(output)
+    inventory = ctx.inventory.nodes("show platform", admin=True)
 
     node_pattern = re.compile(NODE)
-    for node, node_type in inventory.items():
+    for node, entry in inventory.items():
         if node_pattern.match(node):
-            for card in supported_cards:
-                if card in node_type:
-                    supported_nodes.append(node)
-                    break
-    ctx.send("exit")
+            if supported_cards.search(entry.type):
+                supported_nodes.append(node)
     return supported_nodes
 
 
@@ -50,38 +104,37 @@ def get_version(ctx):
     return version.group(1)
 
 
-def wait_for_final_band(ctx):
-    """This is for ASR9K eXR. Wait for all present nodes to come to FINAL Band."""
+def wait_for_final_band(ctx, started=None):
+    """
+    This is for ASR9K eXR. Wait for all present nodes to come to FINAL Band.
+
+    :param ctx: the plugin context
+    :param started: the time the first RSP/RP came up, i.e. the XR VM up boot milestone, the
+        waiting time already passed since then is deducted from the timeout
+    :return: True if all nodes came to FINAL Band, otherwise False
+    """
     exr_version = get_version(ctx)
-    with open(SUPPORTED_HW_JSON) as supported_hw_file:
-        supported_hw = json.load(supported_hw_file)
-    if supported_hw.get(exr_version) is None:
+    supported_hw = load_supported_hw()
+    supported_cards = supported_hw.matcher(exr_version, "RP", "LC")
+    if supported_cards is None:
         ctx.error("No hardware support information available for release {}.".format(exr_version))
 
-    supported_nodes = get_all_supported_nodes(ctx, supported_hw.get(exr_version))
+    supported_nodes = get_all_supported_nodes(ctx, supported_cards)
     # Wait for all nodes to Final Band
-    timeout = 1080
-    poll_time = 20
-    time_waited = 0
-
     cmd = "show platform vm"
-    while 1:
-        # Wait till all nodes are in FINAL Band
-        time_waited += poll_time
-        if time_waited >= timeout:
-            break
-        time.sleep(poll_time)
+
+    def all_nodes_in_final_band():
         output = ctx.send(cmd)
-        all_nodes_present = True
         for node in supported_nodes:
             if node not in output:
-                all_nodes_present = False
-                break
-        if all_nodes_present and check_sw_status(output):
-            return True
+                return False
+        return check_sw_status(output)
 
-    # Some nodes did not come to FINAL Band
-    return False
+    # Some nodes did not come to FINAL Band if False
+    timeout = FINAL_BAND_TIME_OUT
+    if started is not None:
+        timeout = max(0, timeout - (time() - started))
+    return Waiter(ctx, "final band", timeout=timeout).wait(all_nodes_in_final_band)
 
 
 def check_sw_status(output):
@@ -0,0 +1,314 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import base64
+import csv
+import glob
+import json
+import os
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress, islice, izip
+from operator import not_
+
+"""
+The NoX conversion result.
+
+NoX reports the conversion summary in its text output and the status of every configuration
+line in the <config>.csv file:
+
+1,KNOWN_SUPPORTED,hostname R1
+2,UNPROCESSED,!
+3,KNOWN_UNSUPPORTED,hw-module service sesh location 0/0/CPU0
+
+The CSV is read once. The supported and unsupported logs are written on the way and the
+line statuses and the per feature counts of the unsupported configuration are kept in the
+compact NoXResult index, which is saved next to the CSV as <config>.nox.json and queried
+without reading the CSV again.
+"""
+
+KNOWN_SUPPORTED = "KNOWN_SUPPORTED"
+INDEX_SUFFIX = ".nox.json"
+BUFFER_SIZE = 1024 * 1024
+CHUNK_ROWS = 4096
+
+# the first words of these commands do not identify the feature, i.e. "router bgp"
+FEATURE_PREFIXES = frozenset(["router", "no", "address-family", "hw-module"])
+
+SUMMARY_KNOWN = re.compile(r"Filename[\sA-Za-z\n]*[-\s]*\S*\s+(\d*)\s+\d*\(\s*\d*%\)\s+\d*\(\s*\d*%\)\s+(\d*)")
+SUMMARY_UNSUPPORTED = re.compile(r"Filename[\sA-Za-z\n]*[-\s]*\S*\s+\d*\s+\d*\(\s*\d*%\)\s+\d*\(\s*\d*%\)\s+"
+                                 r"\d*\(\s*\d*%\)\s+(\d*)")
+
+LOG_HEADER = '{0[0]:<8} {0[1]:^20} \n'.format(("Line No.", "Configuration"))
+LOG_LINE = '%-8s %s \n'
+
+
+def conversion_succeeded(nox_output):
+    """Returns True if the number under 'Total' equals to the number under 'Known' in the NoX output."""
+    match = SUMMARY_KNOWN.search(nox_output)
+    return bool(match) and match.group(1) == match.group(2)
+
+
+def all_configs_supported(nox_output):
+    """Returns True unless the NoX output reports unsupported configurations."""
+    match = SUMMARY_UNSUPPORTED.search(nox_output)
+    return not match or match.group(1) == "0"
+
+
+def feature_of(config):
+    """Returns the feature of the configuration line, i.e. "router bgp" for "router bgp 100"."""
+    words = config.split(None, 2)
+    if not words or words[0].startswith("!"):
+        return None
+    if words[0] in FEATURE_PREFIXES and len(words) > 1:
+        return words[0] + " " + words[1]
+    return words[0]
+
+
+class NoXResult(object):
+    """
+    The compact index of the NoX CSV.
+
+    :param statuses: the list of the status names, the codes index this list
+    :param lines: the array of the configuration line numbers in ascending order
+    :param codes: the array of the status codes of the lines
+    :param unsupported_features: the Counter of the features of the lines not KNOWN_SUPPORTED
+    """
+    def __init__(self, statuses=None, lines=None, codes=None, unsupported_features=None):
+        self.statuses = statuses or []
+        self._lines = lines if lines is not None else array('i')
+        self._codes = codes if codes is not None else array('B')
+        self.unsupported_features = unsupported_features or Counter()
+        self._status_codes = dict((status, code) for code, status in enumerate(self.statuses))
+        # the line numbers as read from the CSV with their codes, converted on the first query
+        self._numbers = None
+
+    @classmethod
+    def from_numbers(cls, statuses, numbers, codes, unsupported_features):
+        """Returns the index of the line number strings, the numbers are converted when queried."""
+        result = cls(statuses, unsupported_features=unsupported_features)
+        result._numbers = (numbers, codes)
+        return result
+
+    def _convert_numbers(self):
+        numbers, codes = self._numbers
+        self._numbers = None
+        if numbers:
+            self.extend(map(int, numbers), codes)
+
+    @property
+    def lines(self):
+        if self._numbers is not None:
+            self._convert_numbers()
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines):
+        self._lines = lines
+
+    @property
+    def codes(self):
+        if self._numbers is not None:
+            self._convert_numbers()
+        return self._codes
+
+    @codes.setter
+    def codes(self, codes):
+        self._codes = codes
+
+    def add(self, line, status, config):
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self.statuses)
+            self.statuses.append(status)
+        if self.lines and line < self.lines[-1]:
+            # keep the lines sorted for the lookup
+            position = bisect_left(self.lines, line)
+            self.lines.insert(position, line)
+            self.codes.insert(position, code)
+        else:
+            self.lines.append(line)
+            self.codes.append(code)
+        if status != KNOWN_SUPPORTED:
+            feature = feature_of(config)
+            if feature:
+                self.unsupported_features[feature] += 1
+
+    def extend(self, lines, codes):
+        """Adds the lines with the status codes, the lines are sorted if not in order."""
+        if list(lines) != sorted(lines) or (self.lines and lines and lines[0] < self.lines[-1]):
+            pairs = sorted(zip(list(self.lines) + list(lines), list(self.codes) + list(codes)))
+            self.lines = array('i', [line for line, code in pairs])
+            self.codes = array('B', [code for line, code in pairs])
+        else:
+            self.lines.extend(lines)
+            self.codes.extend(codes)
+
+    def status(self, line):
+        """Returns the status of the configuration line or None if NoX did not report it."""
+        position = bisect_left(self.lines, line)
+        if position < len(self.lines) and self.lines[position] == line:
+            return self.statuses[self.codes[position]]
+        return None
+
+    def counts(self):
+        """Returns the Counter of the line statuses."""
+        codes = Counter(self.codes)
+        return Counter(dict((self.statuses[code], count) for code, count in codes.items()))
+
+    def lines_with_status(self, status):
+        code = self._status_codes.get(status)
+        return [line for line, line_code in zip(self.lines, self.codes) if line_code == code]
+
+    @property
+    def unsupported(self):
+        return len(self.codes) - self.counts()[KNOWN_SUPPORTED]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def save(self, path):
+        # the line numbers are stored as the comma separated text and the codes as the base64 of their bytes,
+        # the JSON lists of the numbers are slow to write and to read
+        if self._numbers is not None:
+            numbers, codes = self._numbers
+        else:
+            numbers, codes = map(str, self._lines), self._codes
+        with open(path, "w") as index:
+            index.write(json.dumps({"statuses": self.statuses,
+                                    "lines": ",".join(numbers),
+                                    "codes": base64.b64encode(array('B', codes).tostring()),
+                                    "unsupported_features": self.unsupported_features}))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as index:
+            data = json.load(index)
+        codes = array('B')
+        codes.fromstring(base64.b64decode(data["codes"]))
+        numbers = str(data["lines"]).split(",") if data["lines"] else []
+        return cls.from_numbers([str(status) for status in data["statuses"]], numbers, codes,
+                                Counter(data["unsupported_features"]))
+
+
+def index_path(csv_path):
+    return os.path.splitext(csv_path)[0] + INDEX_SUFFIX
+
+
+def process_nox_csv(csv_path, supported_log=None, unsupported_log=None, footer=""):
+    """
+    Reads the NoX CSV in one pass, writes the supported and unsupported configuration logs
+    if given and saves the index next to the CSV.
+
+    :param csv_path: the path of the CSV generated by NoX
+    :param supported_log: the path of the log of the supported configurations or None
+    :param unsupported_log: the path of the log of the unsupported configurations or None
+    :param footer: the text appended to both logs
+    :return: the NoXResult
+    """
+    supported = unsupported = None
+    try:
+        if supported_log:
+            supported = open(supported_log, "w", BUFFER_SIZE)
+            supported.write('Configurations Known and Supported to the NoX Conversion Tool \n \n')
+            supported.write(LOG_HEADER)
+        if unsupported_log:
+            unsupported = open(unsupported_log, "w", BUFFER_SIZE)
+            unsupported.write('Configurations Unprocessed by the NoX Conversion Tool (Comments, Markers, '
+                              'or Unknown/Unsupported Configurations) \n \n')
+            unsupported.write(LOG_HEADER)
+
+        # the rows are processed column wise in chunks by zip, map and compress, so the index
+        # is built at the cost of the plain per row log writes
+        write_supported = supported.write if supported else None
+        write_unsupported = unsupported.write if unsupported else None
+        status_names = []
+        status_codes = {}
+        features = Counter()
+        lines = []
+        codes = []
+        with open(csv_path, "rb") as csvfile:
+            reader = csv.reader(csvfile)
+            for rows in iter(lambda: list(islice(reader, CHUNK_ROWS)), []):
+                # zip returns as many columns as the shortest row has
+                columns = zip(*rows)
+                if len(columns) < 3:
+                    rows = [row for row in rows if len(row) > 2]
+                    if not rows:
+                        continue
+                    columns = zip(*rows)
+                numbers, statuses, configs = columns[0], columns[1], columns[2]
+                unique_statuses = set(statuses)
+                if any(status != status.strip() for status in unique_statuses):
+                    statuses = map(str.strip, statuses)
+                    unique_statuses = set(statuses)
+                for status in sorted(unique_statuses - set(status_codes), key=statuses.index):
+                    status_codes[status] = len(status_names)
+                    status_names.append(status)
+                codes.extend(map(status_codes.__getitem__, statuses))
+
+                supported_mask = map(KNOWN_SUPPORTED.__eq__, statuses)
+                if write_supported:
+                    write_supported("".join(map(LOG_LINE.__mod__, izip(compress(numbers, supported_mask),
+                                                                       compress(configs, supported_mask)))))
+                unsupported_mask = map(not_, supported_mask)
+                unsupported_configs = list(compress(configs, unsupported_mask))
+                if write_unsupported:
+                    write_unsupported("".join(map(LOG_LINE.__mod__, izip(compress(numbers, unsupported_mask),
+                                                                         unsupported_configs))))
+                features.update(filter(None, map(feature_of, unsupported_configs)))
+                lines.extend(numbers)
+
+        if not "".join(lines).isdigit():
+            # skip the rows which are not the configuration lines
+            rows = [(line.strip(), line_code) for line, line_code in zip(lines, codes) if line.strip().isdigit()]
+            lines, codes = map(list, zip(*rows)) if rows else ([], [])
+        result = NoXResult.from_numbers(status_names, lines, array('B', codes), features)
+
+        for log in (supported, unsupported):
+            if log is not None:
+                log.write(footer)
+    finally:
+        for log in (supported, unsupported):
+            if log is not None:
+                log.close()
+
+    result.save(index_path(csv_path))
+    return result
+
+
+def campaign_unsupported_features(migration_directory):
+    """Returns the Counter of the unsupported features of all devices migrated from the migration directory."""
+    total = Counter()
+    for path in glob.glob(os.path.join(migration_directory, "*", "*" + INDEX_SUFFIX)):
+        try:
+            total.update(NoXResult.load(path).unsupported_features)
+        except (IOError, ValueError, KeyError):
+            continue
+    return total
@@ -0,0 +1,175 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import hashlib
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+
+from image_staging import file_checksum
+
+"""
+The configuration conversion service running the NoX migration tool.
+
+Every conversion runs the NoX process in its own scratch directory in a background thread,
+so the admin and XR configurations are converted concurrently while the plugin keeps
+working with the device. The NoX output and the generated files are cached under the key
+(NoX binary md5, configuration md5), so converting the unchanged configuration with the same
+NoX binary again restores the cached files without running NoX.
+"""
+
+CACHE_DIRECTORY = "nox_cache"
+OUTPUT_FILE = "nox.out"
+
+
+class ConversionResult(object):
+    """
+    The result of the NoX conversion.
+
+    :param filename: the converted configuration filename
+    :param output: the NoX standard output
+    :param error: the NoX standard error
+    :param files: the filenames generated by NoX next to the configuration
+    :param cached: True if the result was restored from the cache
+    """
+    def __init__(self, filename, output, error, files, cached=False):
+        self.filename = filename
+        self.output = output
+        self.error = error
+        self.files = files
+        self.cached = cached
+
+
+class Conversion(object):
+    """The conversion running in the background thread."""
+    def __init__(self, func, *args):
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(target=self._run, args=(func,) + args)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, *args):
+        try:
+            self._result = func(*args)
+        except Exception as e:
+            self._exception = e
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def result(self, timeout=None):
+        """Waits for the conversion and returns the ConversionResult or raises the conversion exception."""
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return None
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class NoXConversionService(object):
+    """
+    Converts the configuration files with the NoX binary.
+
+    :param nox_binary: the path of the NoX binary executable
+    :param cache_directory: the directory of the cached results, by default nox_cache next to the binary
+    """
+    def __init__(self, nox_binary, cache_directory=None):
+        self.nox_binary = nox_binary
+        self.cache_directory = cache_directory or os.path.join(os.path.dirname(os.path.abspath(nox_binary)),
+                                                               CACHE_DIRECTORY)
+        mode = os.stat(nox_binary).st_mode
+        if mode & stat.S_IXUSR == 0:
+            os.chmod(nox_binary, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        self.nox_md5 = file_checksum(nox_binary)[1]
+
+    def submit(self, fileloc, filename):
+        """Starts the conversion of fileloc/filename and returns the Conversion."""
+        return Conversion(self.convert, fileloc, filename)
+
+    def convert(self, fileloc, filename):
+        """
+        Converts fileloc/filename and places the generated files in fileloc.
+
+        :return: the ConversionResult
+        """
+        with open(os.path.join(fileloc, filename), "rb") as config:
+            config_md5 = hashlib.md5(config.read()).hexdigest()
+        cache_path = os.path.join(self.cache_directory, "{}-{}".format(self.nox_md5, config_md5))
+
+        if os.path.isfile(os.path.join(cache_path, OUTPUT_FILE)):
+            result = self._load(cache_path, filename)
+            self._copy_files(cache_path, fileloc, result.files)
+            return result
+
+        scratch = self._scratch_directory()
+        try:
+            shutil.copy(os.path.join(fileloc, filename), os.path.join(scratch, filename))
+            process = subprocess.Popen([os.path.abspath(self.nox_binary), "-f", filename], cwd=scratch,
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            output, error = process.communicate()
+
+            files = sorted(name for name in os.listdir(scratch) if name != filename)
+            self._copy_files(scratch, fileloc, files)
+            if not error:
+                self._store(scratch, cache_path, filename, output)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        return ConversionResult(filename, output, error, files)
+
+    def _scratch_directory(self):
+        try:
+            os.makedirs(self.cache_directory)
+        except OSError:
+            # already created, possibly by the concurrent conversion
+            pass
+        return tempfile.mkdtemp(dir=self.cache_directory)
+
+    def _store(self, scratch, cache_path, filename, output):
+        os.remove(os.path.join(scratch, filename))
+        with open(os.path.join(scratch, OUTPUT_FILE), "wb") as f:
+            f.write(output)
+        try:
+            os.rename(scratch, cache_path)
+        except OSError:
+            # the same configuration was cached by the concurrent conversion
+            pass
+
+    def _load(self, cache_path, filename):
+        with open(os.path.join(cache_path, OUTPUT_FILE), "rb") as f:
+            output = f.read()
+        files = sorted(name for name in os.listdir(cache_path) if name != OUTPUT_FILE)
+        return ConversionResult(filename, output, "", files, cached=True)
+
+    @staticmethod
+    def _copy_files(source, destination, files):
+        for name in files:
+            shutil.copy(os.path.join(source, name), os.path.join(destination, name))
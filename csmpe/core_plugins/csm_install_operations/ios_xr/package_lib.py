@@ -24,8 +24,6 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 
-import re
-
 # from documentation:
 # http://www.cisco.com/c/en/us/td/docs/routers/asr9000/software/asr9k_r5-3/sysman/configuration/guide/b-sysman-cg-53xasr9k/b-sysman-cg-53xasr9k_chapter_0100.html#con_57141
 
@@ -39,114 +37,6 @@ smu_re = CSCuz33376
 sp_re = None
 subversion_re = 1.0.0
 """
-platforms = ["asr9k", "hfr"]
-package_types = "mini mcast mgbl mpls k9sec diags fpd doc bng li optic services services-infa " \
-                "infra-test video asr9000v asr901 asr903".split()
-version_re = re.compile("(?P<VERSION>\d+\.\d+\.\d+(\.\d+\w+)?)")
-smu_re = re.compile("(?P<SMU>CSC[a-z]{2}\d{5})")
-sp_re = re.compile("(?P<SP>(sp|fp)\d{0,2})")
-subversion_re = re.compile("(CSC|sp|fp).*(?P<SUBVERSION>\d+\.\d+\.\d+?)")
-
-
-class SoftwarePackage(object):
-    def __init__(self, package_name):
-        self.package_name = package_name
-
-    @property
-    def platform(self):
-        for platform in platforms:
-            if platform + "-" in self.package_name:
-                return platform
-        else:
-            return None
-
-    @property
-    def package_type(self):
-        for package_type in package_types:
-            if "-" + package_type + "-" in self.package_name:
-                return package_type
-        else:
-            return None
-
-    @property
-    def architecture(self):
-        # asr9k-mcast-px.pie-5.3.2 (external name)
-        # disk0:asr9k-mcast-px-5.3.2 (internal name)
-        # asr9k-px-5.3.3.CSCuy81837.pie (external name)
-        # disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0 (internal name)
-        if "-px" in self.package_name:
-            return "px"
-        else:
-            return None
-
-    @property
-    def version(self):
-        result = re.search(version_re, self.package_name)
-        return result.group("VERSION") if result else None
-
-    @property
-    def smu(self):
-        result = re.search(smu_re, self.package_name)
-        return result.group("SMU") if result else None
-
-    @property
-    def sp(self):
-        result = re.search(sp_re, self.package_name)
-        return result.group("SP") if result else None
-
-    @property
-    def subversion(self):
-        if self.sp or self.smu:
-            result = re.search(subversion_re, self.package_name)
-            return result.group("SUBVERSION") if result else None
-        return None
-
-    def is_valid(self):
-        return self.platform and self.version and self.architecture and (self.package_type or self.smu or self.sp)
-
-    def __eq__(self, other):
-        result = self.platform == other.platform and \
-            self.package_type == other.package_type and \
-            self.architecture == other.architecture and \
-            self.version == other.version and \
-            self.smu == other.smu and \
-            self.sp == other.sp and \
-            (self.subversion == other.subversion if self.subversion and other.subversion else True)
-
-        if result:
-            # Append the disk location to the package name
-            if ":" in self.package_name:
-                disk = self.package_name.split(':')[0] + ":"
-                if not other.package_name.startswith(disk):
-                    other.package_name = disk + other.package_name
-
-        return result
-
-    def __hash__(self):
-        return hash("{}{}{}{}{}".format(
-            self.platform, self.package_type, self.architecture, self.version, self.smu, self.sp, self.subversion))
-
-    @staticmethod
-    def from_show_cmd(cmd):
-        software_packages = set()
-        data = cmd.split()
-        for line in data:
-            software_package = SoftwarePackage(line)
-            if software_package.is_valid():
-                software_packages.add(software_package)
-        return software_packages
-
-    @staticmethod
-    def from_package_list(pkg_list):
-        software_packages = set()
-        for pkg in pkg_list:
-            software_package = SoftwarePackage(pkg)
-            if software_package.is_valid():
-                software_packages.add(software_package)
-        return software_packages
-
-    def __repr__(self):
-        return self.package_name
 
-    def __str__(self):
-        return self.__repr__()
+from csmpe.core_plugins.csm_install_operations.package_lib import XRPackage as SoftwarePackage  # NOQA
+from csmpe.core_plugins.csm_install_operations.package_lib import PackageIndex  # NOQA
@@ -26,14 +26,15 @@
 # =============================================================================
 
 import re
-import time
 
 from csmpe.plugins import CSMPlugin
 from condoor.exceptions import CommandTimeoutError, CommandSyntaxError
 from csmpe.context import PluginError
 from migration_lib import wait_for_final_band
+from fpd_lib import parse_fpd_table, count_status, FPDUpgradeProgress, NEED_UPGRADE, CURRENT, RELOAD_REQUIRED
+from csmpe.core_plugins.csm_install_operations.waiter import Waiter
 from csmpe.core_plugins.csm_custom_commands_capture.plugin import Plugin as CmdCapturePlugin
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 from pre_migrate import XR_CONFIG_ON_DEVICE, ADMIN_CAL_CONFIG_ON_DEVICE, ADMIN_XR_CONFIG_ON_DEVICE
 
 TIMEOUT_FOR_COPY_CONFIG = 3600
@@ -198,52 +199,51 @@ class Plugin(CSMPlugin):
 
         fpdtable = self.ctx.send("show hw-module fpd")
 
-        match = re.search("\d+/\w+.+\d+.\d+\s+[-\w]+\s+(NEED UPGD)", fpdtable)
+        rows = parse_fpd_table(fpdtable)
+        statuses = count_status(rows)
 
-        if match:
-            total_num = len(re.findall("NEED UPGD", fpdtable)) + len(re.findall("CURRENT", fpdtable))
-            if not self._upgrade_all_fpds(total_num):
+        if statuses[NEED_UPGRADE]:
+            total_num = statuses[NEED_UPGRADE] + statuses[CURRENT]
+            if not self._upgrade_all_fpds(total_num, FPDUpgradeProgress.from_rows(self.ctx, rows)):
                 self.ctx.error("FPD upgrade in eXR is not finished. Please check session.log.")
                 return False
 
         self.ctx.send("exit")
         return True
 
-    def _upgrade_all_fpds(self, num_fpds):
+    def _upgrade_all_fpds(self, num_fpds, progress=None):
         """
         Upgrade all FPD's on all locations.
         If after all upgrade completes, some show that a reload is required to reflect the changes,
         the device will be reloaded.
 
         :param num_fpds: the number of FPD's that are in CURRENT and NEED UPGD states before upgrade.
+        :param progress: the FPDUpgradeProgress reporting the per location progress or None.
         :return: True if upgraded successfully and reloaded(if necessary).
                  False if some FPD's did not upgrade successfully in 9600 seconds.
         """
 
         self.ctx.send("upgrade hw-module location all fpd all")
 
-        timeout = 9600
-        poll_time = 30
-        time_waited = 0
+        last_statuses = [None]
 
-        time.sleep(60)
-        while 1:
+        def all_fpds_upgraded():
             # Wait till all FPDs finish upgrade
-            time_waited += poll_time
-            if time_waited >= timeout:
-                break
-            time.sleep(poll_time)
-            output = self.ctx.send("show hw-module fpd")
-            num_need_reload = len(re.findall("RLOAD REQ", output))
-            if len(re.findall("CURRENT", output)) + num_need_reload >= num_fpds:
-                if num_need_reload > 0:
-                    self.ctx.info("Finished upgrading FPD(s). Now reloading the device to complete the upgrade.")
-                    self.ctx.send("exit")
-                    return self._reload_all()
-                return True
-
-        # Some FPDs didn't finish upgrade
-        return False
+            rows = parse_fpd_table(self.ctx.send("show hw-module fpd"))
+            if progress:
+                progress.update_from_rows(rows)
+            statuses = last_statuses[0] = count_status(rows)
+            return statuses[CURRENT] + statuses[RELOAD_REQUIRED] >= num_fpds
+
+        if not Waiter(self.ctx, "fpd upgrade", timeout=9600, min_interval=15, max_interval=60).wait(all_fpds_upgraded):
+            # Some FPDs didn't finish upgrade
+            return False
+
+        if last_statuses[0][RELOAD_REQUIRED] > 0:
+            self.ctx.info("Finished upgrading FPD(s). Now reloading the device to complete the upgrade.")
+            self.ctx.send("exit")
+            return self._reload_all()
+        return True
 
     def _reload_all(self):
         """Reload the device with 1 hour maximum timeout"""
@@ -323,4 +323,4 @@ class Plugin(CSMPlugin):
             self.ctx.info("Failed to capture 'show platform' - ({}): {}".format(e.errno, e.strerror))
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
@@ -29,19 +29,24 @@ import csv
 import os
 import re
 import subprocess
-import json
 
 import pexpect
 
 from csmpe.plugins import CSMPlugin
 from csmpe.context import PluginError
 from utils import ServerType, is_empty, concatenate_dirs
-from simple_server_helper import TFTPServer, FTPServer, SFTPServer
+from simple_server_helper import get_server_impl
+from csmpe.file_server import receive_from_device
 from csmpe.core_plugins.csm_node_status_check.ios_xr.plugin import Plugin as NodeStatusPlugin
 from add import Plugin as InstallAddPlugin
 from activate import Plugin as InstallActivatePlugin
 from commit import Plugin as InstallCommitPlugin
-from migration_lib import SUPPORTED_HW_JSON
+from migration_lib import load_supported_hw
+from image_staging import stage_file
+from nox_service import NoXConversionService
+from nox_result import process_nox_csv, conversion_succeeded, all_configs_supported
+from fpd_lib import parse_fpd_table, locations_by_subtype, CURRENT, FPDUpgradeProgress, UPGRADE_SUCCESS, \
+    UPGRADE_FAILURE
 
 MINIMUM_RELEASE_VERSION_FOR_MIGRATION = "5.3.3"
 RELEASE_VERSION_DOES_NOT_NEED_FPD_SMU = "6.1.1"
@@ -101,78 +106,72 @@ class Plugin(CSMPlugin):
     platforms = {'ASR9K'}
     phases = {'Pre-Migrate'}
 
-    def _check_if_rp_fan_pem_supported_and_in_valid_state(self, supported_hw):
+    def _check_if_rp_fan_pem_supported_and_in_valid_state(self, supported_hw, exr_version):
         """Check if all RSP/RP/FAN/PEM currently on device are supported and are in valid state for migration."""
         cmd = "show platform"
-        output = self.ctx.send(cmd)
-        file_name = self.ctx.save_to_file(cmd, output)
+        inventory = self.ctx.inventory.nodes(cmd)
+        file_name = self.ctx.save_to_file(cmd, self.ctx.inventory.output(cmd))
         if file_name is None:
             self.ctx.warning("Unable to save '{}' output to file: {}".format(cmd, file_name))
 
-        inventory = self.ctx.load_data("inventory")
-
         rp_pattern = re.compile(ROUTEPROCESSOR_RE)
         fan_pattern = re.compile(FAN)
         pem_pattern = re.compile(PEM)
 
         for key, value in inventory.items():
 
-            rp_or_rsp = self._check_if_supported_and_in_valid_state(key, rp_pattern, value, supported_hw.get("RP"))
+            rp_or_rsp = self._check_if_supported_and_in_valid_state(key, rp_pattern, value,
+                                                                    supported_hw.matcher(exr_version, "RP"))
             if not rp_or_rsp:
-                fan = self._check_if_supported_and_in_valid_state(key, fan_pattern, value, supported_hw.get("FAN"))
+                fan = self._check_if_supported_and_in_valid_state(key, fan_pattern, value,
+                                                                  supported_hw.matcher(exr_version, "FAN"))
                 if not fan:
-                    self._check_if_supported_and_in_valid_state(key, pem_pattern, value, supported_hw.get("PEM"))
+                    self._check_if_supported_and_in_valid_state(key, pem_pattern, value,
+                                                                supported_hw.matcher(exr_version, "PEM"))
 
         return True
 
-    def _check_if_supported_and_in_valid_state(self, node_name, card_pattern, value, supported_type_list):
+    def _check_if_supported_and_in_valid_state(self, node_name, card_pattern, value, supported_types):
         """
         Check if a card (RSP/RP/FAN/PEM) is supported and in valid state.
         :param node_name: the name under "Node" column in output of CLI "show platform". i.e., "0/RSP0/CPU0"
         :param card_pattern: the regex for either the node name of a RSP, RP, FAN or PEM
-        :param value: the inventory value for nodes - through parsing output of "show platform"
-        :param supported_type_list: the list of card types/pids that are supported for migration
+        :param value: the inventory Node tuple - through parsing output of "show platform"
+        :param supported_types: the compiled regex matching the card types/pids that are supported for migration
         :return: True if this node is indeed the asked card(RP/RSP/FAN/PEM) and it's confirmed that it's supported
                     for migration.
                 False if this node is not the asked card(RP/RSP/FAN/PEM).
                 error out if this node is indeed the asked card(RP/RSP/FAN/PEM) and it is NOT supported for migration.
         """
         if card_pattern.match(node_name):
-            supported = False
-            if value['state'] not in VALID_STATE:
+            if value.state not in VALID_STATE:
                     self.ctx.error("{}={}: {}".format(node_name, value, "Not in valid state for migration"))
-            if not supported_type_list:
+            if supported_types is None:
                 self.ctx.error("The supported hardware list is missing information.")
-            for supported_type in supported_type_list:
-                if supported_type in value['type']:
-                    supported = True
-                    break
-            if not supported:
+            if not supported_types.search(value.type):
                 self.ctx.error("The card type for {} is not supported for migration to ASR9K-X64.".format(node_name) +
                                " Please check the user manuel under 'Help' on CSM Server for list of " +
                                "supported hardware.")
             return True
         return False
 
-    def _get_supported_iosxr_run_nodes(self, supported_hw):
+    def _get_supported_iosxr_run_nodes(self, supported_hw, exr_version):
         """Get names of all RSP's, RP's and Linecards in IOS-XR RUN state that are supported for migration."""
-        inventory = self.ctx.load_data("inventory")
+        inventory = self.ctx.inventory.nodes("show platform")
 
         supported_iosxr_run_nodes = []
 
         node_pattern = re.compile(NODE)
-        if supported_hw.get("RP") and supported_hw.get("LC"):
-            supported_cards = supported_hw.get("RP") + supported_hw.get("LC")
+        if supported_hw.matcher(exr_version, "RP") and supported_hw.matcher(exr_version, "LC"):
+            supported_cards = supported_hw.matcher(exr_version, "RP", "LC")
         else:
             self.ctx.error("The supported hardware list is missing information on RP and/or LC.")
 
         for key, value in inventory.items():
             if node_pattern.match(key):
-                if value['state'] == 'IOS XR RUN':
-                    for card in supported_cards:
-                        if card in value['type']:
-                            supported_iosxr_run_nodes.append(key)
-                            break
+                if value.state == 'IOS XR RUN':
+                    if supported_cards.search(value.type):
+                        supported_iosxr_run_nodes.append(key)
         return supported_iosxr_run_nodes
 
     def _ping_repository_check(self, repo_url):
@@ -187,17 +186,6 @@ class Plugin(CSMPlugin):
             self.ctx.error("Failed to ping server repository {} on device." +
                            "Please check session.log.".format(repo_ip.group(1)))
 
-    def _all_configs_supported(self, nox_output):
-        """Check text output from running NoX on system. Only return True if all configs are supported by eXR."""
-        pattern = "Filename[\sA-Za-z\n]*[-\s]*\S*\s+\d*\s+\d*\(\s*\d*%\)\s+\d*\(\s*\d*%\)\s+\d*\(\s*\d*%\)\s+(\d*)"
-        match = re.search(pattern, nox_output)
-
-        if match:
-            if match.group(1) != "0":
-                return False
-
-        return True
-
     def _upload_files_to_server_repository(self, sourcefiles, server, destfilenames):
         """
         Upload files from their locations in the host linux system to the FTP/TFTP/SFTP server repository.
@@ -213,61 +201,42 @@ class Plugin(CSMPlugin):
         :return: True if no error occurred.
         """
 
-        server_type = server.server_type
-        if server_type == ServerType.TFTP_SERVER:
-            tftp_server = TFTPServer(server)
-            for x in range(0, len(sourcefiles)):
-                self.ctx.info("Coping file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                   server.server_directory,
-                                                                   self.ctx._csm.install_job.server_directory,
-                                                                   destfilenames[x]))
-                try:
-                    tftp_server.upload_file(sourcefiles[x], destfilenames[x],
-                                            sub_directory=self.ctx._csm.install_job.server_directory)
-                except:
-                    self.ctx.error("Exception was thrown while " +
-                                   "copying file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                         server.server_directory,
-                                                                         self.ctx._csm.install_job.server_directory,
-                                                                         destfilenames[x]))
-
-        elif server_type == ServerType.FTP_SERVER:
-            ftp_server = FTPServer(server)
-            for x in range(0, len(sourcefiles)):
-                self.ctx.info("Coping file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                   server.server_directory,
-                                                                   self.ctx._csm.install_job.server_directory,
-                                                                   destfilenames[x]))
-                try:
-                    ftp_server.upload_file(sourcefiles[x], destfilenames[x],
-                                           sub_directory=self.ctx._csm.install_job.server_directory)
-                except:
-                    self.ctx.error("Exception was thrown while " +
-                                   "copying file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                         server.server_directory,
-                                                                         self.ctx._csm.install_job.server_directory,
-                                                                         destfilenames[x]))
-        elif server_type == ServerType.SFTP_SERVER:
-            sftp_server = SFTPServer(server)
-            for x in range(0, len(sourcefiles)):
-                self.ctx.info("Coping file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                   server.server_directory,
-                                                                   self.ctx._csm.install_job.server_directory,
-                                                                   destfilenames[x]))
-                try:
-                    sftp_server.upload_file(sourcefiles[x], destfilenames[x],
-                                            sub_directory=self.ctx._csm.install_job.server_directory)
-                except:
-                    self.ctx.error("Exception was thrown while " +
-                                   "copying file {} to {}/{}/{}.".format(sourcefiles[x],
-                                                                         server.server_directory,
-                                                                         self.ctx._csm.install_job.server_directory,
-                                                                         destfilenames[x]))
-        else:
-            self.ctx.error("Pre-Migrate does not support {} server repository.".format(server_type))
+        server_impl = get_server_impl(server)
+        if server_impl is None:
+            self.ctx.error("Pre-Migrate does not support {} server repository.".format(server.server_type))
+
+        sub_directory = self.ctx._csm.install_job.server_directory
+        for x in range(0, len(sourcefiles)):
+            self.ctx.info("Coping file {} to {}/{}/{}.".format(sourcefiles[x],
+                                                               server.server_directory,
+                                                               sub_directory,
+                                                               destfilenames[x]))
+        try:
+            results = server_impl.upload_files(zip(sourcefiles, destfilenames), sub_directory=sub_directory)
+        finally:
+            server_impl.close()
+
+        for x in range(0, len(sourcefiles)):
+            if results[x].error is not None:
+                self.ctx.error("Exception was thrown while " +
+                               "copying file {} to {}/{}/{}.".format(sourcefiles[x],
+                                                                     server.server_directory,
+                                                                     sub_directory,
+                                                                     destfilenames[x]))
+            self.ctx.info("Copied {}".format(results[x]))
 
         return True
 
+    def _get_local_repository_path(self, server, filename):
+        """
+        Get the path of the file in the server repository if the repository directory is on the system
+        where CSM is hosted (TFTP server). Return None for the remote (FTP/SFTP) server repositories.
+        """
+        if server.server_type != ServerType.TFTP_SERVER:
+            return None
+        return os.path.join(concatenate_dirs(server.server_directory, self.ctx._csm.install_job.server_directory),
+                            filename)
+
     def _copy_files_to_device(self, server, repository, source_filenames, dest_files, timeout=600):
         """
         Copy files from their locations in the user selected server directory in the FTP/TFTP/SFTP server repository
@@ -443,9 +412,9 @@ class Plugin(CSMPlugin):
                                                                              source_filenames[x],
                                                                              dest_files[x]))
 
-    def _run_migration_on_config(self, fileloc, filename, nox_to_use, hostname):
+    def _run_migration_on_config(self, fileloc, filename, conversion, hostname):
         """
-        Run the migration tool - NoX - on the configurations copied out from device.
+        Collect the result of the migration tool - NoX - run on the configurations copied out from device.
 
         The conversion/migration is successful if the number under 'Total' equals to
         the number under 'Known' in the text output.
@@ -463,37 +432,27 @@ class Plugin(CSMPlugin):
         :param fileloc: string location where the config needs to be converted/migrated is,
                         without the '/' in the end. This location is relative to csm/csmserver/
         :param filename: string filename of the config
-        :param nox_to_use: string name of NoX binary executable.
+        :param conversion: the NoX Conversion started for the config.
         :param hostname: hostname of device, as recorded on CSM.
         :return: None if no error occurred.
         """
 
         try:
-            commands = [subprocess.Popen(["chmod", "+x", nox_to_use]),
-                        subprocess.Popen([nox_to_use, "-f", os.path.join(fileloc, filename)],
-                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                        ]
-
-            nox_output, nox_error = commands[1].communicate()
-        except OSError:
-            self.ctx.error("Failed to run the configuration migration tool {} on config file {} - OSError.".format(
-                nox_to_use,
-                os.path.join(fileloc, filename))
+            result = conversion.result()
+        except (OSError, IOError) as e:
+            self.ctx.error("Failed to run the configuration migration tool on config file {} - {}.".format(
+                os.path.join(fileloc, filename), e)
             )
 
+        nox_output, nox_error = result.output, result.error
+        if result.cached:
+            self.ctx.info("Configuration {} unchanged since the last conversion, ".format(filename) +
+                          "using the cached result of the configuration migration tool.")
+
         if nox_error:
             self.ctx.error("Failed to run the configuration migration tool on the admin configuration " +
                            "we retrieved from device - {}.".format(nox_error))
 
-        conversion_success = False
-
-        match = re.search("Filename[\sA-Za-z\n]*[-\s]*\S*\s+(\d*)\s+\d*\(\s*\d*%\)\s+\d*\(\s*\d*%\)\s+(\d*)",
-                          nox_output)
-
-        if match:
-            if match.group(1) == match.group(2):
-                conversion_success = True
-
         if filename == ADMIN_CONFIG_IN_CSM:
             supported_log_name = "supported_config_in_admin_configuration"
             unsupported_log_name = "unsupported_config_in_admin_configuration"
@@ -501,21 +460,24 @@ class Plugin(CSMPlugin):
             supported_log_name = "supported_config_in_xr_configuration"
             unsupported_log_name = "unsupported_config_in_xr_configuration"
 
-        if conversion_success:
+        csvfile = os.path.join(fileloc, filename.split(".")[0] + ".csv")
 
-            if self._all_configs_supported(nox_output):
+        if conversion_succeeded(nox_output):
+
+            if all_configs_supported(nox_output):
+                if os.path.isfile(csvfile):
+                    # only the index for the campaign statistics
+                    self._create_config_logs(csvfile, None, None, hostname, filename)
                 self.ctx.info("Configuration {} was migrated successfully. ".format(filename) +
                               "No unsupported configurations found.")
             else:
-                self._create_config_logs(os.path.join(fileloc, filename.split(".")[0] + ".csv"),
-                                         supported_log_name, unsupported_log_name,
+                self._create_config_logs(csvfile, supported_log_name, unsupported_log_name,
                                          hostname, filename)
 
                 self.ctx.info("Configurations that are unsupported in eXR were removed in {}. ".format(filename) +
                               "Please look into {} and {}.".format(unsupported_log_name, supported_log_name))
         else:
-            self._create_config_logs(os.path.join(fileloc, filename.split(".")[0] + ".csv"),
-                                     supported_log_name, unsupported_log_name, hostname, filename)
+            self._create_config_logs(csvfile, supported_log_name, unsupported_log_name, hostname, filename)
 
             self.ctx.error("Unknown configurations found. Please look into {} ".format(unsupported_log_name) +
                            "for unprocessed configurations, and {} for known/supported configurations".format(
@@ -553,19 +515,8 @@ class Plugin(CSMPlugin):
         """
         fpdtable = self.ctx.send("show hw-module fpd location all")
 
-        subtype_to_locations_need_upgrade = {}
-
-        for fpdtype in FPDS_CHECK_FOR_UPGRADE:
-            match_iter = re.finditer(NODE + "[-.A-Z0-9a-z\s]*?" + fpdtype + "[-.A-Z0-9a-z\s]*?(No|Yes)", fpdtable)
-
-            for match in match_iter:
-                if match.group(1) in iosxr_run_nodes:
-                    if match.group(2) == "No":
-                        if fpdtype not in subtype_to_locations_need_upgrade:
-                            subtype_to_locations_need_upgrade[fpdtype] = []
-                        subtype_to_locations_need_upgrade[fpdtype].append(match.group(1))
-
-        return subtype_to_locations_need_upgrade
+        # the FPD's not flagged for upgrade/downgrade are force upgraded with the FPD SMU
+        return locations_by_subtype(parse_fpd_table(fpdtable), CURRENT, FPDS_CHECK_FOR_UPGRADE, iosxr_run_nodes)
 
     def _ensure_updated_fpd(self, packages, iosxr_run_nodes, version):
         """
@@ -585,7 +536,7 @@ class Plugin(CSMPlugin):
 
         :param packages: all user selected packages from scheduling the Pre-Migrate
         :param iosxr_run_nodes: the list of string nodes names we get from running
-                                self._get_supported_iosxr_run_nodes(supported_hw)
+                                self._get_supported_iosxr_run_nodes(supported_hw, exr_version)
         :param version: the current version of software. i.e., "5.3.3"
         :return: True if no error occurred.
         """
@@ -650,7 +601,18 @@ class Plugin(CSMPlugin):
             )
 
     def _upgrade_all_fpds(self, subtype_to_locations_need_upgrade):
-        """Force upgrade certain FPD's on all locations. Check for success. """
+        """
+        Force upgrade certain FPD's on all locations. Check for success.
+
+        The "upgrade hw-module fpd" command takes either one FPD subtype or "all", and "all" would
+        force upgrade the FPD's outside the migration set as well. The subtypes are therefore upgraded
+        one after another, the locations of the subtype together with "location all". The concurrent
+        upgrade commands are not sent as the upgrade holds the admin FPD process of the whole router.
+        The per location results are tracked from the upgrade command output as they are printed,
+        the FPD syslog is checked only for the locations without the result.
+        """
+        progress = FPDUpgradeProgress(self.ctx, subtype_to_locations_need_upgrade)
+
         def send_newline(ctx):
             ctx.ctrl.sendline()
             return True
@@ -659,6 +621,10 @@ class Plugin(CSMPlugin):
             ctx.ctrl.sendline("yes")
             return True
 
+        def location_finished(ctx):
+            progress.feed(ctx.ctrl.after)
+            return True
+
         def error(ctx):
             ctx.message = "Error upgrading FPD."
             return False
@@ -678,10 +644,13 @@ class Plugin(CSMPlugin):
             PROMPT = self.ctx.prompt
             TIMEOUT = self.ctx.TIMEOUT
 
-            events = [PROMPT, CONFIRM_CONTINUE, CONFIRM_SECOND_TIME, UPGRADE_END, TIMEOUT]
+            events = [PROMPT, CONFIRM_CONTINUE, CONFIRM_SECOND_TIME, UPGRADE_END, UPGRADE_SUCCESS, UPGRADE_FAILURE,
+                      TIMEOUT]
             transitions = [
                 (CONFIRM_CONTINUE, [0], 1, send_newline, TIMEOUT_FOR_FPD_UPGRADE),
                 (CONFIRM_SECOND_TIME, [1], 2, send_yes, TIMEOUT_FOR_FPD_UPGRADE),
+                (UPGRADE_SUCCESS, [1, 2], 2, location_finished, 0),
+                (UPGRADE_FAILURE, [1, 2], 2, location_finished, 0),
                 (UPGRADE_END, [1, 2], 3, None, 120),
                 (PROMPT, [3], -1, None, 0),
                 (PROMPT, [1, 2], -1, error, 0),
@@ -689,75 +658,59 @@ class Plugin(CSMPlugin):
 
             ]
 
+            max_transitions = 2 * len(subtype_to_locations_need_upgrade[fpdtype]) + 20
             if not self.ctx.run_fsm("Upgrade FPD",
                                     "admin upgrade hw-module fpd {} force location all".format(fpdtype),
-                                    events, transitions, timeout=30):
+                                    events, transitions, timeout=30, max_transitions=max_transitions):
                 self.ctx.error("Error while upgrading FPD subtype {}. Please check session.log".format(fpdtype))
 
-            fpd_log = self.ctx.send("show log | include fpd")
-
-            for location in subtype_to_locations_need_upgrade[fpdtype]:
-
-                pattern = "Successfully\s*(?:downgrade|upgrade)\s*{}.*location\s*{}".format(fpdtype, location)
-                fpd_upgrade_success = re.search(pattern, fpd_log)
+        if progress.pending:
+            progress.feed(self.ctx.send("show log | include fpd"))
 
-                if not fpd_upgrade_success:
-                    self.ctx.error("Failed to upgrade FPD subtype {} on location {}. ".format(fpdtype, location) +
-                                   "Please check session.log.")
+        for fpdtype, location in sorted(progress.pending | progress.failed):
+            self.ctx.error("Failed to upgrade FPD subtype {} on location {}. ".format(fpdtype, location) +
+                           "Please check session.log.")
         return True
 
     def _create_config_logs(self, csvfile, supported_log_name, unsupported_log_name, hostname, filename):
         """
         Create two logs for migrated configs that are unsupported and supported by eXR.
         They are stored in the same directory as session log, for user to view.
+        The index of the NoX result is saved next to the csv file for the later queries.
 
         :param csvfile: the string csv filename generated by running NoX on original config.
-        :param supported_log_name: the string filename for the supported configs log
-        :param unsupported_log_name: the string filename for the unsupported configs log
+        :param supported_log_name: the string filename for the supported configs log or None if not needed
+        :param unsupported_log_name: the string filename for the unsupported configs log or None if not needed
         :param hostname: string hostname of device, as recorded on CSM.
         :param filename: string filename of original config
-        :return: None if no error occurred
+        :return: the NoXResult index of the csv file or None if the logs could not be written
         """
 
-        supported_config_log = os.path.join(self.ctx.log_directory, supported_log_name)
-        unsupported_config_log = os.path.join(self.ctx.log_directory, unsupported_log_name)
+        msg = "\n \nPlease find original configuration in csm_data/migration/{}/{} \n".format(hostname, filename)
+        if filename.split('.')[0] == 'admin':
+            msg2 = "The final converted configuration is in csm_data/migration/" + \
+                   hostname + "/" + CONVERTED_ADMIN_CAL_CONFIG_IN_CSM + \
+                   " and csm_data/migration/" + hostname + "/" + CONVERTED_ADMIN_XR_CONFIG_IN_CSM
+        else:
+            msg2 = "The final converted configuration is in csm_data/migration/" + \
+                   hostname + "/" + CONVERTED_XR_CONFIG_IN_CSM
+
         try:
-            with open(supported_config_log, 'w') as supp_log:
-                with open(unsupported_config_log, 'w') as unsupp_log:
-                    supp_log.write('Configurations Known and Supported to the NoX Conversion Tool \n \n')
-
-                    unsupp_log.write('Configurations Unprocessed by the NoX Conversion Tool (Comments, Markers,' +
-                                     ' or Unknown/Unsupported Configurations) \n \n')
-
-                    supp_log.write('{0[0]:<8} {0[1]:^20} \n'.format(("Line No.", "Configuration")))
-                    unsupp_log.write('{0[0]:<8} {0[1]:^20} \n'.format(("Line No.", "Configuration")))
-                    with open(csvfile, 'rb') as csvfile:
-                        reader = csv.reader(csvfile)
-                        for row in reader:
-                            if len(row) >= 3 and row[1].strip() == "KNOWN_SUPPORTED":
-                                supp_log.write('{0[0]:<8} {0[1]:<} \n'.format((row[0], row[2])))
-                            elif len(row) >= 3:
-                                unsupp_log.write('{0[0]:<8} {0[1]:<} \n'.format((row[0], row[2])))
-
-                    msg = "\n \nPlease find original configuration in csm_data/migration/{}/{} \n".format(hostname,
-                                                                                                          filename)
-                    supp_log.write(msg)
-                    unsupp_log.write(msg)
-                    if filename.split('.')[0] == 'admin':
-                        msg2 = "The final converted configuration is in csm_data/migration/" + \
-                               hostname + "/" + CONVERTED_ADMIN_CAL_CONFIG_IN_CSM + \
-                               " and csm_data/migration/" + hostname + "/" + CONVERTED_ADMIN_XR_CONFIG_IN_CSM
-                    else:
-                        msg2 = "The final converted configuration is in csm_data/migration/" + \
-                               hostname + "/" + CONVERTED_XR_CONFIG_IN_CSM
-                    supp_log.write(msg2)
-                    unsupp_log.write(msg2)
-                    csvfile.close()
-                unsupp_log.close()
-            supp_log.close()
-        except:
+            result = process_nox_csv(csvfile,
+                                     supported_log_name and os.path.join(self.ctx.log_directory, supported_log_name),
+                                     unsupported_log_name and os.path.join(self.ctx.log_directory,
+                                                                           unsupported_log_name),
+                                     footer=msg + msg2)
+        except (IOError, OSError, csv.Error):
             self.ctx.error("Error writing diagnostic files - in " + self.ctx.log_directory +
                            " during configuration migration.")
+            return None
+
+        if result.unsupported_features:
+            self.ctx.info("Unsupported configurations in {} by feature: {}".format(
+                filename, ", ".join("{} ({})".format(feature, count)
+                                    for feature, count in result.unsupported_features.most_common(10))))
+        return result
 
     def _filter_server_repository(self, server):
         """Filter out LOCAL server repositories and only keep TFTP, FTP and SFTP"""
@@ -777,46 +730,47 @@ class Plugin(CSMPlugin):
         :return: None
         """
 
-        try:
-            cmd = "admin show run" if admin else "show run"
-            output = self.ctx.send(cmd, timeout=TIMEOUT_FOR_COPY_CONFIG)
-            ind = output.rfind('Building configuration...\n')
+        config = receive_from_device(self.ctx, "running-config",
+                                     os.path.basename(files[0]),
+                                     command="admin copy" if admin else "copy",
+                                     timeout=TIMEOUT_FOR_COPY_CONFIG)
+        if config is None:
+            try:
+                cmd = "admin show run" if admin else "show run"
+                output = self.ctx.send(cmd, timeout=TIMEOUT_FOR_COPY_CONFIG)
+                ind = output.rfind('Building configuration...\n')
+
+            except pexpect.TIMEOUT:
+                self.ctx.error("CLI '{}' timed out after 1 hour.".format(cmd))
 
-        except pexpect.TIMEOUT:
-            self.ctx.error("CLI '{}' timed out after 1 hour.".format(cmd))
+            config = output[(ind+1):]
 
         for file_path in files:
             # file = '../../csm_data/migration/<hostname>' + filename
             file_to_write = open(file_path, 'w+')
-            file_to_write.write(output[(ind+1):])
+            file_to_write.write(config)
             file_to_write.close()
 
-    def _handle_configs(self, hostname, server, repo_url, fileloc, nox_to_use, config_filename):
+    def _convert_configs(self, fileloc, nox_to_use, config_filename):
         """
-        1. Copy admin and XR configs from device to tftp server repository.
-        2. Copy admin and XR configs from server repository to csm_data/migration/<hostname>/
-        3. Copy admin and XR configs from server repository to session log directory as
+        1. Copy admin and XR configs from device to csm_data/migration/<hostname>/
+        2. Copy admin and XR configs from device to session log directory as
            show-running-config.txt and admin-show-running-config.txt for comparisons
            after Migrate or Post-Migrate. (Diff will be generated.)
-        4. Run NoX on admin config first. This run generates 1) eXR admin/calvados config
+        3. Start NoX on admin config. This run generates 1) eXR admin/calvados config
            and POSSIBLY 2) eXR XR config.
-        5. Run NoX on XR config if no custom eXR config has been selected by user when
+        4. Start NoX on XR config if no custom eXR config has been selected by user when
            Pre-Migrate is scheduled. This run generates eXR XR config.
-        6. Copy all converted configs to the server repository and then from there to device.
-           Note if user selected custom eXR XR config, that will be uploaded instead of
-           the NoX migrated original XR config.
 
-        :param hostname: string hostname of device, as recorded on CSM.
-        :param repo_url: the URL of the selected TFTP server repository. i.e., tftp://223.255.254.245/tftpboot
+        The conversions run in background while the plugin continues with the device.
+
         :param fileloc: the string path ../../csm_data/migration/<hostname>
         :param nox_to_use: the name of the NoX binary executable
         :param config_filename: the user selected string filename of custom eXR XR config.
-                                If it's '', nothing was selected.
-                                If selected, this file must be in the server repository.
-        :return: None if no error occurred.
+        :return: dictionary of the config filename to the started NoX Conversion.
         """
 
-        self.ctx.info("Saving the current configurations on device into server repository and csm_data")
+        self.ctx.info("Saving the current configurations on device into csm_data")
 
         self._save_config_to_csm_data([os.path.join(fileloc, ADMIN_CONFIG_IN_CSM),
                                        os.path.join(self.ctx.log_directory,
@@ -828,18 +782,56 @@ class Plugin(CSMPlugin):
                                        self.ctx.normalize_filename("show running-config"))
                                        ], admin=False)
 
+        try:
+            nox_service = NoXConversionService(nox_to_use)
+        except (OSError, IOError) as e:
+            self.ctx.error("Failed to prepare the configuration migration tool {} - {}.".format(nox_to_use, e))
+
         self.ctx.info("Converting admin configuration file with configuration migration tool")
-        self._run_migration_on_config(fileloc, ADMIN_CONFIG_IN_CSM, nox_to_use, hostname)
+        conversions = {ADMIN_CONFIG_IN_CSM: nox_service.submit(fileloc, ADMIN_CONFIG_IN_CSM)}
+
+        if not config_filename:
+            self.ctx.info("Converting IOS-XR configuration file with configuration migration tool")
+            conversions[XR_CONFIG_IN_CSM] = nox_service.submit(fileloc, XR_CONFIG_IN_CSM)
+
+        return conversions
+
+    def _collect_conversions(self, hostname, fileloc, conversions, wait=True):
+        """
+        Collect the NoX results of the admin config and the XR config, if converted.
+        The collected conversions are removed from the dictionary, so the conversion
+        failure aborts the migration as soon as the finished conversions are polled.
+
+        :param hostname: string hostname of device, as recorded on CSM.
+        :param fileloc: the string path ../../csm_data/migration/<hostname>
+        :param conversions: dictionary of the config filename to the NoX Conversion started by _convert_configs
+        :param wait: wait for the running conversions, otherwise collect only the finished ones.
+        :return: None if no error occurred.
+        """
+        for filename in (ADMIN_CONFIG_IN_CSM, XR_CONFIG_IN_CSM):
+            if filename in conversions and (wait or conversions[filename].done()):
+                self._run_migration_on_config(fileloc, filename, conversions.pop(filename), hostname)
+
+    def _handle_configs(self, hostname, server, repo_url, fileloc, config_filename):
+        """
+        Copy all converted configs to the server repository and then from there to device.
+        Note if user selected custom eXR XR config, that will be uploaded instead of
+        the NoX migrated original XR config.
+
+        :param hostname: string hostname of device, as recorded on CSM.
+        :param repo_url: the URL of the selected TFTP server repository. i.e., tftp://223.255.254.245/tftpboot
+        :param fileloc: the string path ../../csm_data/migration/<hostname>
+        :param config_filename: the user selected string filename of custom eXR XR config.
+                                If it's '', nothing was selected.
+                                If selected, this file must be in the server repository.
+        :return: None if no error occurred.
+        """
 
         # ["admin.cal"]
         config_files = [CONVERTED_ADMIN_CAL_CONFIG_IN_CSM]
         # ["admin_calvados.cfg"]
         config_names_on_device = [ADMIN_CAL_CONFIG_ON_DEVICE]
         if not config_filename:
-
-            self.ctx.info("Converting IOS-XR configuration file with configuration migration tool")
-            self._run_migration_on_config(fileloc, XR_CONFIG_IN_CSM, nox_to_use, hostname)
-
             # "xr.iox"
             config_files.append(CONVERTED_XR_CONFIG_IN_CSM)
             # "iosxr.cfg"
@@ -926,8 +918,7 @@ class Plugin(CSMPlugin):
         except AttributeError:
             self.ctx.error("No indication for whether to override hardware requirement or not.")
 
-        with open(SUPPORTED_HW_JSON) as supported_hw_file:
-            supported_hw = json.load(supported_hw_file)
+        supported_hw = load_supported_hw()
 
         exr_image = self._get_exr_tar_package(packages)
         version_match = re.findall("\d+\.\d+\.\d+", exr_image)
@@ -953,9 +944,9 @@ class Plugin(CSMPlugin):
 
         if supported_hw.get(exr_version) and not override_hw_req:
             self.ctx.info("Check if all RSP/RP/FAN/PEM on device are supported for migration.")
-            self._check_if_rp_fan_pem_supported_and_in_valid_state(supported_hw[exr_version])
+            self._check_if_rp_fan_pem_supported_and_in_valid_state(supported_hw, exr_version)
 
-        iosxr_run_nodes = self._get_supported_iosxr_run_nodes(supported_hw[exr_version])
+        iosxr_run_nodes = self._get_supported_iosxr_run_nodes(supported_hw, exr_version)
 
         if len(iosxr_run_nodes) == 0:
             self.ctx.error("No RSP/RP or Linecard on the device is supported for migration to ASR9K-X64.")
@@ -973,32 +964,42 @@ class Plugin(CSMPlugin):
         if version < MINIMUM_RELEASE_VERSION_FOR_MIGRATION:
             self.ctx.error("The minimal release version required for migration is 5.3.3. " +
                            "Please upgrade to at lease R5.3.3 before scheduling migration.")
+
+        # nox_to_use = self.ctx.migration_directory + self._find_nox_to_use()
+
+        nox_to_use = self.ctx.migration_directory + NOX_FOR_MAC
+
+        if not os.path.isfile(nox_to_use):
+            self.ctx.error("The configuration conversion tool {} is missing. ".format(nox_to_use) +
+                           "CSM should have downloaded it from CCO when migration actions were scheduled.")
+
+        # the conversions run while the device is checked and the image is staged,
+        # the finished ones are collected between the device steps
+        conversions = self._convert_configs(fileloc, nox_to_use, config_filename)
+
         try:
             node_status_plugin = NodeStatusPlugin(self.ctx)
             node_status_plugin.run()
         except PluginError:
             self.ctx.error("Not all nodes are in valid states. Pre-Migrate aborted. " +
                            "Please check session.log to trouble-shoot.")
+        self._collect_conversions(hostname_for_filename, fileloc, conversions, wait=False)
 
         self._ping_repository_check(server_repo_url)
 
         self.ctx.info("Resizing eUSB partition.")
         self._resize_eusb()
+        self._collect_conversions(hostname_for_filename, fileloc, conversions, wait=False)
 
-        # nox_to_use = self.ctx.migration_directory + self._find_nox_to_use()
-
-        nox_to_use = self.ctx.migration_directory + NOX_FOR_MAC
+        self.ctx.info("Copying the ASR9K-X64 image from server repository to device.")
+        stage_file(self.ctx, self._get_local_repository_path(server, exr_image), IMAGE_LOCATION + exr_image,
+                   lambda: self._copy_files_to_device(server, server_repo_url, [exr_image],
+                                                      [IMAGE_LOCATION + exr_image], timeout=TIMEOUT_FOR_COPY_IMAGE))
 
-        if not os.path.isfile(nox_to_use):
-            self.ctx.error("The configuration conversion tool {} is missing. ".format(nox_to_use) +
-                           "CSM should have downloaded it from CCO when migration actions were scheduled.")
+        self._collect_conversions(hostname_for_filename, fileloc, conversions)
 
         self._handle_configs(hostname_for_filename, server,
-                             server_repo_url, fileloc, nox_to_use, config_filename)
-
-        self.ctx.info("Copying the ASR9K-X64 image from server repository to device.")
-        self._copy_files_to_device(server, server_repo_url, [exr_image],
-                                   [IMAGE_LOCATION + exr_image], timeout=TIMEOUT_FOR_COPY_IMAGE)
+                             server_repo_url, fileloc, config_filename)
 
         self._ensure_updated_fpd(packages, iosxr_run_nodes, version)
 
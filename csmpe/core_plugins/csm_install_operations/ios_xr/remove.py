@@ -26,10 +26,10 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 
-from package_lib import SoftwarePackage
+from package_lib import SoftwarePackage, PackageIndex
 from csmpe.plugins import CSMPlugin
 from install import install_add_remove
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 
 
 class Plugin(CSMPlugin):
@@ -48,7 +48,7 @@ class Plugin(CSMPlugin):
         pkgs = SoftwarePackage.from_package_list(packages)
 
         installed_inact = SoftwarePackage.from_show_cmd(self.ctx.send("admin show install inactive summary"))
-        packages_to_remove = pkgs & installed_inact
+        packages_to_remove = PackageIndex(installed_inact).match(pkgs)
 
         if not packages_to_remove:
             self.ctx.warning("Packages already removed. Nothing to be removed")
@@ -66,5 +66,5 @@ class Plugin(CSMPlugin):
         self.ctx.info("Package(s) Removed Successfully")
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
 
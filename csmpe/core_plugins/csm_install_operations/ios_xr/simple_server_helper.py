@@ -1,113 +1,372 @@
-# =============================================================================
-# Copyright (c) 2016, Cisco Systems, Inc
-# All rights reserved.
-#
-# Redistribution and use in source and binary forms, with or without
-# modification, are permitted provided that the following conditions are met:
-#
-# Redistributions of source code must retain the above copyright notice,
-# this list of conditions and the following disclaimer.
-# Redistributions in binary form must reproduce the above copyright notice,
-# this list of conditions and the following disclaimer in the documentation
-# and/or other materials provided with the distribution.
-# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
-# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
-# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
-# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
-# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
-# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
-# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
-# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
-# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
-# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
-# THE POSSIBILITY OF SUCH DAMAGE.
-# =============================================================================
-import os
-import ftplib
-import shutil
-
-from csmpe.core_plugins.csm_install_operations.ios_xr.utils import ServerType
-from csmpe.core_plugins.csm_install_operations.ios_xr.utils import import_module
-from csmpe.core_plugins.csm_install_operations.ios_xr.utils import concatenate_dirs
-
-
-def get_server_impl(server):
-    if server.server_type == ServerType.TFTP_SERVER:
-        return TFTPServer(server)
-    elif server.server_type == ServerType.FTP_SERVER:
-        return FTPServer(server)
-    elif server.server_type == ServerType.SFTP_SERVER:
-        return SFTPServer(server)
-    else:
-        return None
-
-
-class ServerImpl(object):
-    def __init__(self, server):
-        self.server = server
-
-    """
-    Upload file to the designated server repository.
-    source_file_path - complete path to the source file
-    dest_filename - filename on the server repository
-    sub_directory - sub-directory under the server repository
-    """
-    def upload_file(self, source_file_path, dest_filename, sub_directory=None, callback=None):
-        raise NotImplementedError("Children must override upload_file")
-
-
-class TFTPServer(ServerImpl):
-    def __init__(self, server):
-        ServerImpl.__init__(self, server)
-
-    def upload_file(self, source_file_path, dest_filename, sub_directory=None, callback=None):
-        if sub_directory is None:
-            path = self.server.server_directory
-        else:
-            path = (self.server.server_directory + os.sep + sub_directory)
-
-        shutil.copy(source_file_path, path + os.sep + dest_filename)
-
-
-class FTPServer(ServerImpl):
-    def __init__(self, server):
-        ServerImpl.__init__(self, server)
-
-    def upload_file(self, source_file_path, dest_filename, sub_directory=None, callback=None):
-        try:
-            file = open(source_file_path, 'rb')
-
-            ftp = ftplib.FTP(self.server.server_url, user=self.server.username, passwd=self.server.password)
-
-            remote_directory = concatenate_dirs(self.server.server_directory, sub_directory)
-            if len(remote_directory) > 0:
-                ftp.cwd(remote_directory)
-
-            # default block size is 8912
-            if callback:
-                ftp.storbinary('STOR ' + dest_filename, file, callback=callback)
-            else:
-                ftp.storbinary('STOR ' + dest_filename, file)
-            ftp.quit()
-            file.close()
-
-        finally:
-            if file is not None:
-                file.close()
-
-
-class SFTPServer(ServerImpl):
-    def __init__(self, server):
-        ServerImpl.__init__(self, server)
-
-    def upload_file(self, source_file_path, dest_filename, sub_directory=None, callback=None):
-        sftp_module = import_module('pysftp')
-
-        with sftp_module.Connection(self.server.server_url, username=self.server.username, password=self.server.password) as sftp:
-            remote_directory = concatenate_dirs(self.server.server_directory, sub_directory)
-            if len(remote_directory) > 0:
-                sftp.chdir(remote_directory)
-            if callback:
-                sftp.put(source_file_path, remotepath=remote_directory + '/' + dest_filename, callback=callback)
-            else:
-                sftp.put(source_file_path, remotepath=remote_directory + '/' + dest_filename)
+# =============================================================================
+# Copyright (c) 2016, Cisco Systems, Inc
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+import os
+import errno
+import fcntl
+import ftplib
+import shutil
+import threading
+import time
+import Queue
+
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import ServerType
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import import_module
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import concatenate_dirs
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_MAX_WORKERS = 4
+
+# Linux FICLONE ioctl, the copy-on-write clone of the whole file
+FICLONE = 0x40049409
+
+LINK = "link"
+REFLINK = "reflink"
+SENDFILE = "sendfile"
+COPY = "copy"
+LOCAL_TRANSFER_METHODS = (REFLINK, SENDFILE, COPY)
+
+
+def get_server_impl(server):
+    if server.server_type in (ServerType.TFTP_SERVER, ServerType.LOCAL_SERVER):
+        return TFTPServer(server)
+    elif server.server_type == ServerType.FTP_SERVER:
+        return FTPServer(server)
+    elif server.server_type == ServerType.SFTP_SERVER:
+        return SFTPServer(server)
+    else:
+        return None
+
+
+class TransferStats(object):
+    """The number of bytes transferred and the transfer time of the file."""
+    def __init__(self, dest_filename):
+        self.dest_filename = dest_filename
+        self.bytes = 0
+        self.start = time.time()
+        self.elapsed = 0.0
+        self.error = None
+        self.method = None
+
+    def update(self, num_bytes):
+        self.bytes += num_bytes
+        self.elapsed = time.time() - self.start
+
+    @property
+    def throughput(self):
+        """Bytes per second"""
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return "{}: {} bytes in {:.2f} sec ({:.0f} KB/s){}".format(
+            self.dest_filename, self.bytes, self.elapsed, self.throughput / 1024,
+            " by {}".format(self.method) if self.method else "")
+
+
+class ConnectionPool(object):
+    """
+    The pool of the reusable server connections.
+    The connection is created on demand with the connect function, up to max_size connections.
+    """
+    def __init__(self, connect, close, max_size=DEFAULT_MAX_WORKERS):
+        self._connect = connect
+        self._close = close
+        self._idle = Queue.Queue()
+        self._semaphore = threading.BoundedSemaphore(max_size)
+
+    def acquire(self):
+        self._semaphore.acquire()
+        try:
+            return self._idle.get_nowait()
+        except Queue.Empty:
+            try:
+                return self._connect()
+            except Exception:
+                self._semaphore.release()
+                raise
+
+    def release(self, connection, broken=False):
+        if broken:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+        self._semaphore.release()
+
+    def _discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Queue.Empty:
+                break
+
+
+class ServerImpl(object):
+    def __init__(self, server, block_size=DEFAULT_BLOCK_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+        self.server = server
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _connect(self):
+        return None
+
+    def _disconnect(self, connection):
+        pass
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ConnectionPool(self._connect, self._disconnect, self.max_workers)
+        return self._pool
+
+    def close(self):
+        """Closes the pooled connections."""
+        if self._pool is not None:
+            self._pool.close()
+
+    """
+    Upload file to the designated server repository.
+    source_file_path - complete path to the source file
+    dest_filename - filename on the server repository
+    sub_directory - sub-directory under the server repository
+    callback - the transfer client callback, called with the data block by FTP and
+               with the (transferred, total) bytes by SFTP
+    progress - called with the number of bytes of every transferred block
+    Returns the TransferStats of the file.
+    """
+    def upload_file(self, source_file_path, dest_filename, sub_directory=None, callback=None, progress=None):
+        stats = TransferStats(dest_filename)
+
+        def update(num_bytes):
+            stats.update(num_bytes)
+            if progress:
+                progress(num_bytes)
+
+        connection = self.pool.acquire()
+        try:
+            stats.method = self._upload(connection, source_file_path, dest_filename, sub_directory, callback, update)
+        except Exception:
+            self.pool.release(connection, broken=True)
+            raise
+        self.pool.release(connection)
+        stats.update(0)
+        return stats
+
+    def upload_files(self, files, sub_directory=None, callback=None):
+        """
+        Upload multiple files concurrently over the pooled connections.
+        files - list of (source_file_path, dest_filename) tuples
+        callback - called with the TransferStats of every finished file
+        Returns the list of TransferStats in the order of files. The error attribute is set
+        to the exception of the failed transfer.
+        """
+        results = [None] * len(files)
+        jobs = Queue.Queue()
+        for index, item in enumerate(files):
+            jobs.put((index, item))
+
+        def worker():
+            while True:
+                try:
+                    index, (source_file_path, dest_filename) = jobs.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    stats = self.upload_file(source_file_path, dest_filename, sub_directory=sub_directory)
+                except Exception as e:
+                    stats = TransferStats(dest_filename)
+                    stats.error = e
+                results[index] = stats
+                if callback:
+                    callback(stats)
+
+        workers = [threading.Thread(target=worker) for _ in range(min(self.max_workers, len(files)))]
+        for thread in workers:
+            thread.daemon = True
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return results
+
+    def _upload(self, connection, source_file_path, dest_filename, sub_directory, callback, progress):
+        raise NotImplementedError("Children must override _upload")
+
+
+def _reflink(source_file_path, dest_file_path, block_size, callback):
+    with open(source_file_path, 'rb') as source:
+        with open(dest_file_path, 'wb') as dest:
+            try:
+                fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+            except (IOError, OSError):
+                dest.close()
+                os.remove(dest_file_path)
+                raise
+    callback(os.path.getsize(dest_file_path))
+
+
+def _link(source_file_path, dest_file_path, block_size, callback):
+    os.link(source_file_path, dest_file_path)
+    callback(os.path.getsize(dest_file_path))
+
+
+def _sendfile(source_file_path, dest_file_path, block_size, callback):
+    sendfile = getattr(os, "sendfile", None)
+    if sendfile is None:
+        raise OSError(errno.ENOSYS, "sendfile not available")
+    with open(source_file_path, 'rb') as source:
+        with open(dest_file_path, 'wb') as dest:
+            offset = 0
+            while True:
+                sent = sendfile(dest.fileno(), source.fileno(), offset, block_size)
+                if sent == 0:
+                    break
+                offset += sent
+                callback(sent)
+
+
+def _copy(source_file_path, dest_file_path, block_size, callback):
+    with open(source_file_path, 'rb') as source:
+        with open(dest_file_path, 'wb') as dest:
+            for block in iter(lambda: source.read(block_size), b""):
+                dest.write(block)
+                callback(len(block))
+
+
+_local_transfers = {
+    REFLINK: _reflink,
+    LINK: _link,
+    SENDFILE: _sendfile,
+    COPY: _copy,
+}
+
+
+def copy_local_file(source_file_path, dest_file_path, block_size=DEFAULT_BLOCK_SIZE, callback=None,
+                    methods=LOCAL_TRANSFER_METHODS):
+    """
+    Copy the file within the local file systems with the first method that works:
+    reflink - the copy-on-write clone, instant on the file systems supporting it (i.e. btrfs, xfs)
+    link - the hard link, instant on the same file system. Not used unless listed in methods
+           as the source and the destination share the data and the mode.
+    sendfile - the kernel copy without the user space buffers (Python 3 only)
+    copy - the block copy
+    Returns the method used.
+    """
+    callback = callback or (lambda num_bytes: None)
+    if os.path.lexists(dest_file_path):
+        os.remove(dest_file_path)
+
+    error = None
+    for method in methods:
+        try:
+            _local_transfers[method](source_file_path, dest_file_path, block_size, callback)
+        except (IOError, OSError) as e:
+            error = e
+            if method == COPY:
+                raise
+            if os.path.lexists(dest_file_path):
+                os.remove(dest_file_path)
+            continue
+        if method not in (LINK, ):
+            shutil.copymode(source_file_path, dest_file_path)
+        return method
+    raise error
+
+
+class TFTPServer(ServerImpl):
+    """
+    The TFTP or local repository directory on the system where CSM is hosted.
+    methods - the local transfer methods tried in order, see copy_local_file
+    """
+    def __init__(self, server, block_size=DEFAULT_BLOCK_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                 methods=LOCAL_TRANSFER_METHODS):
+        ServerImpl.__init__(self, server, block_size, max_workers)
+        self.methods = methods
+
+    def _upload(self, connection, source_file_path, dest_filename, sub_directory, callback, progress):
+        if sub_directory is None:
+            path = self.server.server_directory
+        else:
+            path = (self.server.server_directory + os.sep + sub_directory)
+
+        return copy_local_file(source_file_path, path + os.sep + dest_filename, self.block_size, progress,
+                               self.methods)
+
+
+class FTPServer(ServerImpl):
+    def _connect(self):
+        ftp = ftplib.FTP(self.server.server_url, user=self.server.username, passwd=self.server.password)
+        return ftp, ftp.pwd()
+
+    def _disconnect(self, connection):
+        connection[0].quit()
+
+    def _upload(self, connection, source_file_path, dest_filename, sub_directory, callback, progress):
+        ftp, home = connection
+        ftp.cwd(home)
+        remote_directory = concatenate_dirs(self.server.server_directory, sub_directory)
+        if len(remote_directory) > 0:
+            ftp.cwd(remote_directory)
+
+        def transferred(block):
+            progress(len(block))
+            if callback:
+                callback(block)
+
+        with open(source_file_path, 'rb') as source:
+            ftp.storbinary('STOR ' + dest_filename, source, blocksize=self.block_size, callback=transferred)
+
+
+class SFTPServer(ServerImpl):
+    """The SFTP transfer block size is negotiated by the SFTP client."""
+    def _connect(self):
+        sftp_module = import_module('pysftp')
+        sftp = sftp_module.Connection(self.server.server_url, username=self.server.username,
+                                      password=self.server.password)
+        return sftp, sftp.pwd
+
+    def _disconnect(self, connection):
+        connection[0].close()
+
+    def _upload(self, connection, source_file_path, dest_filename, sub_directory, callback, progress):
+        sftp, home = connection
+        sftp.chdir(home)
+        remote_directory = concatenate_dirs(self.server.server_directory, sub_directory)
+        if len(remote_directory) > 0:
+            sftp.chdir(remote_directory)
+
+        transferred = [0]
+
+        def update(done, total):
+            progress(done - transferred[0])
+            transferred[0] = done
+            if callback:
+                callback(done, total)
+
+        sftp.put(source_file_path, remotepath=remote_directory + '/' + dest_filename, callback=update)
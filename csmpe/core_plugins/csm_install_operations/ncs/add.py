@@ -28,7 +28,7 @@
 
 from csmpe.plugins import CSMPlugin
 from install import install_add_remove
-from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import get_package
+from csmpe.core_plugins.csm_get_software_packages.ios_xr.plugin import request_package_refresh
 
 
 class Plugin(CSMPlugin):
@@ -66,4 +66,4 @@ class Plugin(CSMPlugin):
         self.ctx.info("Package(s) Added Successfully")
 
         # Refresh package information
-        get_package(self.ctx)
+        request_package_refresh(self.ctx)
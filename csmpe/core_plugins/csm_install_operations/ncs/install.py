@@ -26,8 +26,10 @@
 # THE POSSIBILITY OF SUCH DAMAGE.
 # =============================================================================
 import re
-import time
-import itertools
+
+from csmpe.core_plugins.csm_install_operations.operation_tracker import OperationTracker
+from csmpe.core_plugins.csm_install_operations.reachability import reconnect_after_reload
+from csmpe.core_plugins.csm_install_operations.waiter import Waiter
 
 install_error_pattern = re.compile("Error:    (.*)$", re.MULTILINE)
 
@@ -51,56 +53,14 @@ def watch_operation(ctx, op_id=0):
         When install is completed, the following message will be displayed
         RP/0/RP0/CPU0:Deploy#May 24 22:25:43 Install operation 17 finished successfully
         """
-        no_install = r"No install operation in progress"
-        op_progress = r"The install operation {} is (\d+)% complete".format(op_id)
-        success = "Install operation {} finished successfully".format(op_id)
-
-        cmd_show_install_request = "show install request"
-        ctx.info("Watching the operation {} to complete".format(op_id))
-
-        last_status = None
-        finish = False
-        while not finish:
-            try:
-                # this is to catch the successful operation as soon as possible
-                ctx.send("", wait_for_string=success, timeout=20)
-                finish = True
-            except ctx.CommandTimeoutError:
-                pass
-
-            message = ""
-            output = ctx.send(cmd_show_install_request)
-            if op_id in output:
-                result = re.search(op_progress, output)
-                if result:
-                    status = result.group(0)
-                    message = "{}".format(status)
-
-                if message != last_status:
-                    ctx.post_status(message)
-                    last_status = message
-
-            if no_install in output:
-                break
-
-        return output
-
-
-def parse_xr_show_platform(output):
-    inventory = {}
-    lines = output.split('\n')
-
-    for line in lines:
-        line = line.strip()
-        if len(line) > 0 and line[0].isdigit():
-            node = line[:15].strip()
-            entry = {
-                'type': line[16:41].strip(),
-                'state': line[42:58].strip(),
-                'config_state': line[59:].strip()
-            }
-            inventory[node] = entry
-    return inventory
+        tracker = OperationTracker(
+            ctx, op_id,
+            success=r"Install operation {} finished successfully".format(op_id),
+            failure=r"Install operation {} aborted".format(op_id),
+            progress=r"The install operation {} is (\d+)% complete".format(op_id),
+            no_install="No install operation in progress",
+            cmd_show_install_request="show install request")
+        return tracker.wait()
 
 
 def validate_xr_node_state(inventory):
@@ -117,7 +77,7 @@ def validate_xr_node_state(inventory):
     ]
     for key, value in inventory.items():
         if 'CPU' in key:
-            if value['state'] not in valid_state:
+            if value.state not in valid_state:
                 break
     else:
         return True
@@ -129,34 +89,30 @@ def wait_for_reload(ctx):
      Wait for system to come up with max timeout as 25 Minutes
 
     """
-    ctx.disconnect()
-    time.sleep(60)
-
-    ctx.reconnect(max_timeout=1500)  # 25 * 60 = 1500
-    timeout = 3600
-    poll_time = 30
-    time_waited = 0
+    reconnect_after_reload(ctx, max_timeout=1500)  # 25 * 60 = 1500
     xr_run = "IOS XR RUN"
 
     cmd = "admin show platform"
     ctx.info("Waiting for all nodes to come up")
     ctx.post_status("Waiting for all nodes to come up")
-    time.sleep(100)
-    while 1:
+
+    outputs = [""]
+
+    def all_nodes_up():
         # Wait till all nodes are in XR run state
-        time_waited += poll_time
-        if time_waited >= timeout:
-            break
-        time.sleep(poll_time)
-        output = ctx.send(cmd)
-        if xr_run in output:
-            inventory = parse_xr_show_platform(output)
-            if validate_xr_node_state(inventory):
-                ctx.info("All nodes in desired state")
-                return True
+        # the last inventory stays cached for the plugins running after reload
+        inventory = ctx.inventory.refresh(cmd)
+        outputs[0] = ctx.inventory.output(cmd)
+        if xr_run in outputs[0]:
+            return validate_xr_node_state(inventory)
+        return False
+
+    if Waiter(ctx, "reload", timeout=3600).wait(all_nodes_up):
+        ctx.info("All nodes in desired state")
+        return True
 
     # Some nodes did not come to run state
-    ctx.error("Not all nodes have came up: {}".format(output))
+    ctx.error("Not all nodes have came up: {}".format(outputs[0]))
     # this will never be executed
     return False
 
@@ -0,0 +1,139 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+import itertools
+
+"""
+The install operation tracker.
+
+The install operations continue asynchronously and the router prints the install log messages
+to the session, i.e.:
+
+RP/0/RSP0/CPU0:ASR9K#Info:     Install operation 12 completed successfully
+RP/0/RP0/CPU0:Deploy#May 24 22:25:43 Install operation 17 finished successfully
+
+The tracker consumes those messages as a stream and finishes as soon as the operation completion
+or failure message arrives. The install request is polled only when the stream is quiet.
+"""
+
+
+class OperationTracker(object):
+    """
+    Tracks the progress and the completion of the install operation.
+
+    :param ctx: the plugin context
+    :param op_id: the install operation id
+    :param success: the regex string of the operation success message
+    :param failure: the regex string of the operation failure message
+    :param progress: the regex string of the progress message with the percentage in the first group
+    :param no_install: the string in the show install request output if no operation is in progress
+    :param cmd_show_install_request: the command polled when the stream is quiet
+    :param download: the regex string of the download progress message or None
+    :param quiet_timeout: the number of seconds without any message after which the request is polled
+    """
+    def __init__(self, ctx, op_id, success, failure, progress, no_install, cmd_show_install_request,
+                 download=None, quiet_timeout=30):
+        self.ctx = ctx
+        self.op_id = op_id
+        self.success_re = re.compile(success)
+        self.failure_re = re.compile(failure)
+        self.progress_re = re.compile(progress)
+        self.download_re = re.compile(download) if download else None
+        self.no_install = no_install
+        self.cmd_show_install_request = cmd_show_install_request
+        self.quiet_timeout = quiet_timeout
+
+        self.finished = False
+        self.succeeded = None
+        self.progress = None
+        self.output = ""
+        self._last_status = None
+        self._propeller = itertools.cycle(["|", "/", "-", "\\"])
+
+    def wait(self):
+        """Waits for the operation to finish. Returns the whole output received."""
+        self.ctx.info("Watching the operation {} to complete".format(self.op_id))
+        while not self.finished:
+            self._watch_stream()
+            if self.finished:
+                break
+            output = self.ctx.send(self.cmd_show_install_request)
+            self.output += output
+            # the request output may show the other operation
+            if str(self.op_id) in output:
+                self.update(output)
+            if self.no_install in output:
+                self.finished = True
+
+        if self.succeeded is not None:
+            self.ctx.info("Install operation {} {}".format(self.op_id, "succeeded" if self.succeeded else "failed"))
+        return self.output
+
+    def update(self, output):
+        """Updates the operation state from the output text."""
+        if self.success_re.search(output):
+            self.finished, self.succeeded = True, True
+            return
+        if self.failure_re.search(output):
+            self.finished, self.succeeded = True, False
+            return
+
+        message = ""
+        result = self.progress_re.search(output)
+        if result:
+            self.progress = int(result.group(1))
+            message = "{} {}".format(next(self._propeller), result.group(0))
+
+        if self.download_re:
+            result = self.download_re.search(output)
+            if result:
+                message += "\r\n<br>{}".format(result.group(0))
+
+        if message and message != self._last_status:
+            self.ctx.post_status(message)
+            self._last_status = message
+
+    def _watch_stream(self):
+        """Consumes the install messages until the operation finishes or the stream is quiet."""
+        def update(fsm_ctx):
+            self.output += (fsm_ctx.ctrl.before or "") + fsm_ctx.ctrl.after
+            self.update(fsm_ctx.ctrl.after)
+            return True
+
+        PROMPT = self.ctx.prompt
+        TIMEOUT = self.ctx.TIMEOUT
+        events = [self.success_re, self.failure_re, self.progress_re, PROMPT, TIMEOUT]
+        transitions = [
+            (self.success_re, [0], -1, update, 0),
+            (self.failure_re, [0], -1, update, 0),
+            (self.progress_re, [0], 0, update, 0),
+            (PROMPT, [0], 0, None, 0),
+            (TIMEOUT, [0], -1, None, 0),
+        ]
+        self.ctx.run_fsm("Watch install operation {}".format(self.op_id), "", events, transitions,
+                         timeout=self.quiet_timeout, max_transitions=100)
@@ -0,0 +1,319 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+import weakref
+
+try:
+    intern
+except NameError:
+    from sys import intern
+
+"""
+The package identity library shared by the platforms.
+
+The package name is parsed once according to the platform specific Grammar into the slots
+of the SoftwarePackage object. The parsed string fields are interned and the objects are
+cached by name (flyweight), so the same package name seen on many devices is held once.
+
+XR:     disk0:asr9k-px-5.3.3.CSCuz33376-1.0.0
+NCS6K:  ncs6k-5.2.5.47I.CSCuy47880-0.0.4.i
+IOS-XE: bootflash:asr900rsp1-universalk9_npe.03.16.00.S.155-3.S-ext.bin
+NX-OS:  nxos.CSCvb12345-n9k_ALL-1.0.0-7.0.3.I5.1.lib32_n9000
+"""
+
+
+class Grammar(object):
+    """
+    The platform specific package naming rules.
+
+    :param name: the grammar name
+    :param platforms: list of platform prefixes
+    :param platform_formats: formats of the platform prefix in the package name, i.e. "{}-" for "asr9k-"
+    :param package_types: list of package types
+    :param package_type_format: format of the package type in the package name, i.e. "-{}-" for "-mini-"
+    :param architectures: list of (marker, architecture) tuples, i.e. ("-px", "px")
+    :param version_re: compiled regex with VERSION group
+    :param smu_re: compiled regex with SMU group or None
+    :param sp_re: compiled regex with SP group or None
+    :param subversion_re: compiled regex with SUBVERSION group or None
+    :param required: package attributes which must be set for the valid package
+    :param any_of: package attributes from which at least one must be set for the valid package
+    """
+    def __init__(self, name, platforms, platform_formats, package_types, package_type_format, architectures,
+                 version_re, smu_re=None, sp_re=None, subversion_re=None,
+                 required=("platform", "version"), any_of=()):
+        self.name = name
+        self.platforms = [(platform, [fmt.format(platform) for fmt in platform_formats]) for platform in platforms]
+        self.package_types = [(package_type, package_type_format.format(package_type))
+                              for package_type in package_types]
+        self.architectures = architectures
+        self.version_re = version_re
+        self.smu_re = smu_re
+        self.sp_re = sp_re
+        self.subversion_re = subversion_re
+        self.required = required
+        self.any_of = any_of
+
+        # the token delimited by whitespaces or quotes containing the platform prefix and the version
+        markers = [re.escape(marker) for platform, platform_markers in self.platforms for marker in platform_markers]
+        self.token_re = re.compile(r"""(?<![^\s"'])(?=[^\s"']*(?:{}))(?=[^\s"']*{})[^\s"']+""".format(
+            "|".join(markers), version_re.pattern))
+
+    def parse(self, package_name):
+        """Returns the tuple (platform, package_type, architecture, version, smu, sp, subversion)"""
+        platform = None
+        for name, markers in self.platforms:
+            for marker in markers:
+                if marker in package_name:
+                    platform = name
+                    break
+            if platform:
+                break
+
+        package_type = None
+        for name, marker in self.package_types:
+            if marker in package_name:
+                package_type = name
+                break
+
+        architecture = None
+        for marker, name in self.architectures:
+            if marker in package_name:
+                architecture = name
+                break
+
+        version = _search(self.version_re, "VERSION", package_name)
+        smu = _search(self.smu_re, "SMU", package_name)
+        sp = _search(self.sp_re, "SP", package_name)
+        subversion = _search(self.subversion_re, "SUBVERSION", package_name) if sp or smu else None
+
+        return platform, package_type, architecture, version, smu, sp, subversion
+
+
+def _search(pattern, group, package_name):
+    if pattern is None:
+        return None
+    result = pattern.search(package_name)
+    if result and result.group(group):
+        return _intern(result.group(group))
+    return None
+
+
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
+
+XR = Grammar(
+    "XR",
+    platforms=["asr9k", "hfr"],
+    platform_formats=["{}-"],
+    package_types="mini mcast mgbl mpls k9sec diags fpd doc bng li optic services services-infa "
+                  "infra-test video asr9000v asr901 asr903".split(),
+    package_type_format="-{}-",
+    architectures=[("-px", "px")],
+    version_re=re.compile(r"(?P<VERSION>\d+\.\d+\.\d+(\.\d+\w+)?)"),
+    smu_re=re.compile(r"(?P<SMU>CSC[a-z]{2}\d{5})"),
+    sp_re=re.compile(r"(?P<SP>(sp|fp)\d{0,2})"),
+    subversion_re=re.compile(r"(CSC|sp|fp).*(?P<SUBVERSION>\d+\.\d+\.\d+?)"),
+    required=("platform", "version", "architecture"),
+    any_of=("package_type", "smu", "sp"),
+)
+
+NCS6K = Grammar(
+    "NCS6K",
+    platforms=["ncs6k"],
+    platform_formats=["{}-"],
+    package_types="sysadmin full mini mcast mgbl mpls k9sec doc li".split(),
+    package_type_format="-{}-",
+    architectures=[],
+    version_re=re.compile(r"(?P<VERSION>\d+\.\d+\.\d+(\.\d+\w+)?)"),  # 5.2.4 or 5.2.4.47I
+    smu_re=re.compile(r"(?P<SMU>CSC[a-z]{2}\d{5})"),
+    subversion_re=re.compile(r"CSC.*(?P<SUBVERSION>\d+\.\d+\.\d+?)"),  # 0.0.4
+    any_of=("package_type", "smu"),
+)
+
+XE = Grammar(
+    "XE",
+    platforms=["asr900", "asr901", "asr903", "asr920"],
+    platform_formats=["{}"],
+    package_types="universalk9 universalk9_npe ipbase ipbasek9 adventerprisek9 advipservicesk9 "
+                  "rpbase rpboot rpaccess espbase sipbase sipspa".split(),
+    package_type_format="-{}.",
+    architectures=[],
+    version_re=re.compile(r"(?P<VERSION>\d+\.\d+\.\d+(\.S\w?(?=\.\d))?)"),  # 03.16.00.S or 16.06.01
+    smu_re=re.compile(r"(?P<SMU>CSC[a-z]{2}\d{5})"),
+)
+
+NXOS = Grammar(
+    "NX-OS",
+    platforms=["nxos", "n9000", "n3000"],
+    platform_formats=["{}.", "{}-"],
+    package_types="dk9".split(),
+    package_type_format="-{}.",
+    architectures=[],
+    # 7.0.3.I5.1 or 9.2.1 followed by the extension
+    version_re=re.compile(r"(?P<VERSION>\d+\.\d+\.\d+\.[A-Z]\d+\.\d+|\d+\.\d+\.\d+(?=\.bin|\.lib32|$))"),
+    smu_re=re.compile(r"(?P<SMU>CSC[a-z]{2}\d{5})"),
+    subversion_re=re.compile(r"CSC[a-z]{2}\d{5}-[^-]+-(?P<SUBVERSION>\d+\.\d+\.\d+)"),
+)
+
+_flyweights = weakref.WeakValueDictionary()
+
+
+class SoftwarePackage(object):
+    """
+    The software package identity. The subclass defines the platform specific grammar.
+
+    The package objects are shared between all the users of the same package name, thus
+    must be treated as immutable. The key is the package identity used for hashing and comparison.
+    """
+    __slots__ = ('package_name', 'platform', 'package_type', 'architecture', 'version', 'smu', 'sp',
+                 'subversion', 'key', '_hash', '__weakref__')
+
+    grammar = None
+
+    def __new__(cls, package_name):
+        cache_key = (cls, package_name)
+        package = _flyweights.get(cache_key)
+        if package is None:
+            package = object.__new__(cls)
+            package.package_name = _intern(package_name)
+            package.platform, package.package_type, package.architecture, package.version, \
+                package.smu, package.sp, package.subversion = cls.grammar.parse(package_name)
+            package.key = (package.platform, package.package_type, package.architecture,
+                           package.version, package.smu, package.sp)
+            package._hash = hash(package.key)
+            _flyweights[cache_key] = package
+        return package
+
+    def is_valid(self):
+        grammar = self.grammar
+        for attribute in grammar.required:
+            if not getattr(self, attribute):
+                return False
+        if grammar.any_of:
+            return any(getattr(self, attribute) for attribute in grammar.any_of)
+        return True
+
+    def __eq__(self, other):
+        return self.key == other.key and \
+            (self.subversion == other.subversion if self.subversion and other.subversion else True)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
+    @classmethod
+    def from_show_cmd(cls, cmd):
+        software_packages = set()
+        for match in cls.grammar.token_re.finditer(cmd):
+            software_package = cls(match.group(0))
+            if software_package.is_valid():
+                software_packages.add(software_package)
+        return software_packages
+
+    @classmethod
+    def from_package_list(cls, pkg_list):
+        software_packages = set()
+        for pkg in pkg_list:
+            software_package = cls(pkg)
+            if software_package.is_valid():
+                software_packages.add(software_package)
+        return software_packages
+
+    def __repr__(self):
+        return self.package_name
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class XRPackage(SoftwarePackage):
+    __slots__ = ()
+    grammar = XR
+
+
+class NCS6KPackage(SoftwarePackage):
+    __slots__ = ()
+    grammar = NCS6K
+
+
+class XEPackage(SoftwarePackage):
+    __slots__ = ()
+    grammar = XE
+
+
+class NXOSPackage(SoftwarePackage):
+    __slots__ = ()
+    grammar = NXOS
+
+
+class PackageIndex(object):
+    """
+    The index of packages keyed by the package identity. It maps the requested packages
+    to the packages known to the device with a dictionary lookup.
+
+    The matched names are recorded in the external_to_internal and internal_to_external tables, i.e.
+    asr9k-px-5.3.3.CSCuy81837.pie <-> disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0
+    asr9k-mcast-px.pie-5.3.3 <-> disk0:asr9k-mcast-px-5.3.3
+    """
+    def __init__(self, packages=()):
+        self._index = {}
+        self.external_to_internal = {}
+        self.internal_to_external = {}
+        for package in packages:
+            self.add(package)
+
+    def add(self, package):
+        self._index.setdefault(package.key, []).append(package)
+
+    def find(self, package):
+        """Returns the indexed package matching the package or None."""
+        for candidate in self._index.get(package.key, ()):
+            if candidate == package:
+                self.external_to_internal[package.package_name] = candidate.package_name
+                self.internal_to_external[candidate.package_name] = package.package_name
+                return candidate
+        return None
+
+    def match(self, packages):
+        """Returns the set of indexed packages matching any of the packages."""
+        matched = set()
+        for package in packages:
+            candidate = self.find(package)
+            if candidate is not None:
+                matched.add(candidate)
+        return matched
+
+    def __contains__(self, package):
+        return self.find(package) is not None
+
+    def __len__(self):
+        return sum(len(packages) for packages in self._index.values())
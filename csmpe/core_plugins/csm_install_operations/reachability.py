@@ -0,0 +1,206 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import re
+import socket
+import time
+from urlparse import urlparse
+
+from csmpe.core_plugins.csm_install_operations.waiter import Waiter
+
+"""
+The reachability probe of the device management endpoint.
+
+Instead of sleeping for the fixed time after the reload the target endpoint is probed with the
+TCP connect and the protocol banner read. The telnet server must present the login prompt, so
+the device accepting the TCP connections before the login is possible is not reconnected too
+early; the SSH server sends its identification string only when it is ready. The session is
+reconnected as soon as the device passes the probe. The probe is only possible if the target is
+directly reachable, i.e. there is no jumphost in the connection chain and the target is not the
+console port, otherwise the fixed wait and the plain reconnect are used. Probing through the
+jumphost chain is not implemented, condoor reconnects the whole chain.
+"""
+
+DEFAULT_PORTS = {
+    "telnet": 23,
+    "ssh": 22,
+}
+
+LOGIN_PROMPT = re.compile(r"[Uu]sername:|[Ll]ogin:|[Pp]assword:")
+MAX_BANNER_SIZE = 4096
+
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+
+
+def target_addresses(host_urls):
+    """
+    Returns the list of (protocol, host, port) tuples of the directly reachable targets
+    or None if any of the targets is reachable only via the jumphost.
+    """
+    if not host_urls:
+        return None
+    # condoor accepts a single chain (list of urls) or a list of alternative chains
+    chains = host_urls if isinstance(host_urls[0], (list, tuple)) else [host_urls]
+    addresses = []
+    for chain in chains:
+        if len(chain) != 1:
+            return None
+        url = urlparse(chain[0])
+        if url.scheme not in DEFAULT_PORTS or not url.hostname:
+            return None
+        addresses.append((url.scheme, url.hostname, url.port or DEFAULT_PORTS[url.scheme]))
+    return addresses
+
+
+def probe(protocol, host, port, timeout=5):
+    """
+    Returns True if the endpoint accepts the connection and sends the protocol banner.
+    The SSH server must send the SSH identification string, the telnet server the login prompt.
+    """
+    try:
+        sock = socket.create_connection((host, port), timeout)
+    except (socket.error, socket.timeout):
+        return False
+    try:
+        if protocol == "ssh":
+            return sock.recv(64).startswith("SSH-")
+        return _telnet_login_prompt(sock, timeout)
+    except (socket.error, socket.timeout):
+        return False
+    finally:
+        sock.close()
+
+
+def _telnet_login_prompt(sock, timeout):
+    """Returns True if the telnet server sends the login prompt within timeout seconds."""
+    deadline = time.time() + timeout
+    text = ""
+    while len(text) < MAX_BANNER_SIZE:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        sock.settimeout(remaining)
+        data = sock.recv(1024)
+        if not data:
+            return False
+        data, replies = _refuse_options(data)
+        text += data
+        if LOGIN_PROMPT.search(text):
+            return True
+        if replies:
+            sock.sendall(replies)
+    return False
+
+
+def _refuse_options(data):
+    """
+    Refuses the telnet options the server asks for, so the server does not wait for the negotiation
+    before sending the login prompt. Returns the data without the telnet commands and the replies.
+    """
+    text = []
+    replies = []
+    index = 0
+    while index < len(data):
+        byte = ord(data[index])
+        if byte != IAC or index + 1 == len(data):
+            text.append(data[index])
+            index += 1
+            continue
+        command = ord(data[index + 1])
+        if command in (DO, DONT, WILL, WONT):
+            if index + 2 < len(data):
+                option = data[index + 2]
+                if command == DO:
+                    replies.append(chr(IAC) + chr(WONT) + option)
+                elif command == WILL:
+                    replies.append(chr(IAC) + chr(DONT) + option)
+            index += 3
+        elif command == SB:
+            end = data.find(chr(IAC) + chr(SE), index)
+            index = len(data) if end < 0 else end + 2
+        else:
+            index += 2
+    return "".join(text), "".join(replies)
+
+
+def any_reachable(addresses, timeout=5):
+    for protocol, host, port in addresses:
+        if probe(protocol, host, port, timeout):
+            return True
+    return False
+
+
+def wait_for_reachable(ctx, addresses, timeout, min_interval=5, max_interval=15):
+    """Returns True if any of the addresses became reachable within timeout seconds."""
+    return Waiter(ctx, "boot", timeout, min_interval=min_interval,
+                  max_interval=max_interval).wait(lambda: any_reachable(addresses))
+
+
+def wait_for_unreachable(ctx, addresses, timeout, min_interval=2, max_interval=10):
+    """Returns True if all the addresses became unreachable within timeout seconds."""
+    return Waiter(ctx, "shutdown", timeout, min_interval=min_interval,
+                  max_interval=max_interval).wait(lambda: not any_reachable(addresses))
+
+
+def _is_console(ctx):
+    try:
+        return bool(ctx._connection.is_console)
+    except AttributeError:
+        return False
+
+
+def reconnect_after_reload(ctx, max_timeout=1500, down_timeout=60):
+    """
+    Disconnects, waits for the device to go down and come back, then reconnects.
+
+    The device going down is awaited at most down_timeout seconds, the former fixed wait, as some
+    targets never stop answering, i.e. the dual RSP virtual management address.
+    If the device is connected via the console or behind the jumphost it falls back to the fixed
+    wait and the plain reconnect, as the terminal server port or the jumphost always answers.
+    """
+    console = _is_console(ctx)
+    ctx.disconnect()
+    try:
+        addresses = target_addresses(ctx.host_urls)
+    except AttributeError:
+        addresses = None
+
+    if addresses is None or console:
+        time.sleep(down_timeout)
+        ctx.reconnect(max_timeout=max_timeout)
+        return
+
+    start = time.time()
+    ctx.info("Waiting for the device to reload")
+    if not wait_for_unreachable(ctx, addresses, down_timeout):
+        ctx.info("The device still answers after {} seconds".format(down_timeout))
+
+    remaining = max(max_timeout - (time.time() - start), 60)
+    if wait_for_reachable(ctx, addresses, remaining):
+        ctx.info("The device accepts the connections")
+    remaining = max(max_timeout - (time.time() - start), 60)
+    ctx.reconnect(max_timeout=remaining)
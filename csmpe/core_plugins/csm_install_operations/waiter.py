@@ -0,0 +1,116 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import time
+
+"""
+The adaptive waiter for the reload and readiness conditions.
+
+The condition is checked early and then with the growing interval. The duration of the successful
+waits is learned per platform family and operation, so the next wait does not poll before the
+operation typically completes and polls quickly around the time it typically completes.
+"""
+
+# (family, operation) -> typical duration in seconds
+_learned_durations = {}
+
+# weight of the last duration in the learned duration
+LEARNING_RATE = 0.3
+
+
+class Waiter(object):
+    """
+    Waits until the predicate returns True or the deadline passes.
+
+    :param ctx: the plugin context
+    :param operation: the operation name, i.e. "reload"
+    :param timeout: the maximum number of seconds to wait
+    :param min_interval: the initial and the minimum polling interval in seconds
+    :param max_interval: the maximum polling interval in seconds
+    :param backoff: the polling interval multiplier
+    """
+    def __init__(self, ctx, operation, timeout, min_interval=5, max_interval=30, backoff=1.5,
+                 clock=time.time, sleep=time.sleep):
+        self.ctx = ctx
+        self.operation = operation
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.elapsed = 0
+
+    @property
+    def key(self):
+        try:
+            family = self.ctx.family
+        except AttributeError:
+            family = None
+        return family, self.operation
+
+    @property
+    def expected(self):
+        """The learned typical duration of the operation or None."""
+        return _learned_durations.get(self.key)
+
+    def wait(self, predicate):
+        """Returns True if predicate returned True before the deadline, otherwise False."""
+        start = self.clock()
+        expected = self.expected
+        interval = self.min_interval
+        while True:
+            self.elapsed = self.clock() - start
+            if predicate():
+                self.elapsed = self.clock() - start
+                self._learn(self.elapsed)
+                self.ctx.info("{} finished after {:.0f} seconds".format(self.operation.capitalize(), self.elapsed))
+                return True
+
+            remaining = self.timeout - (self.clock() - start)
+            if remaining <= 0:
+                self.ctx.info("{} not finished within {} seconds".format(self.operation.capitalize(), self.timeout))
+                return False
+
+            self.sleep(min(self._next_delay(self.clock() - start, expected, interval), remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+    def _next_delay(self, elapsed, expected, interval):
+        if expected:
+            if elapsed < expected * 0.9:
+                # skip the polls before the operation typically finishes
+                return max(self.min_interval, min(expected * 0.9 - elapsed, self.max_interval))
+            if elapsed < expected * 1.5:
+                return self.min_interval
+        return interval
+
+    def _learn(self, duration):
+        expected = _learned_durations.get(self.key)
+        if expected is None:
+            _learned_durations[self.key] = duration
+        else:
+            _learned_durations[self.key] = (1 - LEARNING_RATE) * expected + LEARNING_RATE * duration
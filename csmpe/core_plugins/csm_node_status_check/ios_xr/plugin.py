@@ -29,6 +29,7 @@
 import re
 
 from csmpe.plugins import CSMPlugin
+from csmpe.inventory import as_dict
 
 
 class Plugin(CSMPlugin):
@@ -38,30 +39,6 @@ class Plugin(CSMPlugin):
     phases = {'Pre-Upgrade', 'Post-Upgrade'}
     os = {'XR'}
 
-    def _parse_show_platform(self, output):
-        inventory = {}
-        lines = output.split('\n')
-        for line in lines:
-            line = line.strip()
-            if len(line) > 0 and line[0].isdigit():
-                states = re.split('\s\s+', line)
-                if not re.search('CPU\d+$', states[0]):
-                    continue
-                if self.ctx.family == 'ASR9K':
-                    node, node_type, state, config_state = states
-                elif self.ctx.family == 'CRS':
-                    node, node_type, plim, state, config_state = states
-                else:
-                    self.ctx.warning("Unsupported platform {}".format(self.ctx.family))
-                    return None
-                entry = {
-                    'type': node_type,
-                    'state': state,
-                    'config_state': config_state
-                }
-                inventory[node] = entry
-        return inventory
-
     def run(self):
         """
         Platform: ASR9K
@@ -90,8 +67,8 @@ class Plugin(CSMPlugin):
         0/8/CPU0      MSC-140G          N/A                UNPOWERED       NPWR,NSHUT,MON
         0/14/CPU0     MSC-X             4-100GbE           IOS XR RUN      PWR,NSHUT,MON
         """
-        output = self.ctx.send("admin show platform")
-        inventory = self._parse_show_platform(output)
+        inventory = dict((name, node) for name, node in self.ctx.inventory.nodes("admin show platform").items()
+                         if re.search(r"CPU\d+$", name))
         valid_state = [
             'IOS XR RUN',
             'PRESENT',
@@ -105,11 +82,11 @@ class Plugin(CSMPlugin):
         ]
         for key, value in inventory.items():
             if 'CPU' in key:
-                if value['state'] not in valid_state:
+                if value.state not in valid_state:
                     self.ctx.warning("{}={}: {}".format(key, value, "Not in valid state for upgrade"))
                     break
         else:
-            self.ctx.save_data("inventory", inventory)
+            self.ctx.save_data("inventory", as_dict(inventory))
             self.ctx.info("All nodes in valid state for upgrade")
             return True
 
@@ -26,9 +26,8 @@
 # =============================================================================
 
 
-import re
-
 from csmpe.plugins import CSMPlugin
+from csmpe.inventory import as_dict
 
 
 class Plugin(CSMPlugin):
@@ -38,25 +37,6 @@ class Plugin(CSMPlugin):
     phases = {'Pre-Upgrade', 'Post-Upgrade'}
     os = {'eXR'}
 
-    def _parse_show_platform(self, output):
-        inventory = {}
-        lines = output.split('\n')
-        for line in lines:
-            line = line.strip()
-            if len(line) > 0 and line[0].isdigit():
-                states = re.split('\s\s+', line)
-                if not re.search('CPU\d+$', states[0]):
-                    continue
-                node, node_type, state, admin_state, config_state = states
-                entry = {
-                    'type': node_type,
-                    'state': state,
-                    'admin_state': admin_state,
-                    'config_state': config_state
-                }
-                inventory[node] = entry
-        return inventory
-
     def run(self):
         """
         Platform: NCS6K
@@ -90,12 +70,7 @@ class Plugin(CSMPlugin):
         0/RSP1    A9K-RSP880-SE           POWERED_OFF   SW_INACTIVE   NSHUT
         """
 
-        # FIXME: Break the command to 3 pieces as condoor currently cannot handle it.
-        self.ctx.send("admin")
-        output = self.ctx.send("show platform")
-        self.ctx.send("exit")
-
-        inventory = self._parse_show_platform(output)
+        inventory = self.ctx.inventory.nodes("show platform", admin=True)
         valid_state = [
             'IOS XR RUN',
             'PRESENT',
@@ -110,11 +85,11 @@ class Plugin(CSMPlugin):
         ]
         for key, value in inventory.items():
             if 'CPU' in key:
-                if value['state'] not in valid_state:
+                if value.state not in valid_state:
                     self.ctx.warning("{}={}: {}".format(key, value, "Not in valid state for upgrade"))
                     break
         else:
-            self.ctx.save_data("inventory", inventory)
+            self.ctx.save_data("inventory", as_dict(inventory))
             self.ctx.info("All nodes in valid state for upgrade")
             return True
 
@@ -143,30 +143,34 @@ class CSMPluginManager(object):
             self._ctx.error(e.message)
             return False
 
-        results = []
-        current_phase = self._ctx.phase
-        if self._ctx.phase in auto_pre_phases:
-            phase = "Pre-{}".format(self._ctx.phase)
-            self.set_phase_filter(phase)
+        try:
+            results = []
+            current_phase = self._ctx.phase
+            if self._ctx.phase in auto_pre_phases:
+                phase = "Pre-{}".format(self._ctx.phase)
+                self.set_phase_filter(phase)
+                self._ctx.info("Phase: {}".format(self._phase))
+                try:
+                    results = self._manager.map_method(self._dispatch, func)
+                except NoMatches:
+                    self._ctx.warning("No {} plugins found".format(phase))
+                self._ctx.current_plugin = None
+
+            self.set_phase_filter(current_phase)
             self._ctx.info("Phase: {}".format(self._phase))
             try:
-                results = self._manager.map_method(self._dispatch, func)
+                results += self._manager.map_method(self._dispatch, func)
             except NoMatches:
-                self._ctx.warning("No {} plugins found".format(phase))
-            self._ctx.current_plugin = None
+                self._ctx.post_status("No plugins found for phase {}".format(self._phase))
+                self._ctx.error("No plugins found for phase {}".format(self._phase))
 
-        self.set_phase_filter(current_phase)
-        self._ctx.info("Phase: {}".format(self._phase))
-        try:
-            results += self._manager.map_method(self._dispatch, func)
-        except NoMatches:
-            self._ctx.post_status("No plugins found for phase {}".format(self._phase))
-            self._ctx.error("No plugins found for phase {}".format(self._phase))
-
-        self._ctx.current_plugin = None
-        self._ctx.success = True
-        self._ctx.info("CSM Plugin Manager finished")
-        return results
+            self._ctx.current_plugin = None
+            self._ctx.success = True
+            self._ctx.info("CSM Plugin Manager finished")
+            return results
+        finally:
+            self._ctx.run_deferred()
+            self._ctx.close_sessions()
 
     def set_platform_filter(self, platform):
         self._platform = platform
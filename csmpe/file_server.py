@@ -0,0 +1,528 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+
+import BaseHTTPServer
+import SocketServer
+import os
+import posixpath
+import re
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import urllib
+from time import time
+
+from csmpe.core_plugins.csm_install_operations.reachability import target_addresses
+from csmpe.core_plugins.csm_install_operations.ios_xr.simple_server_helper import TransferStats
+
+"""
+The embedded file servers for the device transfers.
+
+Paging a large configuration through the terminal is slow and loads the device CLI. Instead the
+short-lived TFTP server is started on the CSM host and the device copies the file to it, i.e.
+"copy running-config tftp://<csm host>/<file>". Only the expected file names are accepted and the
+server is stopped as soon as the transfer completes. The TFTP write request (RFC 1350) with the
+blksize option (RFC 2348) is supported.
+
+The push is used only if requested with the "device_push" option and the device is connected
+directly (no jumphost), so the CSM host address facing the device is known. The device copy does
+not accept the port in the TFTP URL, so the server must bind the well known TFTP port. The callers
+fall back to the screen scraping if the port can not be bound or the push fails.
+
+The ImageServer serves the repository directory over HTTP to the devices pulling the images, i.e.
+"install add source http://<csm host>:<port>/ ...". Every transfer runs in its own thread, up to
+max_connections concurrent transfers, and the file is sent with sendfile if available. The
+TransferStats of every transfer are recorded.
+"""
+
+TFTP_PORT = 69
+
+RRQ, WRQ, DATA, ACK, ERROR, OACK = range(1, 7)
+
+ERROR_NOT_DEFINED = 0
+ERROR_ACCESS_VIOLATION = 2
+ERROR_ILLEGAL_OPERATION = 4
+ERROR_UNKNOWN_TID = 5
+
+DEFAULT_BLOCK_SIZE = 512
+MAX_BLOCK_SIZE = 65464
+
+DEFAULT_MAX_CONNECTIONS = 64
+HTTP_CHUNK_SIZE = 1024 * 1024
+
+
+class TFTPReceiver(object):
+    """
+    The TFTP server accepting the write requests of the expected files into the directory.
+
+    :param directory: the directory where the received files are stored
+    :param host: the local address to listen on
+    :param port: the UDP port, the well known TFTP port by default as the device copy does not accept
+        the port in the TFTP URL
+    :param timeout: the time in seconds to wait for the packet before the retransmission
+    :param retries: the number of retransmissions before the transfer is aborted
+    :param peers: the addresses the write requests are accepted from, any address if None
+    """
+    def __init__(self, directory, host="0.0.0.0", port=None, timeout=5, retries=5, peers=None):
+        self.directory = directory
+        self.host = host
+        self.peers = peers
+        self.port = TFTP_PORT if port is None else port
+        self.timeout = timeout
+        self.retries = retries
+        self._socket = None
+        self._thread = None
+        self._running = False
+        self._expected = {}
+        self._receiving = set()
+        self._lock = threading.Lock()
+
+    @property
+    def address(self):
+        return self._socket.getsockname()
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._socket.bind((self.host, self.port))
+        except socket.error:
+            self._socket.close()
+            self._socket = None
+            raise
+        self._socket.settimeout(0.5)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def expect(self, filename):
+        """Accepts the write request of the filename and returns the path where the file is stored."""
+        with self._lock:
+            self._expected[filename] = threading.Event()
+        return os.path.join(self.directory, filename)
+
+    def wait_for(self, filename, timeout=None):
+        """Returns the path of the received file or None if the file was not received within the timeout."""
+        event = self._expected.get(filename)
+        if event is None or not event.wait(timeout):
+            return None
+        return os.path.join(self.directory, filename)
+
+    def url(self, host, filename):
+        """
+        Returns the TFTP URL of the file for the device reaching this host on the host address.
+
+        The IOS XR copy command rejects the port in the TFTP URL, so the receiver must listen on the
+        well known TFTP port, otherwise ValueError is raised.
+        """
+        port = self.address[1]
+        if port != TFTP_PORT:
+            raise ValueError("The device can not copy to the TFTP port {}, only {} is supported".format(
+                port, TFTP_PORT))
+        return "tftp://{}/{}".format(host, filename)
+
+    def _serve(self):
+        while self._running:
+            try:
+                packet, peer = self._socket.recvfrom(MAX_BLOCK_SIZE + 4)
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+            if len(packet) < 2:
+                continue
+            opcode = struct.unpack("!H", packet[:2])[0]
+            if opcode != WRQ:
+                self._socket.sendto(_error(ERROR_ILLEGAL_OPERATION, "Only the write requests are accepted"), peer)
+                continue
+            if self.peers is not None and peer[0] not in self.peers:
+                self._socket.sendto(_error(ERROR_ACCESS_VIOLATION, "Unexpected peer {}".format(peer[0])), peer)
+                continue
+            fields = packet[2:].split(b"\0")
+            filename = fields[0].decode("ascii", "replace").lstrip("/")
+            options = dict((fields[i].lower(), fields[i + 1]) for i in range(2, len(fields) - 1, 2))
+            with self._lock:
+                event = self._expected.get(filename)
+                if filename in self._receiving:
+                    # the retransmitted request, the transfer replies on its own socket
+                    continue
+                if event is None or event.is_set() or os.path.basename(filename) != filename:
+                    self._socket.sendto(_error(ERROR_ACCESS_VIOLATION, "Unexpected file {}".format(filename)), peer)
+                    continue
+                self._receiving.add(filename)
+            transfer = threading.Thread(target=self._receive, args=(filename, options, peer, event))
+            transfer.daemon = True
+            transfer.start()
+
+    def _receive(self, filename, options, peer, event):
+        """Receives the file from the peer on the new transfer socket (TID)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.host, 0))
+        sock.settimeout(self.timeout)
+
+        block_size = DEFAULT_BLOCK_SIZE
+        if b"blksize" in options:
+            try:
+                block_size = max(8, min(MAX_BLOCK_SIZE, int(options[b"blksize"])))
+                reply = struct.pack("!H", OACK) + b"blksize\0" + str(block_size).encode("ascii") + b"\0"
+            except ValueError:
+                reply = struct.pack("!HH", ACK, 0)
+        else:
+            reply = struct.pack("!HH", ACK, 0)
+
+        path = os.path.join(self.directory, filename)
+        partial_path = path + ".part"
+        expected_block = 1
+        retries = 0
+        completed = False
+        try:
+            with open(partial_path, "wb") as f:
+                sock.sendto(reply, peer)
+                while self._running:
+                    try:
+                        packet, address = sock.recvfrom(block_size + 4)
+                    except socket.timeout:
+                        retries += 1
+                        if retries > self.retries:
+                            break
+                        sock.sendto(reply, peer)
+                        continue
+                    if address != peer:
+                        sock.sendto(_error(ERROR_UNKNOWN_TID, "Unknown transfer ID"), address)
+                        continue
+                    if len(packet) < 4:
+                        sock.sendto(_error(ERROR_ILLEGAL_OPERATION, "Malformed packet"), peer)
+                        break
+                    opcode, block = struct.unpack("!HH", packet[:4])
+                    if opcode == ERROR:
+                        break
+                    if opcode != DATA:
+                        sock.sendto(_error(ERROR_ILLEGAL_OPERATION, "Expected DATA"), peer)
+                        break
+                    if block == expected_block:
+                        data = packet[4:]
+                        f.write(data)
+                        reply = struct.pack("!HH", ACK, block)
+                        sock.sendto(reply, peer)
+                        retries = 0
+                        expected_block = (expected_block + 1) % 65536
+                        if len(data) < block_size:
+                            completed = True
+                            break
+                    else:
+                        # the duplicate of the acknowledged block, the ACK was lost
+                        sock.sendto(reply, peer)
+            if completed:
+                os.rename(partial_path, path)
+                event.set()
+        except (IOError, OSError, socket.error):
+            pass
+        finally:
+            sock.close()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            with self._lock:
+                self._receiving.discard(filename)
+
+
+def _error(code, message):
+    return struct.pack("!HH", ERROR, code) + message.encode("ascii", "replace") + b"\0"
+
+
+class _ImageRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves the files from the server directory. Only GET and HEAD of the regular files are supported."""
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body):
+        server = self.server
+        if not server.slots.acquire(False):
+            self.send_error(503, "Too many concurrent transfers")
+            return
+        try:
+            path = server.translate_path(self.path)
+            if path is None or not os.path.isfile(path):
+                self.send_error(404, "File not found")
+                return
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                if body:
+                    stats = TransferStats(os.path.basename(path))
+                    server.record(stats)
+                    self._send_file(f, size, stats)
+        finally:
+            server.slots.release()
+
+    def _send_file(self, f, size, stats):
+        self.wfile.flush()
+        sendfile = getattr(os, "sendfile", None)
+        try:
+            if sendfile is not None:
+                stats.method = "sendfile"
+                offset = 0
+                while offset < size:
+                    sent = sendfile(self.connection.fileno(), f.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    stats.update(sent)
+            else:
+                stats.method = "copy"
+                for chunk in iter(lambda: f.read(HTTP_CHUNK_SIZE), b""):
+                    self.wfile.write(chunk)
+                    stats.update(len(chunk))
+        except (IOError, OSError, socket.error) as e:
+            stats.error = e
+            self.close_connection = 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ImageServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    The threaded HTTP server of the repository directory.
+
+    :param directory: the served directory
+    :param host: the local address to listen on
+    :param port: the TCP port, any free port by default
+    :param max_connections: the maximum number of the concurrent transfers, the other requests get 503
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, directory, host="0.0.0.0", port=0, max_connections=DEFAULT_MAX_CONNECTIONS):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), _ImageRequestHandler)
+        self.directory = os.path.abspath(directory)
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.stats = []
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.2})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def url(self, host):
+        """Returns the repository URL for the device reaching this host on the host address."""
+        return "http://{}:{}".format(host, self.address[1])
+
+    def translate_path(self, url_path):
+        """Returns the local path of the URL path or None if it points outside of the directory."""
+        path = posixpath.normpath(urllib.unquote(url_path.split("?", 1)[0].split("#", 1)[0]))
+        parts = [part for part in path.split("/") if part and part not in (os.curdir, os.pardir)]
+        local_path = os.path.join(self.directory, *parts)
+        # the symbolic links must not lead outside of the directory
+        root = os.path.realpath(self.directory)
+        real_path = os.path.realpath(local_path)
+        if real_path != root and not real_path.startswith(root + os.sep):
+            return None
+        return local_path
+
+    def record(self, stats):
+        with self._stats_lock:
+            self.stats.append(stats)
+
+
+def serve_repository(ctx, directory, max_connections=DEFAULT_MAX_CONNECTIONS):
+    """
+    Starts the ImageServer of the directory and points the server_repository_url of the context to it.
+    The server_repository_directory of the context is set to the directory.
+
+    :return: the started ImageServer or None if the device is connected via the jumphost
+    """
+    host = local_address(ctx.host_urls)
+    if host is None:
+        return None
+    server = ImageServer(directory, host=host, max_connections=max_connections).start()
+    ctx.server_repository_url = server.url(host)
+    ctx.server_repository_directory = directory
+    return server
+
+
+def local_address(host_urls):
+    """
+    Returns the address of this host facing the directly connected device or None if the device
+    is connected via the jumphost.
+    """
+    addresses = target_addresses(host_urls)
+    if not addresses:
+        return None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # no packet is sent, the routing table selects the source address
+        sock.connect((addresses[0][1], TFTP_PORT))
+        return sock.getsockname()[0]
+    except socket.error:
+        return None
+    finally:
+        sock.close()
+
+
+def device_addresses(host_urls):
+    """Returns the addresses of the directly connected device, the host names resolved."""
+    addresses = set()
+    for _, host, _ in target_addresses(host_urls) or []:
+        try:
+            addresses.add(socket.gethostbyname(host))
+        except socket.error:
+            pass
+    return addresses
+
+
+def device_push_enabled(ctx):
+    try:
+        return bool(ctx.device_push)
+    except AttributeError:
+        return False
+
+
+def receive_from_device(ctx, source, filename, command="copy", timeout=600):
+    """
+    Has the device copy the source file to the embedded TFTP server and returns the file content
+    or None if the push is not enabled or failed.
+
+    :param ctx: the plugin context
+    :param source: the source on the device, i.e. "running-config"
+    :param filename: the name of the file on the server
+    :param command: the copy command, i.e. "admin copy" for the admin configuration
+    :param timeout: the timeout of the transfer in seconds
+    :return: the string content of the file or None
+    """
+    if not device_push_enabled(ctx):
+        return None
+    try:
+        host = local_address(ctx.host_urls)
+    except AttributeError:
+        host = None
+    if host is None:
+        ctx.info("The device push is not possible via the jumphost, retrieving {} from the terminal".format(source))
+        return None
+
+    directory = tempfile.mkdtemp()
+    try:
+        receiver = TFTPReceiver(directory, host=host, peers=device_addresses(ctx.host_urls))
+        try:
+            receiver.start()
+        except socket.error as e:
+            ctx.warning("Unable to start the embedded TFTP server on port {}: {}, retrieving {} from the "
+                        "terminal".format(receiver.port, e, source))
+            return None
+        try:
+            receiver.expect(filename)
+            url = receiver.url(host, filename)
+            ctx.info("Device pushing {} to {}".format(source, url))
+            started = time()
+            if _device_copy(ctx, "{} {} {}".format(command, source, url), timeout) and \
+                    receiver.wait_for(filename, max(1, timeout - (time() - started))):
+                with open(os.path.join(directory, filename)) as f:
+                    content = f.read()
+                ctx.info("Received {} ({} bytes) in {:.1f} seconds".format(source, len(content), time() - started))
+                return content
+        finally:
+            receiver.stop()
+        ctx.warning("The device failed to push {}, retrieving it from the terminal".format(source))
+        return None
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _device_copy(ctx, command, timeout):
+    """Runs the copy command on the device confirming the host and the destination file name."""
+
+    def send_newline(fsm_ctx):
+        fsm_ctx.ctrl.sendline()
+        return True
+
+    def error(fsm_ctx):
+        fsm_ctx.message = "Error copying file."
+        return False
+
+    # IOS XR: "Destination file name (control-c to abort): [/file]?", IOS: "Destination filename [file]?"
+    CONFIRM = re.compile(r"(?:[Hh]ost|[Aa]ddress|[Dd]estination).*\[.*\]\?")
+    ERROR_COPYING = re.compile(r"%Error|% Invalid input|[Ee]rror opening")
+    PROMPT = ctx.prompt
+    TIMEOUT = ctx.TIMEOUT
+
+    events = [PROMPT, CONFIRM, ERROR_COPYING, TIMEOUT]
+    transitions = [
+        (CONFIRM, [0, 1], 1, send_newline, timeout),
+        (PROMPT, [0, 1], -1, None, 0),
+        (ERROR_COPYING, [0, 1], -1, error, 0),
+        (TIMEOUT, [0, 1], -1, error, 0),
+    ]
+    try:
+        return ctx.run_fsm("Copy file from device to embedded server", command, events, transitions, timeout=60)
+    except ctx.CommandTimeoutError:
+        return False
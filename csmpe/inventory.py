@@ -0,0 +1,152 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import re
+from collections import namedtuple, OrderedDict
+
+"""
+The inventory of the device nodes shared by the plugins.
+
+The "show platform" output is fetched and parsed once per the device state epoch. The epoch ends
+when the device is reloaded or the connection is reestablished, so the plugins querying the inventory
+after the reload get the fresh data.
+
+XR:
+Node            Type                      State            Config State
+-----------------------------------------------------------------------------
+0/RSP0/CPU0     A9K-RSP440-SE(Active)     IOS XR RUN       PWR,NSHUT,MON
+
+CRS:
+Node          Type              PLIM               State           Config State
+------------- ----------------- ------------------ --------------- ---------------
+0/0/CPU0      MSC-X             40-10GbE           IOS XR RUN      PWR,NSHUT,MON
+
+eXR admin:
+Location  Card Type               HW State      SW State      Config State
+----------------------------------------------------------------------------
+0/RSP0    A9K-RSP880-SE           OPERATIONAL   OPERATIONAL   NSHUT
+"""
+
+Node = namedtuple("Node", "name type plim state sw_state config_state")
+
+# the column names in the lower case, eXR XR prints "Config state"
+COLUMNS = {
+    "node": "name",
+    "location": "name",
+    "type": "type",
+    "card type": "type",
+    "plim": "plim",
+    "state": "state",
+    "hw state": "state",
+    "sw state": "sw_state",
+    "config state": "config_state",
+}
+
+# the header line only, [ \t] does not run across the preceding blank lines
+HEADER_RE = re.compile(r"^[ \t]*(?:Node|Location)[ \t].*State[ \t]*$", re.MULTILINE | re.IGNORECASE)
+# the multi word column names first
+COLUMN_RE = re.compile(r"Card Type|HW State|SW State|Config State|Node|Location|Type|PLIM|State", re.IGNORECASE)
+
+
+def parse_show_platform(output):
+    """Returns the OrderedDict of the Node tuples keyed by the node name. The columns are found in the header."""
+    nodes = OrderedDict()
+    header = HEADER_RE.search(output)
+    if header is None:
+        return nodes
+
+    columns = [(match.start(), COLUMNS[match.group(0).lower()]) for match in COLUMN_RE.finditer(header.group(0))]
+    bounds = [(start, columns[index + 1][0] if index + 1 < len(columns) else None, name)
+              for index, (start, name) in enumerate(columns)]
+
+    for line in output[header.end():].splitlines():
+        if not line.strip()[:1].isdigit():
+            continue
+        values = dict((name, line[start:end].strip() or None) for start, end, name in bounds)
+        node = Node(*[values.get(field) for field in Node._fields])
+        nodes[node.name] = node
+    return nodes
+
+
+def as_dict(nodes):
+    """Returns the inventory in the format stored in CSM: {node: {"type": , "state": , "config_state": }}"""
+    return dict((name, {"type": node.type, "state": node.state, "config_state": node.config_state})
+                for name, node in nodes.items())
+
+
+class Inventory(object):
+    """
+    The inventory cache of the plugin context.
+
+    :param send: the function sending the command to the device
+    """
+    def __init__(self, send):
+        self._send = send
+        self._outputs = {}
+        self._nodes = {}
+        self.epoch = 0
+
+    def invalidate(self):
+        """Starts the new device state epoch dropping the cached outputs."""
+        self.epoch += 1
+        self._outputs.clear()
+        self._nodes.clear()
+
+    def output(self, cmd="admin show platform", admin=False):
+        """
+        Returns the command output fetched once per epoch.
+
+        :param admin: enter the admin mode to send the command, i.e. "show platform" on eXR
+        """
+        key = (admin, cmd)
+        output = self._outputs.get(key)
+        if output is None:
+            if admin:
+                # condoor can not send the admin command in one piece
+                self._send("admin")
+                try:
+                    output = self._send(cmd)
+                finally:
+                    self._send("exit")
+            else:
+                output = self._send(cmd)
+            self._outputs[key] = output
+        return output
+
+    def nodes(self, cmd="admin show platform", admin=False):
+        """Returns the OrderedDict of the Node tuples keyed by the node name."""
+        key = (admin, cmd)
+        nodes = self._nodes.get(key)
+        if nodes is None:
+            nodes = self._nodes[key] = parse_show_platform(self.output(cmd, admin))
+        return nodes
+
+    def refresh(self, cmd="admin show platform", admin=False):
+        """Fetches the nodes again, i.e. while waiting for the nodes to come up."""
+        key = (admin, cmd)
+        self._outputs.pop(key, None)
+        self._nodes.pop(key, None)
+        return self.nodes(cmd, admin)
@@ -0,0 +1,193 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+import os
+import threading
+from Queue import Queue, Empty
+
+import condoor
+
+"""
+The pool of the additional VTY sessions to the device.
+
+The read-only commands sent with send_parallel run concurrently on the primary connection and
+on the additional sessions opened on demand with the same host urls. The number of the additional
+sessions is limited per device across all the pools in the process, so the device VTY lines are not
+exhausted. If no additional session can be opened the commands are sent one by one on the primary
+connection. The session failing during the command is closed and not reused.
+"""
+
+MAX_SESSIONS = 2  # the default number of the additional sessions per device
+
+_device_slots = {}
+_device_slots_lock = threading.Lock()
+
+
+def device_slots(hostname, max_sessions=MAX_SESSIONS):
+    """Returns the semaphore limiting the number of the additional sessions to the device."""
+    with _device_slots_lock:
+        slots = _device_slots.get(hostname)
+        if slots is None:
+            slots = threading.BoundedSemaphore(max_sessions)
+            _device_slots[hostname] = slots
+        return slots
+
+
+class SessionPool(object):
+    """
+    The pool of the sessions to the device.
+
+    :param primary: the primary connection of the plugin context
+    :param hostname: the device hostname
+    :param urls: the device connection urls
+    :param log_dir: the log directory, every additional session logs to its own subdirectory
+    :param max_sessions: the maximum number of the additional sessions to the device
+    :param factory: the callable returning the new connection, condoor.Connection by default
+    """
+    def __init__(self, primary, hostname, urls, log_dir=None, max_sessions=MAX_SESSIONS, factory=None):
+        self.hostname = hostname
+        self.urls = urls
+        self.log_dir = log_dir
+        self.max_sessions = max_sessions
+        self._factory = factory or condoor.Connection
+        self._slots = device_slots(hostname, max_sessions)
+        self._primary = primary
+        self._idle = Queue()
+        self._idle.put(primary)
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._open_failed = False
+
+    @property
+    def size(self):
+        """The number of the additional sessions opened."""
+        return len(self._sessions)
+
+    def _open(self):
+        """Returns the new connected session or None if the session can not be opened."""
+        with self._lock:
+            if self._open_failed or len(self._sessions) >= self.max_sessions:
+                return None
+            if not self._slots.acquire(False):
+                return None
+            number = len(self._sessions) + 1
+            self._sessions.append(None)  # reserve the place while connecting
+
+        log_dir = None
+        if self.log_dir:
+            log_dir = os.path.join(self.log_dir, "session{}".format(number))
+            if not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+        try:
+            session = self._factory(self.hostname, self.urls, log_dir=log_dir)
+            session.connect()
+        except Exception:
+            with self._lock:
+                self._sessions.remove(None)
+                self._open_failed = True
+            self._slots.release()
+            return None
+
+        with self._lock:
+            self._sessions[self._sessions.index(None)] = session
+        return session
+
+    def acquire(self):
+        """Returns the idle session opening the new one if there is no idle session."""
+        if self._idle.empty():
+            session = self._open()
+            if session is not None:
+                return session
+        return self._idle.get()
+
+    def release(self, session):
+        self._idle.put(session)
+
+    def _discard(self, session):
+        with self._lock:
+            self._sessions.remove(session)
+        self._slots.release()
+        try:
+            session.disconnect()
+        except Exception:
+            pass
+
+    def send(self, cmd, timeout=60):
+        """Sends the command on the idle session. The command failed on the additional session is resent."""
+        while True:
+            session = self.acquire()
+            try:
+                output = session.send(cmd, timeout=timeout)
+            except Exception:
+                if session is self._primary:
+                    self.release(session)
+                    raise
+                # do not open the sessions the device breaks
+                self._open_failed = True
+                self._discard(session)
+                continue
+            self.release(session)
+            return output
+
+    def send_parallel(self, commands, timeout=60):
+        """Sends the commands concurrently and returns the list of outputs in the order of commands."""
+        results = [None] * len(commands)
+        errors = []
+        pending = Queue()
+        for item in enumerate(commands):
+            pending.put(item)
+
+        def worker():
+            while not errors:
+                try:
+                    index, cmd = pending.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[index] = self.send(cmd, timeout=timeout)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(min(len(commands), self.max_sessions + 1))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def close(self):
+        """Disconnects the additional sessions."""
+        with self._lock:
+            sessions = [session for session in self._sessions if session is not None]
+        for session in sessions:
+            self._discard(session)
+        while not self._idle.empty():
+            self._idle.get()
+        self._idle.put(self._primary)
@@ -83,6 +83,7 @@ setup(
             '{} = csmpe.core_plugins.csm_redundancy_check.ios_xr.plugin:Plugin'.format(uuid4()),
             '{} = csmpe.core_plugins.csm_error_core_check.ios_xr.plugin:Plugin'.format(uuid4()),
             '{} = csmpe.core_plugins.csm_check_isis_neighbors.ios_xr.plugin:Plugin'.format(uuid4()),
+            '{} = csmpe.core_plugins.csm_check_protocol_states.ios_xr.plugin:Plugin'.format(uuid4()),
 
             '{} = csmpe.core_plugins.csm_filesystem_check.ios_xr.disk_space_check:Plugin'.format(uuid4()),
             '{} = csmpe.core_plugins.csm_filesystem_check.ios_xr.filesystem_rw_check:Plugin'.format(uuid4()),
@@ -112,5 +113,6 @@ setup(
     zip_safe=False,
     install_requires=install_requires,
     tests_require=['flake8'],
-    package_data={'': ['LICENSE', ], },
+    package_data={'': ['LICENSE', ],
+                  'csmpe.core_plugins.csm_install_operations.ios_xr': ['migration_supported_hw.json', ], },
 )
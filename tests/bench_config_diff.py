@@ -0,0 +1,92 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+"""
+Benchmark of the hierarchical configuration diff compared with the difflib unified diff
+on the BNG sized configurations.
+
+Run from the top level directory:
+    python -m tests.bench_config_diff
+or by the path:
+    python tests/bench_config_diff.py
+"""
+
+import difflib
+import os
+import sys
+import timeit
+
+if __package__ is None:
+    # run by the path, the top level directory is not on the module search path
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from csmpe.core_plugins.csm_config_capture import config_diff  # noqa: E402
+
+REPEAT = 3
+
+
+def make_config(interfaces, changed=()):
+    lines = ["Building configuration...", "!! IOS XR Configuration 5.3.3", "!", "hostname R1"]
+    for index in range(interfaces):
+        lines.extend([
+            "interface Bundle-Ether1.{}".format(index),
+            " description subscriber vlan {}".format(index),
+            " ipv4 address 10.{}.{}.1 255.255.255.0".format(index // 256 % 256, index % 256),
+            " service-policy input {}".format("GOLD" if index in changed else "SILVER"),
+            " encapsulation dot1q {}".format(index % 4000 + 1),
+            " service-policy type control subscriber BNG",
+            " ipsubscriber ipv4 l2-connected",
+            "  initiator dhcp",
+            " !",
+            "!",
+        ])
+    lines.append("end")
+    return "\n".join(lines)
+
+
+def main():
+    changed = set(range(0, 20000, 1000))
+    for interfaces in (2000, 20000):
+        old = make_config(interfaces)
+        new = make_config(interfaces, changed)
+        size = len(old.splitlines())
+
+        benchmarks = [
+            ("config_diff", lambda: config_diff.diff_configs(old, new)),
+            ("parse_config", lambda: config_diff.parse_config(old)),
+            ("difflib", lambda: list(difflib.unified_diff(old.splitlines(), new.splitlines()))),
+        ]
+
+        print("Configuration: {} lines, changes: {}".format(size, len(config_diff.diff_configs(old, new))))
+        for name, func in benchmarks:
+            best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+            print("{:<20} {:>10.2f} ms".format(name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
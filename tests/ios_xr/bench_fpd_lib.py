@@ -0,0 +1,96 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+"""
+Benchmark of the FPD table parsing on the fully populated ASR-9922 XR FPD table
+compared with the per FPD subtype regex scans.
+
+Run from the top level directory:
+    python -m tests.ios_xr.bench_fpd_lib
+or by the path:
+    python tests/ios_xr/bench_fpd_lib.py
+"""
+
+import os
+import re
+import sys
+import timeit
+
+if __package__ is None:
+    # run by the path, the top level directory is not on the module search path
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import fpd_lib  # noqa: E402
+
+REPEAT = 5
+
+NODE = r'(\d+/(?:RS?P)?\d+/CPU\d+)'
+FPDS_CHECK_FOR_UPGRADE = set(['cbc', 'rommon', 'fpga2', 'fsbl', 'lnxfw', 'fpga8', 'fclnxfw', 'fcfsbl'])
+SUBTYPES = ["fpga1", "fpga2", "fpga3", "fpga4", "fpga5", "fpga6", "fpga7", "fpga8", "cbc", "rommon", "fsbl", "lnxfw"]
+
+
+def make_table():
+    lines = ["Location     Card Type                Version Type Subtype Inst   Version   Dng?",
+             "============ ======================== ======= ==== ======= ==== =========== ===="]
+    locations = ["0/RP0/CPU0", "0/RP1/CPU0"] + ["0/{}/CPU0".format(slot) for slot in range(20)]
+    for location in locations:
+        for index, subtype in enumerate(SUBTYPES):
+            upgrade = "Yes" if index % 5 == 0 else "No"
+            if index == 0:
+                lines.append("{:<12} {:<24} 1.0     lc   {:<7} 0       1.{:02d}     {}".format(
+                    location, "A99-8X100GE-SE", subtype, index, upgrade))
+            else:
+                lines.append("{:<46}lc   {:<7} 0       1.{:02d}     {}".format("", subtype, index, upgrade))
+        lines.append("-" * 80)
+    return "\n".join(lines), locations
+
+
+def check_fpd_regex(fpdtable, locations):
+    subtype_to_locations = {}
+    for fpdtype in FPDS_CHECK_FOR_UPGRADE:
+        for match in re.finditer(NODE + r"[-.A-Z0-9a-z\s]*?" + fpdtype + r"[-.A-Z0-9a-z\s]*?(No|Yes)", fpdtable):
+            if match.group(1) in locations and match.group(2) == "No":
+                subtype_to_locations.setdefault(fpdtype, []).append(match.group(1))
+    return subtype_to_locations
+
+
+def check_fpd_parser(fpdtable, locations):
+    return fpd_lib.locations_by_subtype(fpd_lib.parse_fpd_table(fpdtable), fpd_lib.CURRENT,
+                                        FPDS_CHECK_FOR_UPGRADE, locations)
+
+
+def main():
+    fpdtable, locations = make_table()
+    print("FPD table: {} locations, {} rows".format(len(locations), len(fpd_lib.parse_fpd_table(fpdtable))))
+    for name, func in [("regex scans", check_fpd_regex), ("single pass parser", check_fpd_parser)]:
+        best = min(timeit.repeat(lambda: func(fpdtable, locations), number=10, repeat=REPEAT)) / 10
+        print("{:<20} {:>10.2f} ms".format(name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
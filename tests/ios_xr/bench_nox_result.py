@@ -0,0 +1,104 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+"""
+Benchmark of the NoX CSV processing on the 150k line BNG configuration compared
+with the per row formatted writes into the two logs.
+
+Run from the top level directory:
+    python -m tests.ios_xr.bench_nox_result
+or by the path:
+    python tests/ios_xr/bench_nox_result.py
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+if __package__ is None:
+    # run by the path, the top level directory is not on the module search path
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import nox_result  # noqa: E402
+
+LINES = 150000
+REPEAT = 3
+
+
+def make_csv(path, lines=LINES):
+    with open(path, "w") as f:
+        for line in range(1, lines + 1):
+            if line % 50 == 0:
+                f.write("{},KNOWN_UNSUPPORTED,hw-module service sesh location 0/{}/CPU0\n".format(line, line % 8))
+            elif line % 10 == 0:
+                f.write("{},UNPROCESSED,!\n".format(line))
+            else:
+                f.write("{},KNOWN_SUPPORTED,\" ipv4 address 10.{}.{}.1 255.255.255.0\"\n".format(
+                    line, line % 250, line % 200))
+
+
+def create_config_logs(csv_path, supported_log, unsupported_log):
+    with open(supported_log, 'w') as supp_log:
+        with open(unsupported_log, 'w') as unsupp_log:
+            with open(csv_path, 'rb') as csvfile:
+                for row in csv.reader(csvfile):
+                    if len(row) >= 3 and row[1].strip() == "KNOWN_SUPPORTED":
+                        supp_log.write('{0[0]:<8} {0[1]:<} \n'.format((row[0], row[2])))
+                    elif len(row) >= 3:
+                        unsupp_log.write('{0[0]:<8} {0[1]:<} \n'.format((row[0], row[2])))
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(directory, "xr.csv")
+        supported = os.path.join(directory, "supported")
+        unsupported = os.path.join(directory, "unsupported")
+        make_csv(csv_path)
+        result = nox_result.process_nox_csv(csv_path, supported, unsupported)
+
+        benchmarks = [
+            ("per row logs", lambda: create_config_logs(csv_path, supported, unsupported)),
+            ("process_nox_csv", lambda: nox_result.process_nox_csv(csv_path, supported, unsupported)),
+            ("load index", lambda: nox_result.NoXResult.load(nox_result.index_path(csv_path))),
+            ("status lookup x1000", lambda: [result.status(line) for line in range(1, LINES, LINES // 1000)]),
+        ]
+
+        print("CSV: {} lines, unsupported: {}".format(len(result), result.unsupported))
+        for name, func in benchmarks:
+            best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+            print("{:<20} {:>10.2f} ms".format(name, best * 1000))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
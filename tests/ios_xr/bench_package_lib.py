@@ -0,0 +1,96 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+# =============================================================================
+
+"""
+Benchmark of the SoftwarePackage parsing and set operations on a 5000 package inventory.
+
+Run from the top level directory:
+    python -m tests.ios_xr.bench_package_lib
+or by the path:
+    python tests/ios_xr/bench_package_lib.py
+"""
+
+import os
+import sys
+import timeit
+
+if __package__ is None:
+    # run by the path, the top level directory is not on the module search path
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import package_lib as plib  # noqa: E402
+
+INVENTORY_SIZE = 5000
+REPEAT = 5
+
+
+def version(major):
+    return "{}.{}.{}".format(4 + major // 100, (major // 10) % 10, major % 10)
+
+
+def make_inventory(size=INVENTORY_SIZE):
+    package_types = ["mini", "mcast", "mgbl", "mpls", "k9sec", "fpd", "doc", "bng", "li", "optic", "services", "video"]
+    lines = ["Default Profile:", "  SDRs:", "    Owner", "  Inactive Packages:"]
+    count = 0
+    major = 0
+    while count < size:
+        for package_type in package_types:
+            lines.append("    disk0:asr9k-{}-px-{}".format(package_type, version(major)))
+            count += 1
+        for smu in range(30):
+            lines.append("    disk0:asr9k-px-{}.CSCus{:05d}-1.0.0".format(version(major), major * 100 + smu))
+            count += 1
+        lines.append("    disk0:asr9k-px-{}.sp1-1.0.0".format(version(major)))
+        count += 1
+        major += 1
+    return "\n".join(lines[:size + 4])
+
+
+def main():
+    output = make_inventory()
+    requested = ["asr9k-px-{}.CSCus{:05d}.pie".format(version(major), major * 100 + smu)
+                 for major in range(100) for smu in range(0, 30, 3)]
+
+    installed = plib.SoftwarePackage.from_show_cmd(output)
+    pkgs = plib.SoftwarePackage.from_package_list(requested)
+
+    benchmarks = [
+        ("from_show_cmd", lambda: plib.SoftwarePackage.from_show_cmd(output)),
+        ("from_package_list", lambda: plib.SoftwarePackage.from_package_list(requested)),
+        ("set difference", lambda: pkgs - installed),
+        ("set intersection", lambda: pkgs & installed),
+    ]
+
+    print("Inventory: {} packages, requested: {} packages".format(len(installed), len(pkgs)))
+    for name, func in benchmarks:
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print("{:<20} {:>10.2f} ms".format(name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import boot_milestones as bm
+
+
+class FakeContext(object):
+    def __init__(self):
+        self.statuses = []
+
+    def info(self, message):
+        pass
+
+    def post_status(self, message):
+        self.statuses.append(message)
+
+
+class FakeFSMContext(object):
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+
+class TestBootMilestoneTracker(TestCase):
+    def setUp(self):
+        self.now = [0]
+        self.ctx = FakeContext()
+        self.tracker = bm.BootMilestoneTracker(self.ctx, clock=lambda: self.now[0])
+
+    def test_feed(self):
+        self.tracker.feed("System Bootstrap, Version 2.04\nrommon 1 > boot")
+        self.now[0] = 300
+        self.tracker.feed("0/RSP0/ADMIN0:Jan 1 00:05:00 %INFRA-VM_MANAGER-4-INFO : vm_manager started VM admin_vm")
+        self.assertEqual([milestone for milestone, _ in self.tracker.reached], [bm.ROMMON, bm.CALVADOS_UP])
+        self.assertEqual(self.tracker.progress, 60)
+        self.assertFalse(self.tracker.ready)
+        self.assertEqual(self.ctx.statuses[-1], "Boot: Calvados up (60%) after 300 seconds")
+
+        self.tracker.feed("Enter root-system username:")
+        self.assertTrue(self.tracker.ready)
+        self.assertEqual(self.tracker.progress, 100)
+
+    def test_reached_once(self):
+        self.assertTrue(self.tracker.reach(bm.XR_VM_UP))
+        self.assertFalse(self.tracker.reach(bm.XR_VM_UP))
+        self.assertEqual(len(self.ctx.statuses), 1)
+
+    def test_fsm_action(self):
+        calls = []
+        action = self.tracker.fsm_action(lambda fsm_ctx: calls.append(fsm_ctx) or True)
+        self.assertTrue(action(FakeFSMContext(bm.XR_VM_UP.pattern)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.tracker.summary(), "XR VM up 0s")
+
+    def test_reached_at(self):
+        self.now[0] = 100
+        self.tracker.reach(bm.XR_VM_UP)
+        self.now[0] = 200
+        self.assertEqual(self.tracker.reached_at(bm.XR_VM_UP), 100)
+        self.assertEqual(self.tracker.reached_at(bm.ROMMON), None)
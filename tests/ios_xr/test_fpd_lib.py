@@ -0,0 +1,120 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import fpd_lib
+
+XR_FPD_TABLE = """
+===================================== ==========================================
+                                      Existing Field Programmable Devices
+                                      ==========================================
+                                        HW                       Current SW Upg/
+Location     Card Type                Version Type Subtype Inst   Version   Dng?
+============ ======================== ======= ==== ======= ==== =========== ====
+0/RSP0/CPU0  A9K-RSP440-SE            1.0     lc   fpga2   0       1.16     No
+                                              lc   cbc     0       2.02     Yes
+                                              lc   rommon  0       1.05     No
+--------------------------------------------------------------------------------
+0/0/CPU0     A9K-MOD80-SE             1.0     lc   fpga2   0       0.24     No
+                                              lc   cbc     0       2.02     No
+--------------------------------------------------------------------------------
+"""
+
+EXR_FPD_TABLE = """
+                                                               FPD Versions
+                                                               =================
+Location   Card type        HWver FPD device       ATR Status   Running Programd
+------------------------------------------------------------------------------
+0/RSP0     A9K-RSP880-SE    1.0   Alpha-FPGA           CURRENT    0.15    0.15
+0/RSP0     A9K-RSP880-SE    1.0   Cbc                  RLOAD REQ 34.39   34.38
+0/0        A9K-8X100GE-SE   1.0   Ethernet-FPGA    B   NEED UPGD  0.07    0.07
+0/0        A9K-8X100GE-SE   1.0   Fsbl                 UPGD DONE  1.89    1.89
+"""
+
+
+class TestFPDTable(TestCase):
+    def test_parse_xr(self):
+        rows = fpd_lib.parse_fpd_table(XR_FPD_TABLE)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1], fpd_lib.FPD("0/RSP0/CPU0", "A9K-RSP440-SE", "1.0", "cbc", "2.02", None,
+                                              fpd_lib.NEED_UPGRADE))
+        self.assertEqual(rows[4].location, "0/0/CPU0")
+
+    def test_parse_exr(self):
+        rows = fpd_lib.parse_fpd_table(EXR_FPD_TABLE)
+        self.assertEqual([row.status for row in rows], ["CURRENT", "RLOAD REQ", "NEED UPGD", "UPGD DONE"])
+        self.assertEqual(rows[2].subtype, "Ethernet-FPGA")
+        self.assertEqual(rows[1].programmed, "34.38")
+        statuses = fpd_lib.count_status(rows)
+        self.assertEqual(statuses[fpd_lib.NEED_UPGRADE], 1)
+        self.assertEqual(statuses[fpd_lib.RELOAD_REQUIRED], 1)
+
+    def test_locations_by_subtype(self):
+        rows = fpd_lib.parse_fpd_table(XR_FPD_TABLE)
+        self.assertEqual(fpd_lib.locations_by_subtype(rows, fpd_lib.CURRENT, ["fpga2", "cbc"], ["0/RSP0/CPU0"]),
+                         {"fpga2": ["0/RSP0/CPU0"]})
+        self.assertEqual(fpd_lib.locations_by_subtype(rows, fpd_lib.CURRENT, ["cbc"], ["0/RSP0/CPU0", "0/0/CPU0"]),
+                         {"cbc": ["0/0/CPU0"]})
+
+
+class FakeContext(object):
+    def __init__(self):
+        self.statuses = []
+
+    def info(self, message):
+        pass
+
+    def post_status(self, message):
+        self.statuses.append(message)
+
+
+class TestFPDUpgradeProgress(TestCase):
+    def setUp(self):
+        self.now = [0]
+        self.ctx = FakeContext()
+
+    def test_feed(self):
+        progress = fpd_lib.FPDUpgradeProgress(self.ctx, {"cbc": ["0/RSP0/CPU0", "0/0/CPU0"],
+                                                         "fpga2": ["0/0/CPU0"]}, clock=lambda: self.now[0])
+        self.now[0] = 120
+        progress.feed("LC/0/0/CPU0:Jan 1 00:02:00 : fpd-serv[123]: Successfully upgraded cbc for A9K-MOD80-SE "
+                      "on location 0/0/CPU0 from 2.02 to 34.17")
+        self.assertEqual(progress.done, 1)
+        self.assertEqual(progress.eta, 240)
+        self.assertEqual(self.ctx.statuses[-1], "FPD upgrade: 1/3 done, ETA 4 min")
+
+        progress.feed("Failed to upgrade fpga2 for A9K-MOD80-SE on location 0/0/CPU0")
+        self.assertEqual(progress.failed, set([("fpga2", "0/0/CPU0")]))
+        self.assertEqual(progress.pending, set([("cbc", "0/RSP0/CPU0")]))
+
+    def test_update_from_rows(self):
+        rows = fpd_lib.parse_fpd_table(EXR_FPD_TABLE)
+        progress = fpd_lib.FPDUpgradeProgress.from_rows(self.ctx, rows)
+        self.assertEqual(progress.pending, set([("Ethernet-FPGA", "0/0")]))
+        progress.update_from_rows([row._replace(status=fpd_lib.RELOAD_REQUIRED) for row in rows])
+        self.assertTrue(progress.finished)
@@ -0,0 +1,104 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import image_staging
+
+
+class FakeContext(object):
+    """Replies to dir and show md5 commands with the file on the fake device."""
+    def __init__(self, device_file=None):
+        self.device_file = device_file  # (size, md5) or None
+        self.sent = []
+
+    def send(self, cmd, timeout=60):
+        self.sent.append(cmd)
+        if self.device_file is None:
+            return "%Error showing harddiskb:/image.tar (No such file or directory)"
+        size, md5 = self.device_file
+        if cmd.startswith("dir"):
+            return ("Directory of harddiskb:\n\n"
+                    "   53    -rwx  {}  Fri Jul 22 19:21:23 2016  image.tar\n".format(size))
+        return "{}\n".format(md5)
+
+    def info(self, message):
+        pass
+
+    def warning(self, message):
+        pass
+
+    def error(self, message):
+        raise AssertionError(message)
+
+
+class TestImageStaging(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "image.tar")
+        with open(self.path, "wb") as image:
+            image.write(b"x" * 3000)
+        self.md5 = hashlib.md5(b"x" * 3000).hexdigest()
+        image_staging._checksums.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_checksum_sidecar(self):
+        self.assertEqual(image_staging.file_checksum(self.path), (3000, self.md5))
+        self.assertTrue(os.path.isfile(self.path + image_staging.CHECKSUM_SUFFIX))
+        image_staging._checksums.clear()
+        stat = os.stat(self.path)
+        self.assertEqual(image_staging._read_sidecar(self.path, stat), self.md5)
+
+    def test_skip_when_present(self):
+        ctx = FakeContext((3000, self.md5))
+        copies = []
+        self.assertFalse(image_staging.stage_file(ctx, self.path, "harddiskb:/image.tar",
+                                                  lambda: copies.append(True)))
+        self.assertEqual(copies, [])
+
+    def test_copy_and_verify(self):
+        ctx = FakeContext((2000, "0" * 32))
+
+        def copy():
+            ctx.device_file = (3000, self.md5)
+
+        self.assertTrue(image_staging.stage_file(ctx, self.path, "harddiskb:/image.tar", copy))
+        self.assertEqual(ctx.device_file, (3000, self.md5))
+
+    def test_verify_failure(self):
+        ctx = FakeContext(None)
+
+        def copy():
+            ctx.device_file = (3000, "0" * 32)
+
+        self.assertRaises(AssertionError, image_staging.stage_file, ctx, self.path, "harddiskb:/image.tar", copy)
@@ -0,0 +1,96 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_error_core_check.ios_xr import log_scanner
+
+LOG = """RP/0/RSP0/CPU0:R3#show logging start May 16 21:41:08
+Mon May 16 22:10:01.100 UTC
+RP/0/RSP0/CPU0:May 16 21:41:08.690 : sysmgr[89]: %OS-SYSMGR-5-NOTICE : old line
+RP/0/RSP0/CPU0:May 16 21:41:08.690 : bgp[1052]: %ROUTING-BGP-5-ADJCHANGE : neighbor 10.0.0.1 Up
+RP/0/RSP0/CPU0:May 16 21:55:12.001 : cfgmgr-rp[165]: %MGBL-CONFIG-4-VERSION : Version of existing saved \
+configuration detected to be incompatible with the installed software
+RP/0/RSP0/CPU0:May 16 21:55:13.002 : dumper[56]: %OS-DUMPER-7-DUMP_REQUEST : Core for pid = 4411 (bfd_agent)
+RP/0/RSP0/CPU0:May 16 21:55:14.003 : l2vpn[1130]: %L2-L2VPN-3-ERROR : Traceback: 0x1234 0x5678
+RP/0/RSP0/CPU0:May  6 21:55:15.004 : ifmgr[201]: %PKT_INFRA-LINK-3-UPDOWN : Interface error disabled
+"""
+
+
+class TestLogScanner(TestCase):
+    def test_classify(self):
+        self.assertEqual(log_scanner.classify("Core for pid = 4411"), log_scanner.CORE)
+        self.assertEqual(log_scanner.classify("Traceback: 0x1234"), log_scanner.TRACEBACK)
+        self.assertEqual(log_scanner.classify("%L2-L2VPN-3-ERROR : failed"), log_scanner.ERROR)
+        self.assertEqual(log_scanner.classify("%MGBL-CONFIG-4-VERSION : error"), log_scanner.CONFIG_INCOMPATIBLE)
+        self.assertIsNone(log_scanner.classify("neighbor 10.0.0.1 Up"))
+
+    def test_log_lines(self):
+        lines = log_scanner.log_lines(LOG)
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].endswith("old line"))
+
+    def test_bookmark(self):
+        lines = log_scanner.log_lines(LOG)
+        mark = log_scanner.bookmark(lines[:2])
+        self.assertEqual((mark["month"], mark["day"], mark["time"]), ("May", "16", "21:41:08"))
+        self.assertEqual(mark["line"], lines[1])
+        self.assertEqual(log_scanner.since_command(mark), "show logging start May 16 21:41:08")
+        mark = log_scanner.bookmark(lines)
+        self.assertEqual((mark["day"], mark["time"]), ("6", "21:55:15"))
+        self.assertIsNone(log_scanner.bookmark([]))
+
+    def test_year_timestamp(self):
+        mark = log_scanner.bookmark(["RP/0/RSP0/CPU0:2016 May 16 21:41:08.690 UTC: sysmgr[89]: started"])
+        self.assertEqual((mark["month"], mark["day"], mark["time"]), ("May", "16", "21:41:08"))
+
+    def test_lines_after_bookmark(self):
+        lines = log_scanner.log_lines(LOG)
+        mark = log_scanner.bookmark(lines[:2])
+        new_lines = log_scanner.lines_after(lines, mark)
+        self.assertEqual(new_lines, lines[2:])
+
+        hits = log_scanner.scan(new_lines)
+        self.assertEqual([category for category, line in hits],
+                         [log_scanner.CONFIG_INCOMPATIBLE, log_scanner.CORE, log_scanner.TRACEBACK, log_scanner.ERROR])
+        self.assertEqual(log_scanner.count(hits)[log_scanner.ERROR], 1)
+
+    def test_continuation_lines(self):
+        output = LOG.replace("0x1234 0x5678\n", "0x1234 0x5678\n  Core for pid = 1130 (l2vpn_mgr) dumped\n")
+        lines = log_scanner.log_lines(output + "RP/0/RSP0/CPU0:R3#")
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(log_scanner.bookmark(lines)["line"], lines[6])
+
+        hits = log_scanner.scan(log_scanner.lines_after(lines, log_scanner.bookmark(lines[:2])))
+        self.assertEqual(log_scanner.count(hits)[log_scanner.CORE], 2)
+        # the continuation of the bookmarked line was scanned with it
+        self.assertEqual(log_scanner.lines_after(lines, log_scanner.bookmark(lines[:6])), lines[6:])
+
+    def test_lines_after_cleared_log(self):
+        lines = log_scanner.log_lines(LOG)
+        mark = {"month": "May", "day": "16", "time": "21:00:00", "line": "RP/0/RSP0/CPU0:May 16 21:00:00.000 : gone"}
+        self.assertEqual(log_scanner.lines_after(lines, mark), lines)
@@ -0,0 +1,62 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import migration_lib
+
+
+class TestSupportedHardware(TestCase):
+    def setUp(self):
+        self.supported_hw = migration_lib.SupportedHardware({
+            "6.1.1": {
+                "RP": ["A9K-RSP880-SE", "A99-RP2-SE"],
+                "LC": ["A9K-8X100GE-SE", "A9K-8X100GE-L-SE"],
+                "FAN": ["ASR-9904-FAN"],
+                "PEM": [],
+            }
+        })
+
+    def test_is_supported(self):
+        self.assertTrue(self.supported_hw.is_supported("6.1.1", "RP", "A9K-RSP880-SE"))
+        self.assertTrue(self.supported_hw.is_supported("6.1.1", "LC", "A9K-8X100GE-L-SE"))
+        self.assertFalse(self.supported_hw.is_supported("6.1.1", "RP", "A9K-RSP440-SE"))
+        self.assertFalse(self.supported_hw.is_supported("6.1.1", "PEM", "PWR-2KW-DC-V2"))
+        self.assertFalse(self.supported_hw.is_supported("6.2.1", "RP", "A9K-RSP880-SE"))
+
+    def test_matcher(self):
+        matcher = self.supported_hw.matcher("6.1.1", "RP", "LC")
+        self.assertTrue(matcher.search("A99-RP2-SE"))
+        self.assertTrue(matcher.search("A9K-8X100GE-SE"))
+        self.assertFalse(matcher.search("ASR-9904-FAN"))
+        self.assertIsNone(self.supported_hw.matcher("6.1.1", "PEM"))
+        self.assertIs(matcher, self.supported_hw.matcher("6.1.1", "RP", "LC"))
+
+    def test_load_cached(self):
+        supported_hw = migration_lib.load_supported_hw()
+        self.assertIs(supported_hw, migration_lib.load_supported_hw())
+        self.assertIsNotNone(supported_hw.get("6.1.1"))
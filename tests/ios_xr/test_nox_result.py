@@ -0,0 +1,125 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import nox_result
+
+CSV = """1,KNOWN_SUPPORTED,hostname R1
+2,UNPROCESSED,!
+3,KNOWN_UNSUPPORTED,hw-module service sesh location 0/0/CPU0
+4,KNOWN_SUPPORTED,router bgp 100
+5,UNKNOWN,router static
+6,KNOWN_UNSUPPORTED,hw-module profile scale l3xl
+7,KNOWN_SUPPORTED,"description a, b"
+bad row
+"""
+
+NOX_OUTPUT = """
+Filename                 Total    Comments     Markers      Known         Unsupported
+---------------------------------------------------------------------------------
+admin.cfg                   {}     0(  0%)      0(  0%)      {}(100%)      {}
+"""
+
+
+class TestNoXResult(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.host = os.path.join(self.directory, "R1")
+        os.makedirs(self.host)
+        self.csv = os.path.join(self.host, "xr.csv")
+        with open(self.csv, "w") as f:
+            f.write(CSV)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_process(self):
+        supported = os.path.join(self.directory, "supported")
+        unsupported = os.path.join(self.directory, "unsupported")
+        result = nox_result.process_nox_csv(self.csv, supported, unsupported, footer="END")
+
+        self.assertEqual(len(result), 7)
+        self.assertEqual(result.status(3), "KNOWN_UNSUPPORTED")
+        self.assertEqual(result.status(7), "KNOWN_SUPPORTED")
+        self.assertEqual(result.status(8), None)
+        self.assertEqual(result.unsupported, 4)
+        self.assertEqual(result.lines_with_status("UNKNOWN"), [5])
+        self.assertEqual(result.counts()["KNOWN_SUPPORTED"], 3)
+        self.assertEqual(dict(result.unsupported_features), {"hw-module service": 1, "hw-module profile": 1,
+                                                             "router static": 1})
+
+        with open(supported) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[3], "1        hostname R1 ")
+        self.assertEqual(lines[5], "7        description a, b ")
+        self.assertEqual(lines[-1], "END")
+        with open(unsupported) as f:
+            self.assertEqual(len([line for line in f.read().splitlines() if line[:1].isdigit()]), 4)
+
+    def test_index_saved_and_aggregated(self):
+        result = nox_result.process_nox_csv(self.csv)
+        loaded = nox_result.NoXResult.load(os.path.join(self.host, "xr.nox.json"))
+        self.assertEqual(loaded.status(5), "UNKNOWN")
+        self.assertEqual(loaded.unsupported_features, result.unsupported_features)
+        self.assertEqual(list(loaded.lines), list(result.lines))
+
+        # the queried index is saved from the converted line numbers
+        path = os.path.join(self.directory, "queried.nox.json")
+        loaded.save(path)
+        self.assertEqual(list(nox_result.NoXResult.load(path).lines), [1, 2, 3, 4, 5, 6, 7])
+
+        other = os.path.join(self.directory, "R2")
+        os.makedirs(other)
+        shutil.copy(self.csv, os.path.join(other, "admin.csv"))
+        nox_result.process_nox_csv(os.path.join(other, "admin.csv"))
+        total = nox_result.campaign_unsupported_features(self.directory)
+        self.assertEqual(total["router static"], 2)
+
+    def test_unordered_lines(self):
+        result = nox_result.NoXResult()
+        for line in (3, 1, 2):
+            result.add(line, "KNOWN_SUPPORTED" if line != 2 else "UNKNOWN", "x")
+        self.assertEqual(list(result.lines), [1, 2, 3])
+        self.assertEqual(result.status(2), "UNKNOWN")
+
+    def test_rows_without_line_number(self):
+        with open(self.csv, "w") as f:
+            f.write("Line,Status,Configuration\n1,KNOWN_SUPPORTED,hostname R1\n")
+        result = nox_result.process_nox_csv(self.csv)
+        self.assertEqual(list(result.lines), [1])
+        self.assertEqual(result.status(1), "KNOWN_SUPPORTED")
+
+    def test_summary(self):
+        self.assertTrue(nox_result.conversion_succeeded(NOX_OUTPUT.format(10, 10, 0)))
+        self.assertFalse(nox_result.conversion_succeeded(NOX_OUTPUT.format(10, 9, 0)))
+        self.assertFalse(nox_result.conversion_succeeded("garbage"))
+        self.assertTrue(nox_result.all_configs_supported(NOX_OUTPUT.format(10, 10, 0)))
+        self.assertFalse(nox_result.all_configs_supported(NOX_OUTPUT.format(10, 10, 2)))
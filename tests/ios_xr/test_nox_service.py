@@ -0,0 +1,127 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import stat
+import tempfile
+import time
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import nox_service
+
+FAKE_NOX = """#!/bin/sh
+# fake NoX: counts the runs and generates <name>.iox and <name>.csv next to the config
+echo run >> "{runs}"
+sleep {delay}
+base="${{2%.*}}"
+cp "$2" "$base.iox"
+echo "Configuration,Supported" > "$base.csv"
+echo "Filename  Total  Known"
+"""
+
+
+class TestNoXConversionService(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileloc = os.path.join(self.directory, "host")
+        os.makedirs(self.fileloc)
+        self.runs = os.path.join(self.directory, "runs")
+        self.nox = self._write_nox(delay=0)
+        for name in ("admin.cfg", "xr.cfg"):
+            with open(os.path.join(self.fileloc, name), "w") as config:
+                config.write("hostname {}\n".format(name))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write_nox(self, delay):
+        path = os.path.join(self.directory, "nox")
+        with open(path, "w") as nox:
+            nox.write(FAKE_NOX.format(runs=self.runs, delay=delay))
+        # not executable, the service makes it executable
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+        return path
+
+    def _run_count(self):
+        if not os.path.exists(self.runs):
+            return 0
+        with open(self.runs) as runs:
+            return len(runs.readlines())
+
+    def test_convert(self):
+        service = nox_service.NoXConversionService(self.nox)
+        self.assertTrue(os.stat(self.nox).st_mode & stat.S_IXUSR)
+
+        result = service.convert(self.fileloc, "admin.cfg")
+        self.assertFalse(result.cached)
+        self.assertEqual(result.error, "")
+        self.assertTrue("Filename" in result.output)
+        self.assertEqual(result.files, ["admin.csv", "admin.iox"])
+        with open(os.path.join(self.fileloc, "admin.iox")) as converted:
+            self.assertEqual(converted.read(), "hostname admin.cfg\n")
+        self.assertEqual(self._run_count(), 1)
+
+    def test_unchanged_config_is_cached(self):
+        service = nox_service.NoXConversionService(self.nox)
+        service.convert(self.fileloc, "admin.cfg")
+        os.remove(os.path.join(self.fileloc, "admin.iox"))
+
+        result = nox_service.NoXConversionService(self.nox).convert(self.fileloc, "admin.cfg")
+        self.assertTrue(result.cached)
+        self.assertEqual(result.files, ["admin.csv", "admin.iox"])
+        self.assertTrue(os.path.isfile(os.path.join(self.fileloc, "admin.iox")))
+        self.assertEqual(self._run_count(), 1)
+
+        with open(os.path.join(self.fileloc, "admin.cfg"), "a") as config:
+            config.write("interface Loopback0\n")
+        self.assertFalse(service.convert(self.fileloc, "admin.cfg").cached)
+        self.assertEqual(self._run_count(), 2)
+
+    def test_changed_binary_is_not_cached(self):
+        nox_service.NoXConversionService(self.nox).convert(self.fileloc, "admin.cfg")
+        time.sleep(0.01)
+        self._write_nox(delay=0.01)
+        result = nox_service.NoXConversionService(self.nox).convert(self.fileloc, "admin.cfg")
+        self.assertFalse(result.cached)
+        self.assertEqual(self._run_count(), 2)
+
+    def test_concurrent_conversions(self):
+        self._write_nox(delay=0.5)
+        service = nox_service.NoXConversionService(self.nox)
+        start = time.time()
+        conversions = [service.submit(self.fileloc, "admin.cfg"), service.submit(self.fileloc, "xr.cfg")]
+        results = [conversion.result() for conversion in conversions]
+        self.assertLess(time.time() - start, 0.95)
+        self.assertEqual([result.files for result in results], [["admin.csv", "admin.iox"], ["xr.csv", "xr.iox"]])
+        self.assertEqual(sorted(os.listdir(self.fileloc)),
+                         ["admin.cfg", "admin.csv", "admin.iox", "xr.cfg", "xr.csv", "xr.iox"])
+
+    def test_conversion_exception(self):
+        service = nox_service.NoXConversionService(self.nox)
+        conversion = service.submit(self.fileloc, "missing.cfg")
+        self.assertRaises(IOError, conversion.result)
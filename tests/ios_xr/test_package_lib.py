@@ -106,6 +106,15 @@ class TestSoftwarePackage(TestCase):
     def test_sub(self):
         pass
 
+    def test_key(self):
+        internal = plib.SoftwarePackage("disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0")
+        external = plib.SoftwarePackage("asr9k-px-5.3.3.CSCuy81837.pie")
+
+        self.assertEqual(internal.key, ("asr9k", None, "px", "5.3.3", "CSCuy81837", None))
+        self.assertEqual(internal.key, external.key)
+        self.assertEqual(hash(internal), hash(external))
+        self.assertFalse(hasattr(internal, "__dict__"))
+
 
     def test_import_from_cmd(self):
         output = """
@@ -138,3 +147,33 @@ Default Profile:
 
         self.assertTrue(p in pkgs)
 
+    def test_index_match(self):
+        installed = plib.SoftwarePackage.from_package_list(["disk0:asr9k-mcast-px-5.3.3",
+                                                            "disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0",
+                                                            "disk0:asr9k-px-5.3.3.CSCuy81838-1.0.0"])
+        requested = plib.SoftwarePackage.from_package_list(["asr9k-mcast-px.pie-5.3.3",
+                                                            "asr9k-px-5.3.3.CSCuy81837.pie",
+                                                            "asr9k-px-5.3.3.CSCuy99999.pie"])
+        index = plib.PackageIndex(installed)
+        matched = index.match(requested)
+
+        self.assertEqual(sorted(map(str, matched)), ["disk0:asr9k-mcast-px-5.3.3",
+                                                     "disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0"])
+        self.assertEqual(index.external_to_internal["asr9k-px-5.3.3.CSCuy81837.pie"],
+                         "disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0")
+        self.assertEqual(index.internal_to_external["disk0:asr9k-mcast-px-5.3.3"], "asr9k-mcast-px.pie-5.3.3")
+        # matching does not rename the requested packages
+        self.assertTrue("asr9k-mcast-px.pie-5.3.3" in map(str, requested))
+
+    def test_import_from_cmd_skips_other_tokens(self):
+        output = """
+RP/0/RSP0/CPU0:R3#admin show install active summary
+Mon May 16 21:41:08.690 UTC
+  Active Packages:
+    disk0:asr9k-mini-px-5.3.3
+    disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0
+  Boot image: disk0:asr9k-os-mbi-5.3.3/0x100305/mbiasr9k-rsp3.vm
+"""
+        pkgs = plib.SoftwarePackage.from_show_cmd(output)
+        self.assertEqual(sorted(map(str, pkgs)), ["disk0:asr9k-mini-px-5.3.3", "disk0:asr9k-px-5.3.3.CSCuy81837-1.0.0"])
+
@@ -0,0 +1,183 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_check_protocol_states.ios_xr import protocols
+from csmpe.core_plugins.csm_check_protocol_states.protocol_snapshot import check_protocols
+
+ISIS = """RP/0/RP0/CPU0:R1#show isis neighbor summary
+Thu May 19 18:06:11.239 UTC
+
+IS-IS isp neighbor summary:
+State         L1       L2     L1L2
+Up             0        0        {}
+Init           0        0        0
+Failed         0        0        0
+
+IS-IS core neighbor summary:
+State         L1       L2     L1L2
+Up             2        0        0
+Init           0        0        0
+Failed         0        0        0
+"""
+
+OSPF = """RP/0/RP0/CPU0:R1#show ospf neighbor
+Thu May 19 18:06:11.239 UTC
+
+* Indicates MADJ interface
+# Indicates Neighbor awaiting BFD session up
+
+Neighbors for OSPF 1
+
+Neighbor ID     Pri   State           Dead Time   Address         Interface
+192.168.0.2     1     FULL/DR         00:00:35    10.0.0.2        GigabitEthernet0/0/0/0
+    Neighbor is up for 2d01h
+192.168.0.3     1     {}        00:00:31    10.0.1.2        GigabitEthernet0/0/0/1
+    Neighbor is up for 2d01h
+10.1.1.1        1     FULL/  -        00:00:38    10.0.2.2        GigabitEthernet0/0/0/2
+    Neighbor is up for 2d01h
+
+Total neighbor count: 3
+"""
+
+BGP = """RP/0/RP0/CPU0:R1#show bgp summary
+BGP router identifier 192.168.0.1, local AS number 65000
+BGP main routing table version 100
+
+Process       RcvTblVer   bRIB/RIB   LabelVer  ImportVer  SendTblVer  StandbyVer
+Speaker             100        100        100        100         100           0
+
+Neighbor        Spk    AS MsgRcvd MsgSent   TblVer  InQ OutQ  Up/Down  St/PfxRcd
+10.0.0.2          0 65001    1234    1234      100    0    0 1d02h     {}
+10.0.0.3          0 65002       0       0        0    0    0 00:00:00 Idle
+2001:db8::2       0 65003    1234    1234      100    0    0 1d02h          7
+"""
+
+LDP = """RP/0/RP0/CPU0:R1#show mpls ldp neighbor brief
+
+Peer               GR  NSR  Up Time     Discovery   Addresses     Labels
+                                        ipv4  ipv6  ipv4  ipv6  ipv4   ipv6
+-----------------  --  ---  ----------  ----------  ----------  ------------
+10.0.0.2:0         N   N    1d02h       1     0     3     0     25     0
+{}
+"""
+
+
+class TestProtocolSnapshot(TestCase):
+    def test_isis(self):
+        snapshot = protocols.ISIS.parse(ISIS.format(1))
+        self.assertEqual(len(snapshot), 6)
+        self.assertEqual(snapshot["isp Up"], ["0", "0", "1"])
+        self.assertEqual(snapshot["core Up"], ["2", "0", "0"])
+
+        changes, unchanged = protocols.ISIS.compare(snapshot, protocols.ISIS.parse(ISIS.format(0)))
+        self.assertEqual(changes, ["ISIS isp Up changed from 0 0 1 to 0 0 0"])
+        self.assertEqual(unchanged, 5)
+
+    def test_ospf(self):
+        snapshot = protocols.OSPF.parse(OSPF.format("FULL/BDR"))
+        self.assertEqual(snapshot, {
+            "1 192.168.0.2 GigabitEthernet0/0/0/0": ["FULL"],
+            "1 192.168.0.3 GigabitEthernet0/0/0/1": ["FULL"],
+            "1 10.1.1.1 GigabitEthernet0/0/0/2": ["FULL"],
+        })
+        # the DR role change is not reported
+        self.assertEqual(protocols.OSPF.compare(snapshot, protocols.OSPF.parse(OSPF.format("FULL/DR  "))), ([], 3))
+
+        changes, unchanged = protocols.OSPF.compare(snapshot, protocols.OSPF.parse(OSPF.format("INIT/-  ")))
+        self.assertEqual(changes, ["OSPF 1 192.168.0.3 GigabitEthernet0/0/0/1 changed from FULL to INIT"])
+
+    def test_bgp(self):
+        snapshot = protocols.BGP.parse(BGP.format(100))
+        self.assertEqual(snapshot, {"10.0.0.2": ["100"], "10.0.0.3": ["Idle"], "2001:db8::2": ["7"]})
+
+        self.assertEqual(protocols.BGP.compare(snapshot, protocols.BGP.parse(BGP.format(95))), ([], 3))
+        changes, unchanged = protocols.BGP.compare(snapshot, protocols.BGP.parse(BGP.format(50)))
+        self.assertEqual(changes, ["BGP neighbor 10.0.0.2 received prefixes changed from 100 to 50"])
+        changes, unchanged = protocols.BGP.compare(snapshot, protocols.BGP.parse(BGP.format("Active")))
+        self.assertEqual(changes, ["BGP neighbor 10.0.0.2 not established after upgrade: Active"])
+
+    def test_ldp(self):
+        snapshot = protocols.LDP.parse(LDP.format("10.0.0.3:0         N   N    1d02h       1     0     3     0     25     0"))
+        self.assertEqual(snapshot, {"10.0.0.2:0": [], "10.0.0.3:0": []})
+
+        changes, unchanged = protocols.LDP.compare(snapshot, protocols.LDP.parse(LDP.format("")))
+        self.assertEqual(changes, ["LDP 10.0.0.3:0 missing after upgrade"])
+        self.assertEqual(unchanged, 1)
+
+    def test_storage_key(self):
+        self.assertEqual(protocols.ISIS.storage_key, "isis_snapshot")
+
+
+class FakeContext(object):
+    def __init__(self, phase, storage, outputs):
+        self.phase = phase
+        self.storage = storage
+        self.outputs = outputs
+        self.warnings = []
+
+    def send_parallel(self, commands, timeout=60):
+        return [self.outputs[cmd] for cmd in commands]
+
+    def save_to_file(self, name, data):
+        return None
+
+    def info(self, message):
+        pass
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+    def save_data(self, key, data):
+        self.storage[key] = (data, None)
+
+    def load_data(self, key):
+        return self.storage.get(key, (None, None))
+
+
+class TestCheckProtocols(TestCase):
+    def test_pre_and_post_upgrade(self):
+        storage = {}
+        checks = [protocols.ISIS, protocols.BGP]
+        check_protocols(FakeContext("Pre-Upgrade", storage,
+                                    {"show isis neighbor summary": ISIS.format(1),
+                                     "show bgp summary": BGP.format(100)}), checks)
+        self.assertEqual(sorted(storage), ["bgp_snapshot", "isis_snapshot"])
+
+        ctx = FakeContext("Post-Upgrade", storage,
+                          {"show isis neighbor summary": ISIS.format(1), "show bgp summary": ""})
+        check_protocols(ctx, checks)
+        self.assertEqual(ctx.warnings, ["BGP 10.0.0.2 missing after upgrade", "BGP 10.0.0.3 missing after upgrade",
+                                        "BGP 2001:db8::2 missing after upgrade"])
+
+    def test_legacy_isis_neighbors(self):
+        storage = {"isis_neighbors": ({"isp": {"Up": ["0", "0", "2"], "Init": ["0", "0", "0"]},
+                                       "core": {"Up": ["2", "0", "0"]}}, None)}
+        ctx = FakeContext("Post-Upgrade", storage, {"show isis neighbor summary": ISIS.format(1)})
+        check_protocols(ctx, [protocols.ISIS])
+        self.assertEqual(ctx.warnings, ["ISIS isp Up changed from 0 0 2 to 0 0 1"])
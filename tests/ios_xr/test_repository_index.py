@@ -0,0 +1,128 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_filesystem_check.ios_xr import repository_index
+from csmpe.core_plugins.csm_filesystem_check.ios_xr.disk_space_check import Plugin
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import ServerType
+
+PIE_INFO = """RP/0/RSP0/CPU0:R3#admin show install pie-info {}
+Contents of pie file '{}':
+    Expiry date       : Jan 19, 2017 02:55:56 UTC
+    Uncompressed size : 5734563
+    Compressed size   : 2041234
+"""
+
+
+class FakeServer(object):
+    def __init__(self, server_type, server_directory):
+        self.server_type = server_type
+        self.server_directory = server_directory
+
+
+class FakeJob(object):
+    server_directory = "smus"
+
+
+class FakeCSM(object):
+    install_job = FakeJob()
+
+
+class FakeContext(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+        self.commands = []
+        self.errors = []
+
+    def send_parallel(self, commands, timeout=60):
+        self.commands.extend(commands)
+        return [PIE_INFO.format(cmd.split()[-1], cmd.split()[-1]) for cmd in commands]
+
+    def info(self, message):
+        pass
+
+    def error(self, message):
+        self.errors.append(message)
+
+
+class TestRepositoryIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write("asr9k-px-5.3.3.CSCuy81837.pie", 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, filename, size):
+        with open(os.path.join(self.directory, filename), "wb") as f:
+            f.write(b"\0" * size)
+
+    def test_size(self):
+        index = repository_index.repository_index(self.directory)
+        self.assertIs(index, repository_index.repository_index(self.directory + "/"))
+        self.assertEqual(index.size("asr9k-px-5.3.3.CSCuy81837.pie"), 1000)
+        self.assertIsNone(index.size("asr9k-px-5.3.3.CSCuy99999.pie"))
+
+    def test_invalidated_by_directory_change(self):
+        index = repository_index.RepositoryIndex(self.directory)
+        self.assertIsNone(index.size("asr9k-mini-px.pie-5.3.3"))
+        self.write("asr9k-mini-px.pie-5.3.3", 2000)
+        os.utime(self.directory, (0, 1))
+        self.assertEqual(index.size("asr9k-mini-px.pie-5.3.3"), 2000)
+
+    def test_local_repository_directory(self):
+        ctx = FakeContext()
+        self.assertEqual(repository_index.local_repository_directory(ctx, self.directory), self.directory)
+        self.assertEqual(repository_index.local_repository_directory(ctx, "file://" + self.directory), self.directory)
+        self.assertIsNone(repository_index.local_repository_directory(ctx, "tftp://10.0.0.1/smus"))
+
+        ctx = FakeContext(server_repository_directory=self.directory)
+        self.assertEqual(repository_index.local_repository_directory(ctx, "http://10.0.0.2:8000"), self.directory)
+
+    def test_csm_tftp_server(self):
+        os.mkdir(os.path.join(self.directory, "smus"))
+        ctx = FakeContext(get_server=FakeServer(ServerType.TFTP_SERVER, self.directory), _csm=FakeCSM())
+        self.assertEqual(repository_index.local_repository_directory(ctx, "tftp://10.0.0.1/smus"),
+                         os.path.join(self.directory, "smus"))
+        ctx = FakeContext(get_server=FakeServer(ServerType.FTP_SERVER, self.directory), _csm=FakeCSM())
+        self.assertIsNone(repository_index.local_repository_directory(ctx, "ftp://10.0.0.1/smus"))
+
+    def test_package_sizes(self):
+        ctx = FakeContext(server_repository_directory=self.directory)
+        plugin = Plugin(ctx)
+        sizes = plugin._get_package_sizes(["asr9k-px-5.3.3.CSCuy81837.pie", "asr9k-px-5.3.3.CSCuy99999.pie"],
+                                          "tftp://10.0.0.1/smus")
+        self.assertEqual(sizes, {"asr9k-px-5.3.3.CSCuy81837.pie": 1000, "asr9k-px-5.3.3.CSCuy99999.pie": 2041234})
+        self.assertEqual(ctx.commands, ["admin show install pie-info tftp://10.0.0.1/smus/asr9k-px-5.3.3.CSCuy99999.pie"])
+
+        self.assertIsNone(plugin._get_package_sizes(["asr9k-px-5.3.3.CSCuy99999.pie"], "sftp://10.0.0.1/smus"))
+        self.assertEqual(plugin._get_package_sizes(["asr9k-px-5.3.3.CSCuy81837.pie"], "sftp://10.0.0.1/smus"),
+                         {"asr9k-px-5.3.3.CSCuy81837.pie": 1000})
@@ -0,0 +1,177 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, skipIf
+
+from csmpe.core_plugins.csm_install_operations.ios_xr import simple_server_helper as ssh
+from csmpe.core_plugins.csm_install_operations.ios_xr.utils import ServerType
+
+try:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import FTPServer as LocalFTPServer
+except ImportError:
+    LocalFTPServer = None
+
+
+class Server(object):
+    def __init__(self, server_type, server_directory, server_url=None):
+        self.server_type = server_type
+        self.server_directory = server_directory
+        self.server_url = server_url
+        self.username = "csm"
+        self.password = "csm"
+
+
+class CountingServer(ssh.TFTPServer):
+    """Local directory server counting the pooled connections."""
+    def __init__(self, server, **kwargs):
+        ssh.TFTPServer.__init__(self, server, **kwargs)
+        self.connects = 0
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        with self.lock:
+            self.connects += 1
+        return object()
+
+
+class TestServerImpl(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.repository = tempfile.mkdtemp()
+        self.files = []
+        for index in range(8):
+            path = os.path.join(self.source, "config{}.cfg".format(index))
+            with open(path, "wb") as source_file:
+                source_file.write(b"hostname router{}\n".format(index) * 1000)
+            self.files.append((path, "migrated{}.cfg".format(index)))
+
+    def tearDown(self):
+        shutil.rmtree(self.source)
+        shutil.rmtree(self.repository)
+
+    def check_uploaded(self, directory):
+        for path, dest_filename in self.files:
+            with open(path, "rb") as source_file, open(os.path.join(directory, dest_filename), "rb") as dest_file:
+                self.assertEqual(source_file.read(), dest_file.read())
+
+    def test_upload_files(self):
+        server = CountingServer(Server(ServerType.TFTP_SERVER, self.repository), block_size=1024, max_workers=3)
+        finished = []
+        results = server.upload_files(self.files, callback=finished.append)
+        self.assertEqual(len(finished), len(self.files))
+        self.assertEqual([stats.dest_filename for stats in results], [dest for _, dest in self.files])
+        self.assertTrue(all(stats.error is None and stats.bytes == os.path.getsize(path)
+                            for stats, (path, _) in zip(results, self.files)))
+        self.assertTrue(server.connects <= 3)
+        self.check_uploaded(self.repository)
+
+    def test_upload_file_reuses_connection(self):
+        server = CountingServer(Server(ServerType.TFTP_SERVER, self.repository))
+        blocks = []
+        for path, dest_filename in self.files[:2]:
+            server.upload_file(path, dest_filename, progress=blocks.append)
+        self.assertEqual(server.connects, 1)
+        self.assertEqual(sum(blocks), sum(os.path.getsize(path) for path, _ in self.files[:2]))
+
+    def test_upload_error(self):
+        server = ssh.TFTPServer(Server(ServerType.TFTP_SERVER, os.path.join(self.repository, "missing")))
+        results = server.upload_files(self.files[:1])
+        self.assertIsNotNone(results[0].error)
+
+    @skipIf(LocalFTPServer is None, "pyftpdlib not installed")
+    def test_ftp_upload_files(self):
+        authorizer = DummyAuthorizer()
+        authorizer.add_user("csm", "csm", self.repository, perm="elradfmw")
+        handler = FTPHandler
+        handler.authorizer = authorizer
+        ftp_server = LocalFTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=ftp_server.serve_forever, kwargs={"timeout": 0.1})
+        thread.daemon = True
+        thread.start()
+        try:
+            host, port = ftp_server.address
+            server = ssh.FTPServer(Server(ServerType.FTP_SERVER, "", "{}".format(host)))
+            ssh.ftplib.FTP.port = port
+            results = server.upload_files(self.files)
+            server.close()
+            self.assertTrue(all(stats.error is None for stats in results))
+            self.check_uploaded(self.repository)
+        finally:
+            ssh.ftplib.FTP.port = 21
+            ftp_server.close_all()
+
+
+class TestCopyLocalFile(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, "image.tar")
+        with open(self.source, "wb") as source_file:
+            source_file.write(b"\0" * 100000)
+        self.dest = os.path.join(self.directory, "staged.tar")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_copied(self):
+        with open(self.source, "rb") as source_file, open(self.dest, "rb") as dest_file:
+            self.assertEqual(source_file.read(), dest_file.read())
+
+    def test_automatic(self):
+        blocks = []
+        method = ssh.copy_local_file(self.source, self.dest, callback=blocks.append)
+        self.assertIn(method, ssh.LOCAL_TRANSFER_METHODS)
+        self.assertEqual(sum(blocks), 100000)
+        self.check_copied()
+        self.assertNotEqual(os.stat(self.source).st_ino, os.stat(self.dest).st_ino)
+
+    def test_link(self):
+        method = ssh.copy_local_file(self.source, self.dest, methods=(ssh.LINK, ssh.COPY))
+        self.assertEqual(method, ssh.LINK)
+        self.assertEqual(os.stat(self.source).st_ino, os.stat(self.dest).st_ino)
+
+    def test_fallback(self):
+        method = ssh.copy_local_file(self.source, self.dest, methods=(ssh.SENDFILE, ssh.COPY))
+        self.assertEqual(method, ssh.SENDFILE if hasattr(os, "sendfile") else ssh.COPY)
+        self.check_copied()
+
+    def test_overwrite(self):
+        with open(self.dest, "wb") as dest_file:
+            dest_file.write(b"old")
+        self.assertEqual(ssh.copy_local_file(self.source, self.dest, methods=(ssh.COPY,)), ssh.COPY)
+        self.check_copied()
+
+    def test_upload_reports_method(self):
+        server = ssh.TFTPServer(Server(ServerType.LOCAL_SERVER, self.directory), methods=(ssh.COPY,))
+        stats = server.upload_file(self.source, "staged.tar")
+        self.assertEqual(stats.method, ssh.COPY)
+        self.check_copied()
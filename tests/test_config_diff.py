@@ -0,0 +1,135 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_config_capture import config_diff
+
+PRE = """RP/0/RSP0/CPU0:R1#show running-config
+Mon May 16 21:41:08.690 UTC
+Building configuration...
+!! IOS XR Configuration 5.3.3
+!! Last configuration change at Mon May 16 21:00:00 2016 by cisco
+!
+hostname R1
+interface Bundle-Ether1
+ description core
+ ipv4 address 10.0.0.1 255.255.255.252
+!
+interface GigabitEthernet0/0/0/0
+ shutdown
+!
+router isis core
+ net 49.0001.0000.0000.0001.00
+ address-family ipv4 unicast
+  metric-style wide
+ !
+ interface Bundle-Ether1
+  point-to-point
+ !
+!
+end
+"""
+
+POST = """RP/0/RSP0/CPU0:R1#show running-config
+Tue May 17 08:00:00.000 UTC
+Building configuration...
+!! IOS XR Configuration 6.1.2
+!
+hostname R1
+interface GigabitEthernet0/0/0/0
+ shutdown
+!
+interface Bundle-Ether1
+ description core
+ ipv4 address 10.0.0.1 255.255.255.252
+!
+router isis core
+ net 49.0001.0000.0000.0001.00
+ address-family ipv4 unicast
+  metric-style wide
+  mpls traffic-eng level-2-only
+ !
+ interface Bundle-Ether1
+ !
+!
+ntp
+ server 10.1.1.1
+!
+end
+"""
+
+
+class TestConfigDiff(TestCase):
+    def test_parse(self):
+        root = config_diff.parse_config(PRE)
+        self.assertEqual(sorted(node.line for node in root.children.values()),
+                         ["hostname R1", "interface Bundle-Ether1", "interface GigabitEthernet0/0/0/0",
+                          "router isis core"])
+        isis = root.children["router isis core"]
+        self.assertEqual(isis.children["address-family ipv4 unicast"].children.keys(), ["metric-style wide"])
+        self.assertEqual(len(root), 13)
+
+    def test_identical_and_reordered(self):
+        self.assertEqual(config_diff.diff_configs(PRE, PRE), [])
+        reordered = PRE.replace("hostname R1\n", "") + "hostname R1\n"
+        self.assertEqual(config_diff.diff_configs(PRE, reordered), [])
+
+    def test_diff(self):
+        changes = config_diff.diff_configs(PRE, POST)
+        self.assertEqual([(change.kind, change.path, change.node.line) for change in changes], [
+            ("+", (), "ntp"),
+            ("+", ("router isis core", "address-family ipv4 unicast"), "mpls traffic-eng level-2-only"),
+            ("-", ("router isis core", "interface Bundle-Ether1"), "point-to-point"),
+        ])
+        self.assertEqual(config_diff.summarize(changes), (3, 1))
+        self.assertEqual(config_diff.format_diff(changes).splitlines(), [
+            "+ ntp",
+            "+  server 10.1.1.1",
+            "  router isis core",
+            "   address-family ipv4 unicast",
+            "+   mpls traffic-eng level-2-only",
+            "   interface Bundle-Ether1",
+            "-   point-to-point",
+        ])
+
+    def test_repeated_lines(self):
+        old = "route-policy P\n  pass\n  pass\nend-policy\n"
+        new = "route-policy P\n  pass\nend-policy\n"
+        changes = config_diff.diff_configs(old, new)
+        self.assertEqual([(change.kind, change.path, change.node.line) for change in changes],
+                         [("-", ("route-policy P",), "pass")])
+
+    def test_changed_block_only(self):
+        old = "hostname R1\nlogging 10.0.0.1\nlogging 10.0.0.1\ninterface Loopback0\n ipv4 address 1.1.1.1 255.255.255.255\n"
+        new = "hostname R1\nlogging 10.0.0.1\ninterface Loopback0\n ipv4 address 1.1.1.2 255.255.255.255\n"
+        changes = config_diff.diff_configs(old, new)
+        self.assertEqual([(change.kind, change.path, change.node.line) for change in changes], [
+            ("-", (), "logging 10.0.0.1"),
+            ("-", ("interface Loopback0",), "ipv4 address 1.1.1.1 255.255.255.255"),
+            ("+", ("interface Loopback0",), "ipv4 address 1.1.1.2 255.255.255.255"),
+        ])
@@ -0,0 +1,297 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import httplib
+import os
+import re
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from csmpe import file_server
+
+
+def tftp_put(address, filename, data, block_size=None, duplicate_block=None):
+    """Minimal TFTP client writing the data, returns the error message or None."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(5)
+    try:
+        request = struct.pack("!H", file_server.WRQ) + filename.encode("ascii") + b"\0octet\0"
+        if block_size:
+            request += b"blksize\0" + str(block_size).encode("ascii") + b"\0"
+        sock.sendto(request, address)
+        reply, peer = sock.recvfrom(1024)
+        opcode = struct.unpack("!H", reply[:2])[0]
+        if opcode == file_server.ERROR:
+            return reply[4:-1].decode("ascii")
+        if opcode == file_server.OACK:
+            block_size = int(reply[2:].split(b"\0")[1])
+        else:
+            block_size = file_server.DEFAULT_BLOCK_SIZE
+        block = 1
+        offset = 0
+        while True:
+            chunk = data[offset:offset + block_size]
+            packet = struct.pack("!HH", file_server.DATA, block) + chunk
+            sock.sendto(packet, peer)
+            ack = sock.recvfrom(1024)[0]
+            assert struct.unpack("!HH", ack[:4]) == (file_server.ACK, block)
+            if block == duplicate_block:
+                # the ACK lost, the block is sent again and acknowledged again
+                sock.sendto(packet, peer)
+                ack = sock.recvfrom(1024)[0]
+                assert struct.unpack("!HH", ack[:4]) == (file_server.ACK, block)
+            offset += block_size
+            block += 1
+            if len(chunk) < block_size:
+                return None
+    finally:
+        sock.close()
+
+
+class FakeContext(object):
+    """The device copying the file to the TFTP URL in the copy command."""
+    prompt = re.compile("#")
+    TIMEOUT = object()
+    CommandTimeoutError = Exception
+
+    def __init__(self, data, device_push=True, host_urls=("telnet://127.0.0.1",)):
+        self.data = data
+        self.device_push = device_push
+        self.host_urls = list(host_urls)
+        self.commands = []
+        self.messages = []
+
+    def run_fsm(self, name, command, events, transitions, timeout, max_transitions=20):
+        self.commands.append(command)
+        match = re.search(r"tftp://([^:/]+)(?::(\d+))?/(\S+)", command)
+        port = int(match.group(2) or file_server.TFTP_PORT)
+        return tftp_put((match.group(1), port), match.group(3), self.data) is None
+
+    def info(self, message):
+        self.messages.append(message)
+
+    def warning(self, message):
+        self.messages.append(message)
+
+
+class TestTFTPReceiver(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.receiver = file_server.TFTPReceiver(self.directory, host="127.0.0.1", port=0, timeout=1).start()
+        self.address = self.receiver.address
+
+    def tearDown(self):
+        self.receiver.stop()
+        shutil.rmtree(self.directory)
+
+    def _received(self, filename):
+        path = self.receiver.wait_for(filename, 5)
+        self.assertTrue(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_receive(self):
+        data = b"".join(b"interface GigabitEthernet0/0/0/%d\n" % i for i in range(100))
+        self.receiver.expect("config")
+        self.assertEqual(tftp_put(self.address, "config", data), None)
+        self.assertEqual(self._received("config"), data)
+
+    def test_block_size_option(self):
+        data = os.urandom(20000)
+        self.receiver.expect("config")
+        self.assertEqual(tftp_put(self.address, "config", data, block_size=8192), None)
+        self.assertEqual(self._received("config"), data)
+
+    def test_block_size_multiple(self):
+        data = b"x" * 1024
+        self.receiver.expect("config")
+        self.assertEqual(tftp_put(self.address, "config", data), None)
+        self.assertEqual(self._received("config"), data)
+
+    def test_duplicate_block(self):
+        data = b"y" * 2000
+        self.receiver.expect("config")
+        self.assertEqual(tftp_put(self.address, "config", data, duplicate_block=2), None)
+        self.assertEqual(self._received("config"), data)
+
+    def test_unexpected_file(self):
+        self.receiver.expect("config")
+        self.assertTrue("Unexpected" in tftp_put(self.address, "other", b"data"))
+        self.assertTrue("Unexpected" in tftp_put(self.address, "../config", b"data"))
+        self.assertEqual(self.receiver.wait_for("other", 0.1), None)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unexpected_peer(self):
+        self.receiver.peers = {"10.0.0.2"}
+        self.receiver.expect("config")
+        self.assertTrue("Unexpected peer" in tftp_put(self.address, "config", b"data"))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_short_packet(self):
+        self.receiver.expect("config")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(5)
+        try:
+            sock.sendto(struct.pack("!H", file_server.WRQ) + b"config\0octet\0", self.address)
+            peer = sock.recvfrom(1024)[1]
+            sock.sendto(struct.pack("!H", file_server.DATA), peer)
+            reply = sock.recvfrom(1024)[0]
+        finally:
+            sock.close()
+        self.assertEqual(struct.unpack("!HH", reply[:4]), (file_server.ERROR, file_server.ERROR_ILLEGAL_OPERATION))
+        self.assertEqual(self.receiver.wait_for("config", 0.1), None)
+
+    def test_url(self):
+        self.assertRaises(ValueError, self.receiver.url, "10.0.0.1", "config")
+
+
+class TestReceiveFromDevice(TestCase):
+    def setUp(self):
+        # the embedded server binds the well known TFTP port, a free port stands in for it
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        self.tftp_port = file_server.TFTP_PORT
+        file_server.TFTP_PORT = sock.getsockname()[1]
+        sock.close()
+
+    def tearDown(self):
+        file_server.TFTP_PORT = self.tftp_port
+
+    def test_receive(self):
+        ctx = FakeContext("hostname R1\n")
+        self.assertEqual(file_server.receive_from_device(ctx, "running-config", "admin.cfg", command="admin copy",
+                                                         timeout=10), "hostname R1\n")
+        self.assertTrue(ctx.commands[0].startswith("admin copy running-config tftp://127.0.0.1"))
+
+    def test_url(self):
+        with file_server.TFTPReceiver(tempfile.gettempdir(), host="127.0.0.1") as receiver:
+            self.assertEqual(receiver.url("10.0.0.1", "config"), "tftp://10.0.0.1/config")
+
+    def test_port_unavailable(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", file_server.TFTP_PORT))
+        try:
+            ctx = FakeContext("hostname R1\n")
+            self.assertEqual(file_server.receive_from_device(ctx, "running-config", "xr.cfg"), None)
+        finally:
+            sock.close()
+        self.assertEqual(ctx.commands, [])
+        self.assertTrue(ctx.messages[-1].startswith("Unable to start the embedded TFTP server"))
+
+    def test_disabled(self):
+        ctx = FakeContext("hostname R1\n", device_push=False)
+        self.assertEqual(file_server.receive_from_device(ctx, "running-config", "xr.cfg"), None)
+        self.assertEqual(ctx.commands, [])
+
+    def test_jumphost(self):
+        ctx = FakeContext("hostname R1\n", host_urls=[["telnet://jumphost", "telnet://127.0.0.1"]])
+        self.assertEqual(file_server.receive_from_device(ctx, "running-config", "xr.cfg"), None)
+        self.assertEqual(ctx.commands, [])
+
+
+class TestImageServer(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.repository = os.path.join(self.directory, "repository")
+        os.makedirs(self.repository)
+        self.image = os.urandom(3 * 1024 * 1024 + 17)
+        with open(os.path.join(self.repository, "asr9k-mini-x64.tar"), "wb") as f:
+            f.write(self.image)
+        with open(os.path.join(self.directory, "secret"), "w") as f:
+            f.write("secret")
+        self.server = file_server.ImageServer(self.repository, host="127.0.0.1").start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def _request(self, path, method="GET"):
+        connection = httplib.HTTPConnection("127.0.0.1", self.server.address[1], timeout=10)
+        try:
+            connection.request(method, path)
+            response = connection.getresponse()
+            return response.status, response.getheader("content-length"), response.read()
+        finally:
+            connection.close()
+
+    def test_get(self):
+        status, length, body = self._request("/asr9k-mini-x64.tar")
+        self.assertEqual(status, 200)
+        self.assertEqual(int(length), len(self.image))
+        self.assertEqual(body, self.image)
+        self.assertEqual(len(self.server.stats), 1)
+        # the stats are updated after the last write returns
+        deadline = time.time() + 5
+        while self.server.stats[0].bytes < len(self.image) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server.stats[0].bytes, len(self.image))
+        self.assertEqual(self.server.stats[0].error, None)
+
+    def test_head(self):
+        status, length, body = self._request("/asr9k-mini-x64.tar", method="HEAD")
+        self.assertEqual((status, int(length), body), (200, len(self.image), ""))
+        self.assertEqual(self.server.stats, [])
+
+    def test_not_found(self):
+        self.assertEqual(self._request("/missing.tar")[0], 404)
+        self.assertEqual(self._request("/../secret")[0], 404)
+        self.assertEqual(self._request("/%2e%2e/secret")[0], 404)
+        self.assertEqual(self._request("/")[0], 404)
+
+    def test_concurrent_transfers(self):
+        results = []
+
+        def fetch():
+            results.append(self._request("/asr9k-mini-x64.tar")[2] == self.image)
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(len(self.server.stats), 8)
+
+    def test_too_many_transfers(self):
+        for _ in range(file_server.DEFAULT_MAX_CONNECTIONS):
+            self.server.slots.acquire()
+        self.assertEqual(self._request("/asr9k-mini-x64.tar")[0], 503)
+
+    def test_serve_repository(self):
+        ctx = FakeContext(None)
+        server = file_server.serve_repository(ctx, self.repository)
+        try:
+            self.assertEqual(ctx.server_repository_url, "http://127.0.0.1:{}".format(server.address[1]))
+        finally:
+            server.stop()
+        ctx = FakeContext(None, host_urls=[["telnet://jumphost", "telnet://127.0.0.1"]])
+        self.assertEqual(file_server.serve_repository(ctx, self.repository), None)
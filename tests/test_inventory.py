@@ -0,0 +1,152 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe import inventory
+from csmpe.context import PluginContext
+
+ASR9K = """RP/0/RSP0/CPU0:R3#admin show platform
+Tue May 17 08:23:19.612 UTC
+Node            Type                      State            Config State
+-----------------------------------------------------------------------------
+0/RSP0/CPU0     A9K-RSP440-SE(Active)     IOS XR RUN       PWR,NSHUT,MON
+0/FT0/SP        ASR-9006-FAN              READY
+0/1/CPU0        A9K-40GE-E                IOS XR RUN       PWR,NSHUT,MON
+0/2/CPU0        A9K-MOD80-SE              UNPOWERED        NPWR,NSHUT,MON
+"""
+
+CRS = """RP/0/RP0/CPU0:CRS-X-Deploy2#admin show platform
+Tue May 17 21:11:56.915 UTC
+Node          Type              PLIM               State           Config State
+------------- ----------------- ------------------ --------------- ---------------
+0/0/CPU0      MSC-X             40-10GbE           IOS XR RUN      PWR,NSHUT,MON
+0/3/CPU0      MSC-140G          N/A                UNPOWERED       NPWR,NSHUT,MON
+"""
+
+EXR = """sysadmin-vm:0_RSP0# show platform
+Thu May  19 05:15:38.345 UTC
+Location  Card Type               HW State      SW State      Config State
+----------------------------------------------------------------------------
+0/RSP0    A9K-RSP880-SE           OPERATIONAL   OPERATIONAL   NSHUT
+0/RSP1    A9K-RSP880-SE           POWERED_OFF   SW_INACTIVE   NSHUT
+"""
+
+
+EXR_XR = """RP/0/RSP0/CPU0:R1#show platform
+
+Node              Type                       State             Config state
+--------------------------------------------------------------------------------
+0/RSP0/CPU0       A9K-RSP880-SE(Active)      IOS XR RUN        NSHUT
+0/0/CPU0          A9K-8X100GE-SE             IOS XR RUN        NSHUT
+"""
+
+
+class FakeConnection(object):
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def send(self, cmd, timeout=60):
+        self.commands.append(cmd)
+        return self.outputs.get(cmd, "")
+
+    def reload(self, *args, **kwargs):
+        return True
+
+
+class TestParseShowPlatform(TestCase):
+    def test_asr9k(self):
+        nodes = inventory.parse_show_platform(ASR9K)
+        self.assertEqual(list(nodes), ["0/RSP0/CPU0", "0/FT0/SP", "0/1/CPU0", "0/2/CPU0"])
+        self.assertEqual(nodes["0/RSP0/CPU0"], inventory.Node("0/RSP0/CPU0", "A9K-RSP440-SE(Active)", None,
+                                                              "IOS XR RUN", None, "PWR,NSHUT,MON"))
+        self.assertEqual(nodes["0/FT0/SP"].state, "READY")
+        self.assertIsNone(nodes["0/FT0/SP"].config_state)
+
+    def test_crs(self):
+        nodes = inventory.parse_show_platform(CRS)
+        self.assertEqual(nodes["0/0/CPU0"].plim, "40-10GbE")
+        self.assertEqual(nodes["0/3/CPU0"].state, "UNPOWERED")
+
+    def test_exr(self):
+        nodes = inventory.parse_show_platform(EXR)
+        self.assertEqual(nodes["0/RSP1"], inventory.Node("0/RSP1", "A9K-RSP880-SE", None, "POWERED_OFF",
+                                                         "SW_INACTIVE", "NSHUT"))
+
+    def test_exr_xr_leading_blank_line(self):
+        nodes = inventory.parse_show_platform(EXR_XR)
+        self.assertEqual(list(nodes), ["0/RSP0/CPU0", "0/0/CPU0"])
+        self.assertEqual(nodes["0/RSP0/CPU0"], inventory.Node("0/RSP0/CPU0", "A9K-RSP880-SE(Active)", None,
+                                                              "IOS XR RUN", None, "NSHUT"))
+
+    def test_no_header(self):
+        self.assertEqual(inventory.parse_show_platform("% Invalid input detected"), {})
+
+    def test_as_dict(self):
+        nodes = inventory.parse_show_platform(ASR9K)
+        self.assertEqual(inventory.as_dict(nodes)["0/1/CPU0"],
+                         {"type": "A9K-40GE-E", "state": "IOS XR RUN", "config_state": "PWR,NSHUT,MON"})
+
+
+class TestInventory(TestCase):
+    def test_cached_per_epoch(self):
+        connection = FakeConnection({"admin show platform": ASR9K})
+        cache = inventory.Inventory(connection.send)
+        self.assertIs(cache.nodes(), cache.nodes())
+        self.assertEqual(cache.output(), ASR9K)
+        self.assertEqual(connection.commands, ["admin show platform"])
+
+        cache.invalidate()
+        self.assertEqual(cache.epoch, 1)
+        cache.nodes()
+        self.assertEqual(connection.commands, ["admin show platform"] * 2)
+
+    def test_admin(self):
+        connection = FakeConnection({"show platform": EXR})
+        cache = inventory.Inventory(connection.send)
+        self.assertEqual(list(cache.nodes("show platform", admin=True)), ["0/RSP0", "0/RSP1"])
+        cache.nodes("show platform", admin=True)
+        self.assertEqual(connection.commands, ["admin", "show platform", "exit"])
+
+    def test_refresh(self):
+        connection = FakeConnection({"admin show platform": CRS})
+        cache = inventory.Inventory(connection.send)
+        cache.nodes()
+        connection.outputs["admin show platform"] = ASR9K
+        self.assertEqual(len(cache.refresh()), 4)
+        self.assertEqual(len(cache.nodes()), 4)
+        self.assertEqual(len(connection.commands), 2)
+
+    def test_context_reload_invalidates(self):
+        ctx = PluginContext()
+        ctx._connection = FakeConnection({"admin show platform": ASR9K})
+        ctx.inventory.nodes()
+        ctx.reload()
+        self.assertEqual(ctx.inventory.epoch, 1)
+        ctx.inventory.nodes()
+        self.assertEqual(ctx._connection.commands, ["admin show platform"] * 2)
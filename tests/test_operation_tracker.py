@@ -0,0 +1,134 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import re
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.operation_tracker import OperationTracker
+
+
+class FakeController(object):
+    before = None
+    after = None
+
+
+class FakeFSMContext(object):
+    def __init__(self):
+        self.ctrl = FakeController()
+
+
+class FakeContext(object):
+    """Replays the session stream. Each run_fsm call consumes one stream chunk, then times out."""
+    prompt = re.compile("RP/0/RSP0/CPU0:ios#")
+    TIMEOUT = object()
+
+    def __init__(self, stream, polls):
+        self.stream = list(stream)
+        self.polls = list(polls)
+        self.sent = []
+        self.statuses = []
+
+    def run_fsm(self, name, command, events, transitions, timeout, max_transitions=20):
+        chunk = self.stream.pop(0) if self.stream else ""
+        position = 0
+        while True:
+            matches = [(event.search(chunk, position), event) for event in events if event is not self.TIMEOUT]
+            matches = [(match, event) for match, event in matches if match]
+            if not matches:
+                return True
+            match, event = min(matches, key=lambda item: item[0].start())
+            before, position = chunk[position:match.start()], match.end()
+            for transition_event, states, next_state, action, _ in transitions:
+                if transition_event is event:
+                    fsm_ctx = FakeFSMContext()
+                    fsm_ctx.ctrl.before = before
+                    fsm_ctx.ctrl.after = match.group(0)
+                    if action:
+                        action(fsm_ctx)
+                    if next_state == -1:
+                        return True
+
+    def send(self, cmd):
+        self.sent.append(cmd)
+        return self.polls.pop(0)
+
+    def post_status(self, message):
+        self.statuses.append(message)
+
+    def info(self, message):
+        pass
+
+
+def make_tracker(ctx):
+    return OperationTracker(ctx, "17",
+                            success=r"Install operation 17 finished successfully",
+                            failure=r"Install operation 17 aborted",
+                            progress=r"The install operation 17 is (\d+)% complete",
+                            no_install="No install operation in progress",
+                            cmd_show_install_request="show install request")
+
+
+class TestOperationTracker(TestCase):
+    def test_success_from_stream(self):
+        ctx = FakeContext(["RP/0/RSP0/CPU0:ios#May 24 22:25:43 Install operation 17 finished successfully"], [])
+        tracker = make_tracker(ctx)
+        tracker.wait()
+        self.assertTrue(tracker.finished)
+        self.assertTrue(tracker.succeeded)
+        self.assertEqual(ctx.sent, [])
+
+    def test_poll_when_quiet(self):
+        ctx = FakeContext(["", "May 24 22:30:01 Install operation 17 aborted"],
+                          ["The install operation 17 is 30% complete"])
+        tracker = make_tracker(ctx)
+        tracker.wait()
+        self.assertEqual(ctx.sent, ["show install request"])
+        self.assertEqual(tracker.progress, 30)
+        self.assertFalse(tracker.succeeded)
+
+    def test_finished_when_no_install(self):
+        ctx = FakeContext([], ["No install operation in progress"])
+        tracker = make_tracker(ctx)
+        tracker.wait()
+        self.assertTrue(tracker.finished)
+        self.assertIsNone(tracker.succeeded)
+
+    def test_other_operation_ignored(self):
+        ctx = FakeContext(["", ""], ["The install operation 16 is 30% complete",
+                                     "No install operation in progress"])
+        tracker = make_tracker(ctx)
+        output = tracker.wait()
+        self.assertIsNone(tracker.progress)
+        self.assertEqual(ctx.statuses, [])
+        self.assertEqual(output, "The install operation 16 is 30% completeNo install operation in progress")
+
+    def test_output_accumulated(self):
+        ctx = FakeContext(["Info: starting\nThe install operation 17 is 50% complete\n"
+                           "May 24 22:25:43 Install operation 17 finished successfully"], [])
+        output = make_tracker(ctx).wait()
+        self.assertEqual(output, "Info: starting\nThe install operation 17 is 50% complete\n"
+                                 "May 24 22:25:43 Install operation 17 finished successfully")
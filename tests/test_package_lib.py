@@ -0,0 +1,78 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations.package_lib import XRPackage, NCS6KPackage, XEPackage, NXOSPackage
+
+
+class TestGrammar(TestCase):
+    def check(self, package_class, packages):
+        for package, attributes in packages.items():
+            sp = package_class(package)
+            self.assertTrue(sp.is_valid(), package)
+            for attribute, value in attributes.items():
+                a = getattr(sp, attribute)
+                self.assertEqual(a, value, "{}: {}!={}".format(package, attribute, value))
+
+    def test_ncs6k(self):
+        self.check(NCS6KPackage, {
+            "ncs6k-mgbl-5.2.4": {"platform": "ncs6k", "package_type": "mgbl", "version": "5.2.4", "smu": None},
+            "ncs6k-5.2.5.47I.CSCuy47880-0.0.4.i": {
+                "platform": "ncs6k", "package_type": None, "version": "5.2.5.47I",
+                "smu": "CSCuy47880", "subversion": "0.0.4"},
+        })
+
+    def test_xe(self):
+        self.check(XEPackage, {
+            "bootflash:asr900rsp1-universalk9_npe.03.16.00.S.155-3.S-ext.bin": {
+                "platform": "asr900", "package_type": "universalk9_npe", "version": "03.16.00.S"},
+            "asr920-universalk9_npe.16.06.01.SPA.bin": {
+                "platform": "asr920", "package_type": "universalk9_npe", "version": "16.06.01"},
+        })
+
+    def test_nxos(self):
+        self.check(NXOSPackage, {
+            "nxos.7.0.3.I5.1.bin": {"platform": "nxos", "version": "7.0.3.I5.1", "smu": None},
+            "nxos.CSCvb12345-n9k_ALL-1.0.0-7.0.3.I5.1.lib32_n9000": {
+                "platform": "nxos", "version": "7.0.3.I5.1", "smu": "CSCvb12345", "subversion": "1.0.0"},
+        })
+
+    def test_from_show_cmd(self):
+        output = """
+        Directory of bootflash:/
+           12  -rw-  578134728  Mar 1 2017 10:11:12 +00:00  asr900rsp1-universalk9_npe.03.16.00.S.155-3.S-ext.bin
+           13  -rw-       1024  Mar 1 2017 10:11:12 +00:00  packages.conf
+        """
+        packages = XEPackage.from_show_cmd(output)
+        self.assertEqual([str(package) for package in packages],
+                         ["asr900rsp1-universalk9_npe.03.16.00.S.155-3.S-ext.bin"])
+
+    def test_flyweight(self):
+        name = "disk0:asr9k-px-5.3.3.CSCuz33376-1.0.0"
+        self.assertIs(XRPackage(name), XRPackage(name))
+        self.assertIsNot(XRPackage("ncs6k-mgbl-5.2.4"), NCS6KPackage("ncs6k-mgbl-5.2.4"))
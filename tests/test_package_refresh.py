@@ -0,0 +1,108 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.context import PluginContext
+from csmpe.core_plugins.csm_get_software_packages.ios_xr import plugin
+
+
+class FakeConnection(object):
+    os_type = "XR"
+    is_console = False
+
+    def __init__(self):
+        self.commands = []
+
+    def send(self, cmd, timeout=60):
+        self.commands.append(cmd)
+        return "output of {}".format(cmd)
+
+
+class FakeCSM(object):
+    hostname = "host"
+    host_urls = []
+    log_directory = None
+    max_sessions = 0
+    active_cli = None
+    inactive_cli = None
+    committed_cli = None
+
+    def __init__(self):
+        self._storage = {}
+
+    def save_data(self, key, value):
+        self._storage[key] = value
+
+    def load_data(self, key):
+        return self._storage.get(key)
+
+
+class TestPackageRefresh(TestCase):
+    def setUp(self):
+        self.ctx = PluginContext()
+        self.ctx._csm = FakeCSM()
+        self.ctx._connection = self.connection = FakeConnection()
+
+    def test_coalesced(self):
+        plugin.request_package_refresh(self.ctx)
+        plugin.request_package_refresh(self.ctx)
+        self.assertEqual(self.connection.commands, [])
+
+        self.ctx.run_deferred()
+        self.assertEqual(self.connection.commands, ["admin show install active summary",
+                                                    "admin show install inactive summary",
+                                                    "admin show install committed summary"])
+        self.assertEqual(self.ctx.active_cli, "output of admin show install active summary")
+
+    def test_refreshed_in_new_context(self):
+        self.ctx._csm.save_data("package_log_id", [27, 0])
+        plugin.request_package_refresh(self.ctx)
+        self.ctx.run_deferred()
+
+        # the next dispatch runs in the new context with the stored data of the previous jobs
+        csm = FakeCSM()
+        csm._storage = self.ctx._csm._storage
+        ctx = PluginContext()
+        ctx._csm = csm
+        ctx._connection = FakeConnection()
+        plugin.request_package_refresh(ctx)
+        ctx.run_deferred()
+        self.assertEqual(csm.active_cli, "output of admin show install active summary")
+        self.assertEqual(csm.inactive_cli, "output of admin show install inactive summary")
+        self.assertEqual(csm.committed_cli, "output of admin show install committed summary")
+
+    def test_deferred_failure(self):
+        calls = []
+
+        def fail(ctx):
+            raise IOError("connection lost")
+
+        self.ctx.defer("fail", fail)
+        self.ctx.defer("next", calls.append)
+        self.ctx.run_deferred()
+        self.assertEqual(calls, [self.ctx])
@@ -0,0 +1,127 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+import time
+from unittest import TestCase
+
+from csmpe import session_pool
+
+
+class FakeConnection(object):
+    """The connection recording the commands and the number of the concurrent commands."""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, hostname="host", urls=(), log_dir=None, fail_connect=False, fail_send=False):
+        self.hostname = hostname
+        self.fail_connect = fail_connect
+        self.fail_send = fail_send
+        self.commands = []
+        self.connected = False
+
+    def connect(self):
+        if self.fail_connect:
+            raise IOError("connection refused")
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def send(self, cmd, timeout=60):
+        if self.fail_send:
+            raise IOError("session closed")
+        cls = FakeConnection
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.active -= 1
+        self.commands.append(cmd)
+        return "output of {}".format(cmd)
+
+
+class TestSessionPool(TestCase):
+    def setUp(self):
+        FakeConnection.peak = 0
+        self.opened = []
+
+    def factory(self, **options):
+        def create(hostname, urls, log_dir=None):
+            connection = FakeConnection(hostname, urls, log_dir, **options)
+            self.opened.append(connection)
+            return connection
+        return create
+
+    def test_send_parallel(self):
+        primary = FakeConnection()
+        pool = session_pool.SessionPool(primary, "parallel", [], max_sessions=2, factory=self.factory())
+        commands = ["show cmd {}".format(index) for index in range(6)]
+        outputs = pool.send_parallel(commands)
+
+        self.assertEqual(outputs, ["output of {}".format(cmd) for cmd in commands])
+        self.assertEqual(pool.size, 2)
+        self.assertEqual(FakeConnection.peak, 3)
+        self.assertTrue(primary.commands)
+
+        pool.close()
+        self.assertEqual(pool.size, 0)
+        self.assertFalse(any(connection.connected for connection in self.opened))
+
+    def test_device_cap(self):
+        first = session_pool.SessionPool(FakeConnection(), "capped", [], max_sessions=1, factory=self.factory())
+        second = session_pool.SessionPool(FakeConnection(), "capped", [], max_sessions=1, factory=self.factory())
+        first.send_parallel(["show a", "show b"])
+        second.send_parallel(["show a", "show b"])
+        self.assertEqual((first.size, second.size), (1, 0))
+
+        first.close()
+        second.send_parallel(["show a", "show b"])
+        self.assertEqual(second.size, 1)
+        second.close()
+
+    def test_primary_only(self):
+        primary = FakeConnection()
+        pool = session_pool.SessionPool(primary, "refused", [], factory=self.factory(fail_connect=True))
+        outputs = pool.send_parallel(["show a", "show b", "show c"])
+        self.assertEqual(len(outputs), 3)
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(sorted(primary.commands), ["show a", "show b", "show c"])
+
+    def test_failed_session_resend(self):
+        primary = FakeConnection()
+        pool = session_pool.SessionPool(primary, "broken", [], factory=self.factory(fail_send=True))
+        outputs = pool.send_parallel(["show a", "show b", "show c"])
+        self.assertEqual(outputs, ["output of show a", "output of show b", "output of show c"])
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(sorted(primary.commands), ["show a", "show b", "show c"])
+
+    def test_primary_failure(self):
+        pool = session_pool.SessionPool(FakeConnection(fail_send=True), "failing", [], max_sessions=0)
+        self.assertRaises(IOError, pool.send_parallel, ["show a"])
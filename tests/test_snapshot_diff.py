@@ -0,0 +1,87 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_custom_commands_capture import snapshot_diff
+
+BGP_PRE = """Mon May 16 21:41:08.690 UTC
+BGP router identifier 10.0.0.1, local AS number 65000
+BGP main routing table version 1200
+BGP table version is 1200
+12345 bytes of memory
+
+Neighbor        Spk    AS MsgRcvd MsgSent   TblVer  InQ OutQ  Up/Down  St/PfxRcd
+10.0.0.2          0 65001   12345   12340     1200    0    0 1d02h          10
+10.0.0.3          0 65002     345     340     1200    0    0 00:12:34       20
+"""
+
+BGP_POST = """Tue May 17 08:00:00.000 UTC
+BGP router identifier 10.0.0.1, local AS number 65000
+BGP main routing table version 1200
+BGP table version is 45
+23456 bytes of memory
+
+Neighbor        Spk    AS MsgRcvd MsgSent   TblVer  InQ OutQ  Up/Down  St/PfxRcd
+10.0.0.2          0 65001      45      40       45    0    0 00:01:02       10
+10.0.0.3          0 65002      45      40       45    0    0 00:01:01 Active
+"""
+
+ISIS = """IS-IS core neighbors:
+System Id      Interface        SNPA           State Holdtime Type IETF-NSF
+R2             BE1              *PtoP*         Up    {}       L2   Capable
+"""
+
+
+class TestSnapshotDiff(TestCase):
+    def test_bgp_volatile_fields(self):
+        diff = snapshot_diff.diff_snapshots("show bgp summary", BGP_PRE, BGP_POST)
+        self.assertTrue(diff.changed)
+        self.assertEqual(len(diff.removed), 1)
+        self.assertEqual(len(diff.added), 1)
+        self.assertTrue(diff.removed[0].endswith("20"))
+        self.assertTrue(diff.added[0].endswith("Active"))
+        self.assertEqual(diff.summary(), "'show bgp summary' output changed: 1 lines removed, 1 lines added")
+
+    def test_unchanged(self):
+        diff = snapshot_diff.diff_snapshots("show isis neighbors", ISIS.format(27), ISIS.format(9))
+        self.assertFalse(diff.changed)
+        self.assertEqual(diff.format(), "")
+        # the holdtime rule is not used for the other commands
+        self.assertTrue(snapshot_diff.diff_snapshots("show clock", ISIS.format(27), ISIS.format(9)).changed)
+
+    def test_diff_lines(self):
+        old = ["a", "b", "c", "d", "e"]
+        new = ["a", "c", "x", "d", "e", "f"]
+        self.assertEqual(snapshot_diff.diff_lines(old, new), (["b"], ["x", "f"]))
+        self.assertEqual(snapshot_diff.diff_lines(old, old), ([], []))
+        self.assertEqual(snapshot_diff.diff_lines([], new), ([], new))
+
+    def test_normalize(self):
+        self.assertEqual(snapshot_diff.normalize("show clock", "RP/0/RSP0/CPU0:R1#show clock\n"
+                                                 "Mon May 16 21:41:08.690 UTC\nuptime 2w3d"),
+                         ["<prompt>", "<timestamp>", "uptime <uptime>"])
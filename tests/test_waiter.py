@@ -0,0 +1,87 @@
+# =============================================================================
+#
+# Copyright (c) 2016, Cisco Systems
+# All rights reserved.
+#
+# # Author: Klaudiusz Staniek
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF
+# THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from csmpe.core_plugins.csm_install_operations import waiter
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeContext(object):
+    family = "ASR9K"
+
+    def info(self, message):
+        pass
+
+
+class TestWaiter(TestCase):
+    def setUp(self):
+        waiter._learned_durations.clear()
+        self.clock = FakeClock()
+
+    def make_waiter(self, timeout=600):
+        return waiter.Waiter(FakeContext(), "reload", timeout, min_interval=5, max_interval=30,
+                             clock=self.clock.time, sleep=self.clock.sleep)
+
+    def test_backoff(self):
+        self.assertTrue(self.make_waiter().wait(lambda: self.clock.now >= 60))
+        self.assertEqual(self.clock.sleeps[:4], [5, 7.5, 11.25, 16.875])
+        self.assertTrue(max(self.clock.sleeps) <= 30)
+
+    def test_deadline(self):
+        self.assertFalse(self.make_waiter(timeout=100).wait(lambda: False))
+        self.assertEqual(self.clock.now, 100)
+
+    def test_learned_duration(self):
+        self.make_waiter().wait(lambda: self.clock.now >= 300)
+        expected = waiter._learned_durations[("ASR9K", "reload")]
+        self.assertTrue(300 <= expected < 330)
+
+        self.clock.now = 0.0
+        self.clock.sleeps = []
+        checks = []
+
+        def predicate():
+            checks.append(self.clock.now)
+            return self.clock.now >= 300
+
+        self.make_waiter().wait(predicate)
+        # polls before the typical duration are skipped and the completion is detected within min interval
+        self.assertTrue(len([check for check in checks if check < 0.9 * expected]) <= 10)
+        self.assertTrue(self.clock.now < 305)